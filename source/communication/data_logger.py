@@ -27,6 +27,7 @@ class Data_logger:
     def __init__(self, board, print_func=None):
         self.board = board
         self.print_func = print_func
+        self.log_func = None  # Function passed new data to log, if None data strings are passed to print_func.
         self.reset()
 
     def reset(self):
@@ -98,10 +99,13 @@ class Data_logger:
 
     def process_data(self, new_data):
         """If data_file is open new data is written to file.  If print_func is specified
-        human readable data strings are passed to it."""
+        human readable data strings are passed to it.  If log_func is specified new data
+        is passed to it instead, so the log can format data only when it is displayed."""
         if self.data_file:
             self.write_to_file(new_data)
-        if self.print_func:
+        if self.log_func:
+            self.log_func(new_data)
+        elif self.print_func:
             self.print_func(self.data_to_string(new_data, prettify=True), end="")
 
     def write_to_file(self, new_data):
@@ -117,19 +121,19 @@ class Data_logger:
     def data_to_string(self, new_data, prettify=False, max_len=60):
         """Convert list of data tuples into a string.  If prettify is True the string is formatted
         for the GUI data log, if False for the tsv data file."""
-        data_string = ""
+        rows = []
         for nd in new_data:
             time = ms_to_readable_time(nd.time) if prettify else nd.time
             if nd.type == MsgType.STATE:  # State entry.
-                data_string += self.tsv_row_str("state", time, content=self.board.sm_info.ID2name[nd.content])
+                rows.append(self.tsv_row_str("state", time, content=self.board.sm_info.ID2name[nd.content]))
             elif nd.type == MsgType.EVENT:  # Event.
-                data_string += self.tsv_row_str("event", time, nd.subtype, self.board.sm_info.ID2name[nd.content])
+                rows.append(self.tsv_row_str("event", time, nd.subtype, self.board.sm_info.ID2name[nd.content]))
             elif nd.type == MsgType.PRINT:  # User print output.
                 if prettify:
                     print_str = nd.content.replace("\n", "\n\t\t\t")
                 else:
                     print_str = nd.content.replace("\n", "|").replace("\r", "|")
-                data_string += self.tsv_row_str("print", time, nd.subtype, content=print_str)
+                rows.append(self.tsv_row_str("print", time, nd.subtype, content=print_str))
             elif nd.type == MsgType.VARBL:  # Variable.
                 var_str = nd.content
                 if prettify:
@@ -139,9 +143,13 @@ class Data_logger:
                         for var_name, var_value in sorted(variables_dict.items(), key=lambda x: x[0].lower()):
                             var_str += f'\t\t\t"{var_name}": {var_value}\n'
                         var_str += "\t\t\t}"
-                data_string += self.tsv_row_str("variable", time, nd.subtype, content=var_str)
+                rows.append(self.tsv_row_str("variable", time, nd.subtype, content=var_str))
             elif nd.type == MsgType.WARNG:  # Warning
-                data_string += self.tsv_row_str("warning", time, content=nd.content)
+                rows.append(self.tsv_row_str("warning", time, content=nd.content))
+            elif nd.type == MsgType.PROFL:  # Framework profile summary, one info line per item.
+                for key, value in json.loads(nd.content).items():
+                    value_str = json.dumps(value, separators=(",", ":"))
+                    rows.append(self.tsv_row_str("info", time, "profile_" + key, content=value_str))
             elif nd.type in (MsgType.ERROR, MsgType.STOPF):  # Error or stop framework.
                 self.end_datetime = datetime.utcnow()
                 self.end_timestamp = nd.time
@@ -151,8 +159,8 @@ class Data_logger:
                         content = f"\n\n{content}"
                     else:
                         content = content.replace("\n", "|").replace("\r", "|")
-                    data_string += self.tsv_row_str("error", time, content=content)
-        return data_string
+                    rows.append(self.tsv_row_str("error", time, content=content))
+        return "".join(rows)
 
     def print_message(self, msg, source="u"):
         """Print a message to the log and data file. If called pre-run message is logged when
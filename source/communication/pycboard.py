@@ -3,13 +3,15 @@ import re
 import time
 import json
 import inspect
+import tokenize
+import threading
 from serial import SerialException
 from array import array
 from .pyboard import Pyboard, PyboardError
 from .data_logger import Data_logger
 from .message import MsgType, Datatuple
 from source.gui.settings import VERSION, user_folder
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 # ----------------------------------------------------------------------------------------
 #  Helper functions.
@@ -53,6 +55,128 @@ def _receive_file(file_path, file_size):
             usb.write(b"ER")
 
 
+# Used on pyboard for windowed file transfer, an acknowledgement is sent after each
+# block of ack_size bytes is received rather than after every buffer.  ack_size must
+# be at least the buffer size.
+def _receive_file_windowed(file_path, file_size, ack_size):
+    usb = pyb.USB_VCP()
+    usb.setinterrupt(-1)
+    buf = bytearray(4096)
+    buf_mv = memoryview(buf)
+    bytes_received = 0
+    next_ack = min(ack_size, file_size)
+    try:
+        with open(file_path, "wb") as f:
+            while bytes_received < file_size:
+                # Only request the bytes due before the next acknowledgement, as the computer
+                # waits for it before sending more, so recv returns as soon as they arrive.
+                bytes_read = usb.recv(buf_mv[: min(len(buf), next_ack - bytes_received)], timeout=5000)
+                if not bytes_read:
+                    raise OSError  # Timed out waiting for data.
+                f.write(buf_mv[:bytes_read])
+                bytes_received += bytes_read
+                if bytes_received >= next_ack:
+                    usb.write(b"OK")
+                    next_ack = min(next_ack + ack_size, file_size)
+    except:
+        fs_stat = os.statvfs("/flash")
+        fs_free_space = fs_stat[0] * fs_stat[3]
+        if fs_free_space < file_size - bytes_received:
+            usb.write(b"NS")  # Out of space.
+        else:
+            usb.write(b"ER")
+
+
+# Used on pyboard to read the file manifest, entries for files whose size does not match
+# the manifest, e.g. due to an interrupted transfer, are removed.
+def _read_manifest(manifest_path):
+    import ujson
+
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = ujson.loads(f.read())
+    except:
+        return {}
+    for file_path in list(manifest.keys()):
+        try:
+            if os.stat(file_path)[6] != manifest[file_path][1]:
+                del manifest[file_path]
+        except:
+            del manifest[file_path]
+    return manifest
+
+
+class Device_file_index:
+    """Index of the device driver files in the devices folder, mapping device class names
+    to the file where they are defined and each file to the names it uses.  A file is only
+    re-read when its modification time or size changes, and one index is shared by all
+    Pycboard instances so setting up many boards does not rescan the same files."""
+
+    class_pattern = re.compile(r"^class\s+(\w+)", re.MULTILINE)  # Top level class definitions.
+
+    def __init__(self):
+        self.file_info = {}  # {file_path: (stat_key, defined_classes, used_names)}
+        self.file_hashes = {}  # {file_path: (stat_key, file_hash)}
+        self.device_class2file = {}  # {device_classname: device_filename}
+        self.lock = threading.Lock()
+
+    def _scan_file(self, file_path):
+        """Return the (defined_classes, used_names) of a file, reading the file only if it
+        has changed since it was last scanned."""
+        stat = os.stat(file_path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.file_info.get(file_path)
+        if cached and cached[0] == stat_key:
+            return cached[1:]
+        with open(file_path, "r") as f:
+            file_content = f.read()
+        defined_classes = set(self.class_pattern.findall(file_content))
+        try:  # Python name tokens, excluding strings and comments.
+            tokens = tokenize.generate_tokens(iter(file_content.splitlines(keepends=True)).__next__)
+            used_names = {token.string for token in tokens if token.type == tokenize.NAME}
+        except (tokenize.TokenError, SyntaxError):  # File does not tokenize, match identifiers anywhere.
+            used_names = set(re.findall(r"\w+", file_content))
+        self.file_info[file_path] = (stat_key, defined_classes, used_names)
+        return defined_classes, used_names
+
+    def update(self, devices_folder):
+        """Rebuild the device_class2file map, rescanning only new or changed files."""
+        with self.lock:
+            self.device_class2file = {}
+            for device_file in sorted(f for f in os.listdir(devices_folder) if f.endswith(".py")):
+                defined_classes, _ = self._scan_file(os.path.join(devices_folder, device_file))
+                for device_class in defined_classes:
+                    self.device_class2file[device_class] = device_file
+
+    def used_device_files(self, ref_file_path, devices_folder):
+        """Return a list of device driver file names containing device classes used in
+        ref_file, or in the device files it uses."""
+        self.update(devices_folder)
+        with self.lock:
+            ref_file_name = os.path.split(ref_file_path)[-1]
+            device_files = set()
+            files_to_scan = [ref_file_path]
+            while files_to_scan:
+                _, used_names = self._scan_file(files_to_scan.pop())
+                for name in used_names:
+                    device_file = self.device_class2file.get(name)
+                    if device_file and device_file != ref_file_name and device_file not in device_files:
+                        device_files.add(device_file)
+                        files_to_scan.append(os.path.join(devices_folder, device_file))
+            return sorted(device_files)
+
+    def file_hash(self, file_path):
+        """Return the djb2 hash of a file, recomputing it only if the file has changed."""
+        stat = os.stat(file_path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.file_hashes.get(file_path)
+        if cached and cached[0] == stat_key:
+            return cached[1]
+        file_hash = _djb2_file(file_path)
+        self.file_hashes[file_path] = (stat_key, file_hash)
+        return file_hash
+
+
 @dataclass
 class State_machine_info:
     name: str
@@ -64,6 +188,16 @@ class State_machine_info:
     variables: dict
     framework_version: str
     micropython_version: float
+    analog_groups: dict = field(init=False)  # {group_ID: [channel_ID]} of grouped analog streams.
+
+    def __post_init__(self):
+        # Get channel IDs of grouped analog streams, in the order data is interleaved.
+        groups = {}
+        for ID, ai in self.analog_inputs.items():
+            if ai.get("group"):
+                group_ID, index = ai["group"]
+                groups.setdefault(group_ID, {})[index] = ID
+        self.analog_groups = {group_ID: [IDs[i] for i in sorted(IDs)] for group_ID, IDs in groups.items()}
 
 
 # ----------------------------------------------------------------------------------------
@@ -76,7 +210,10 @@ class Pycboard(Pyboard):
     and pyControl operations.
     """
 
-    device_class2file = {}  # Dict mapping device classes to file where they are defined {class_name: device_file}
+    device_index = Device_file_index()  # Index of device classes and file dependencies shared by all boards.
+    manifest_path = "file_manifest.json"  # File on pyboard listing hashes of transferred files.
+    transfer_block_size = 8192  # Bytes sent between acknowledgements in windowed file transfer.
+    transfer_window = 4  # Maximum number of unacknowledged blocks in windowed file transfer.
 
     def __init__(self, serial_port, baudrate=115200, verbose=True, print_func=print, data_consumers=None):
         self.serial_port = serial_port
@@ -85,8 +222,8 @@ class Pycboard(Pyboard):
         self.data_consumers = data_consumers
         self.status = {"serial": None, "framework": None, "usb_mode": None}
         self.device_files_on_pyboard = {}  # Dict {file_name:file_hash} of files in devices folder on pyboard.
-        if not Pycboard.device_class2file:  # Scan devices folder to find files where device classes are defined.
-            self.make_device_class2file_map()
+        self.file_manifest = {}  # Dict {file_path: [file_hash, file_size]} of files transferred to pyboard.
+        self.windowed_transfer = True  # Set False if windowed file transfer fails to use stop-and-wait transfer.
         try:
             super().__init__(self.serial_port, baudrate=baudrate)
             self.status["serial"] = True
@@ -119,12 +256,17 @@ class Pycboard(Pyboard):
                     self.print("pyControl Framework: Import error")
                 return
 
-    def reset(self):
-        """Enter raw repl (soft reboots pyboard), import modules."""
+    def reset(self, read_manifest=True):
+        """Enter raw repl (soft reboots pyboard), import modules.  If read_manifest is False
+        the file manifest in memory is kept rather than read from the pyboard."""
         self.enter_raw_repl()  # Soft resets pyboard.
         self.exec(inspect.getsource(_djb2_file))  # define djb2 hashing function.
         self.exec(inspect.getsource(_receive_file))  # define receive file function.
+        self.exec(inspect.getsource(_receive_file_windowed))  # define windowed receive file function.
+        self.exec(inspect.getsource(_read_manifest))  # define read manifest function.
         self.exec("import os; import gc; import sys; import pyb")
+        if read_manifest:
+            self.read_manifest()
         self.framework_running = False
         error_message = None
         self.status["usb_mode"] = self.eval("pyb.usb_mode()").decode()
@@ -205,6 +347,18 @@ class Pycboard(Pyboard):
         except PyboardError as e:
             raise PyboardError(e)
 
+    def read_manifest(self):
+        """Read the manifest of files transferred to the pyboard and their hashes, stored on
+        the pyboard so unchanged files need not be hashed or transferred again."""
+        try:
+            self.file_manifest = eval(self.eval(f"_read_manifest({repr(self.manifest_path)})").decode())
+        except (PyboardError, SyntaxError):
+            self.file_manifest = {}
+
+    def write_manifest(self):
+        """Write the manifest of transferred files to the pyboard."""
+        self.write_file(self.manifest_path, json.dumps(self.file_manifest))
+
     def get_file_hash(self, target_path):
         """Get the djb2 hash of a file on the pyboard."""
         try:
@@ -213,20 +367,42 @@ class Pycboard(Pyboard):
             return -1
         return file_hash
 
-    def transfer_file(self, file_path, target_path=None):
-        """Copy file at file_path to location target_path on pyboard."""
+    def transfer_file(self, file_path, target_path=None, update_manifest=True):
+        """Copy file at file_path to location target_path on pyboard.  Files whose hash
+        matches the file manifest are not transferred.  If update_manifest is False the
+        manifest stored on the pyboard is not updated, so write_manifest must be called
+        after transferring files.  Files are sent using windowed transfer, falling back to
+        stop-and-wait transfer if this fails.  Returns the number of bytes sent."""
         if not target_path:
             target_path = os.path.split(file_path)[-1]
         file_size = os.path.getsize(file_path)
-        file_hash = _djb2_file(file_path)
+        file_hash = Pycboard.device_index.file_hash(file_path)
+        if self.file_manifest.get(target_path) == [file_hash, file_size]:
+            return 0  # File on pyboard is unchanged.
+        if self.file_manifest.pop(target_path, None) and update_manifest:  # Remove stale entry in case transfer fails.
+            self.write_manifest()
         error_message = (
             "\n\nError: Unable to transfer file. See the troubleshooting docs:\n"
             "https://pycontrol.readthedocs.io/en/latest/user-guide/troubleshooting/"
         )
         # Try to load file, return once file hash on board matches that on computer.
+        bytes_sent = 0
         for i in range(10):
             if file_hash == self.get_file_hash(target_path):
-                return
+                self.file_manifest[target_path] = [file_hash, file_size]
+                if update_manifest:
+                    self.write_manifest()
+                return bytes_sent
+            bytes_sent += file_size
+            if self.windowed_transfer:
+                response_bytes = self._send_file_windowed(file_path, target_path, file_size)
+                if response_bytes == b"NS":
+                    self.print("\n\nInsufficient space on pyboard filesystem to transfer file.")
+                    raise PyboardError
+                elif response_bytes != b"OK":  # Use stop-and-wait transfer.
+                    self.windowed_transfer = False
+                    self.reset(read_manifest=False)  # Keep entries not yet written to pyboard.
+                continue
             self.exec_raw_no_follow("_receive_file('{}',{})".format(target_path, file_size))
             with open(file_path, "rb") as f:
                 while True:
@@ -248,49 +424,106 @@ class Pycboard(Pyboard):
         self.print(error_message)
         raise PyboardError
 
+    def _send_file_windowed(self, file_path, target_path, file_size):
+        """Send file to pyboard using windowed transfer. Up to transfer_window blocks of
+        transfer_block_size bytes are sent before waiting for the board to acknowledge the
+        oldest unacknowledged block.  Returns b"OK" if transfer completed, otherwise the
+        response received from the board, which is empty if the board did not respond."""
+        self.exec_raw_no_follow(f"_receive_file_windowed({repr(target_path)},{file_size},{self.transfer_block_size})")
+        serial_timeout = self.serial.timeout
+        self.serial.timeout = 5  # Seconds to wait for acknowledgement.
+        try:
+            n_unacknowledged = 0
+            with open(file_path, "rb") as f:
+                while True:
+                    block = f.read(self.transfer_block_size)
+                    if block:
+                        self.serial.write(block)
+                        n_unacknowledged += 1
+                    if n_unacknowledged == self.transfer_window or (n_unacknowledged and not block):
+                        response_bytes = self.serial.read(2)
+                        if response_bytes != b"OK":
+                            time.sleep(0.01)
+                            self.serial.reset_input_buffer()
+                            return response_bytes
+                        n_unacknowledged -= 1
+                    elif not block:
+                        break
+        finally:
+            self.serial.timeout = serial_timeout
+        self.follow(3)
+        return b"OK"
+
     def transfer_folder(
-        self, folder_path, target_folder=None, file_type="all", files="all", remove_files=True, show_progress=False
+        self,
+        folder_path,
+        target_folder=None,
+        file_type="all",
+        files="all",
+        remove_files=True,
+        show_progress=False,
+        update_manifest=True,
     ):
         """Copy a folder into the root directory of the pyboard.  Folders that
         contain subfolders will not be copied successfully.  To copy only files of
         a specific type, change the file_type argument to the file suffix (e.g. 'py').
-        To copy only specified files pass a list of file names as files argument."""
+        To copy only specified files pass a list of file names as files argument.
+        The file manifest is written once at the end unless update_manifest is False.
+        Returns the number of bytes sent."""
         if not target_folder:
             target_folder = os.path.split(folder_path)[-1]
         if files == "all":
             files = os.listdir(folder_path)
             if file_type != "all":
                 files = [f for f in files if f.split(".")[-1] == file_type]
+        bytes_sent = 0
         try:
-            self.exec("os.mkdir({})".format(repr(target_folder)))
-        except PyboardError:
-            # Folder already exists.
-            if remove_files:  # Remove any files not in sending folder.
-                target_files = self.get_folder_contents(target_folder)
-                remove_files = list(set(target_files) - set(files))
-                for f in remove_files:
-                    target_path = target_folder + "/" + f
-                    self.remove_file(target_path)
-        for f in files:
-            file_path = os.path.join(folder_path, f)
-            target_path = target_folder + "/" + f
-            self.transfer_file(file_path, target_path)
-            if show_progress:
-                self.print(".", end="")
-
-    def remove_file(self, file_path):
-        """Remove a file from the pyboard."""
+            try:
+                self.exec("os.mkdir({})".format(repr(target_folder)))
+            except PyboardError:
+                # Folder already exists.
+                if remove_files:  # Remove any files not in sending folder.
+                    target_files = self.get_folder_contents(target_folder)
+                    remove_files = list(set(target_files) - set(files))
+                    for f in remove_files:
+                        target_path = target_folder + "/" + f
+                        self.remove_file(target_path, update_manifest=False)
+            for f in files:
+                file_path = os.path.join(folder_path, f)
+                target_path = target_folder + "/" + f
+                bytes_sent += self.transfer_file(file_path, target_path, update_manifest=False)
+                if show_progress:
+                    self.print(".", end="")
+        finally:
+            if update_manifest:
+                self.write_manifest()
+        return bytes_sent
+
+    def remove_file(self, file_path, update_manifest=True):
+        """Remove a file from the pyboard.  If the file is in the file manifest the manifest
+        on the pyboard is updated, unless update_manifest is False in which case the caller
+        must call write_manifest() once all files have been removed."""
         try:
             self.exec("os.remove({})".format(repr(file_path)))
         except PyboardError:
             pass  # File does not exist.
+        if self.file_manifest.pop(file_path, None) and update_manifest:
+            self.write_manifest()
 
     def get_folder_contents(self, folder_path, get_hash=False):
         """Get a list of the files in a folder on the pyboard, if
-        get_hash=True a dict {file_name:file_hash} is returned instead"""
+        get_hash=True a dict {file_name:file_hash} is returned instead, using
+        hashes from the file manifest where available."""
         file_list = eval(self.eval("os.listdir({})".format(repr(folder_path))).decode())
         if get_hash:
-            return {file_name: self.get_file_hash(folder_path + "/" + file_name) for file_name in file_list}
+            file_hashes = {}
+            for file_name in file_list:
+                file_path = folder_path + "/" + file_name
+                if file_path in self.file_manifest:
+                    file_hashes[file_name] = self.file_manifest[file_path][0]
+                else:
+                    file_hashes[file_name] = self.get_file_hash(file_path)
+            return file_hashes
         else:
             return file_list
 
@@ -298,25 +531,94 @@ class Pycboard(Pyboard):
     # pyControl operations.
     # ------------------------------------------------------------------------------------
 
-    def load_framework(self):
+    def load_framework(self, skip_up_to_date=False):
         """Copy the pyControl framework folder to the board, reset the devices folder
-        on pyboard by removing all devices files, and rebuild the device_class2file dict."""
-        self.print("\nTransferring pyControl framework to pyboard.", end="")
-        self.transfer_folder(os.path.join("source", "pyControl"), file_type="py", show_progress=True)
-        self.transfer_folder(user_folder("devices"), files=["__init__.py"], remove_files=True, show_progress=True)
-        self.remove_file("hardware_definition.py")
-        self.make_device_class2file_map()
+        on pyboard by removing all devices files.  The file manifest is not trusted, each
+        file is checked against its hash on the pyboard and sent if it differs.  If
+        skip_up_to_date is True and the manifest shows the framework is up to date, the
+        framework files are not checked or sent but the devices folder is still reset.
+        Returns True if the framework files were checked and transferred."""
+        up_to_date = skip_up_to_date and self.framework_up_to_date()
+        if up_to_date:
+            self.print("\nFramework up to date, resetting devices folder.", end="")
+        else:
+            self.print("\nTransferring pyControl framework to pyboard.", end="")
+            self.file_manifest = {}
+        start_time = time.perf_counter()
+        bytes_sent = 0
+        try:
+            if not up_to_date:
+                bytes_sent += self.transfer_folder(
+                    os.path.join("source", "pyControl"), file_type="py", show_progress=True, update_manifest=False
+                )
+            bytes_sent += self.transfer_folder(
+                user_folder("devices"),
+                files=["__init__.py"],
+                remove_files=True,
+                show_progress=True,
+                update_manifest=False,
+            )
+            self.remove_file("hardware_definition.py", update_manifest=False)
+        finally:
+            self.write_manifest()
+        transfer_time = time.perf_counter() - start_time
         error_message = self.reset()
         if not self.status["framework"]:
             self.print("\nError importing framework:")
             self.print(error_message)
+        elif transfer_time > 0:
+            self.print(
+                f" OK ({bytes_sent/1000:.0f} kB sent in {transfer_time:.1f}s, {bytes_sent/1000/transfer_time:.0f} kB/s)"
+            )
         else:
-            self.print(" OK")
-        return
+            self.print(f" OK ({bytes_sent/1000:.0f} kB sent)")
+        return not up_to_date
+
+    def files_up_to_date(self, file_paths):
+        """Return True if the file manifest shows that all files in file_paths, a dict
+        {file_path: target_path}, are on the pyboard and unchanged."""
+        return all(
+            self.file_manifest.get(target_path)
+            == [Pycboard.device_index.file_hash(file_path), os.path.getsize(file_path)]
+            for file_path, target_path in file_paths.items()
+        )
+
+    def framework_up_to_date(self):
+        """Return True if the framework on the pyboard imports OK, matches the GUI version
+        and the file manifest shows the framework files are unchanged.  The manifest entries
+        are only checked against the file sizes on the pyboard, not their hashes."""
+        framework_folder = os.path.join("source", "pyControl")
+        file_paths = {
+            os.path.join(framework_folder, f): "pyControl/" + f
+            for f in os.listdir(framework_folder)
+            if f.endswith(".py")
+        }
+        file_paths[os.path.join(user_folder("devices"), "__init__.py")] = "devices/__init__.py"
+        return (
+            bool(self.status["framework"]) and self.framework_version == VERSION and self.files_up_to_date(file_paths)
+        )
+
+    def hardware_definition_up_to_date(self, hwd_path):
+        """Return True if the file manifest shows the hardware definition and the device
+        files it uses are on the pyboard and unchanged."""
+        return bool(self.status["framework"]) and self.files_up_to_date(self._hardware_definition_files(hwd_path))
+
+    def _hardware_definition_files(self, hwd_path):
+        """Return dict {file_path: target_path} of the hardware definition and the device
+        files it uses."""
+        file_paths = {hwd_path: "hardware_definition.py"}
+        for device_file in self._get_used_device_files(hwd_path):
+            file_paths[os.path.join(user_folder("devices"), device_file)] = "devices/" + device_file
+        return file_paths
 
     def load_hardware_definition(self, hwd_path):
-        """Transfer a hardware definition file to pyboard."""
+        """Transfer a hardware definition file to pyboard. The file manifest is not trusted,
+        the hardware definition and device files are checked against their hashes on the
+        pyboard and sent if they differ.  Returns True if the hardware definition was
+        imported OK on the pyboard."""
         if os.path.exists(hwd_path):
+            for target_path in self._hardware_definition_files(hwd_path).values():
+                self.file_manifest.pop(target_path, None)
             self.transfer_device_files(hwd_path)
             self.print("\nTransferring hardware definition to pyboard.", end="")
             self.transfer_file(hwd_path, target_path="hardware_definition.py")
@@ -324,12 +626,14 @@ class Pycboard(Pyboard):
             try:
                 self.exec("import hardware_definition")
                 self.print(" OK")
+                return True
             except PyboardError as e:
                 error_message = e.args[2].decode()
                 self.print("\n\nError importing hardware definition:\n")
                 self.print(error_message)
         else:
             self.print("Hardware definition file not found.")
+        return False
 
     def transfer_device_files(self, ref_file_path):
         """Transfer device driver files defining classes used in ref_file to the pyboard devices folder.
@@ -341,7 +645,7 @@ class Pycboard(Pyboard):
             if device_file not in self.device_files_on_pyboard.keys():
                 files_to_transfer.append(device_file)
             else:
-                file_hash = _djb2_file(os.path.join(user_folder("devices"), device_file))
+                file_hash = Pycboard.device_index.file_hash(os.path.join(user_folder("devices"), device_file))
                 if file_hash != self.device_files_on_pyboard[device_file]:  # File has changed.
                     files_to_transfer.append(device_file)
         if files_to_transfer:
@@ -354,33 +658,7 @@ class Pycboard(Pyboard):
 
     def _get_used_device_files(self, ref_file_path):
         """Return a list of device driver file names containing device classes used in ref_file"""
-        ref_file_name = os.path.split(ref_file_path)[-1]
-        with open(ref_file_path, "r") as f:
-            file_content = f.read()
-        device_files = [
-            device_file
-            for device_class, device_file in Pycboard.device_class2file.items()
-            if device_class in file_content and not ref_file_name == device_file
-        ]
-        # Add any device driver files containing classes used in device_files.
-        for device_file in device_files.copy():
-            device_files += self._get_used_device_files(os.path.join(user_folder("devices"), device_file))
-        device_files = list(set(device_files))  # Remove duplicates.
-        return device_files
-
-    def make_device_class2file_map(self):
-        """Make dict mapping device class names to file in devices folder containing
-        the class definition."""
-        Pycboard.device_class2file = {}  # Dict {device_classname: device_filename}
-        all_device_files = [f for f in os.listdir(user_folder("devices")) if f.endswith(".py")]
-        for device_file in all_device_files:
-            with open(os.path.join(user_folder("devices"), device_file), "r") as f:
-                file_content = f.read()
-            pattern = "[\n\r]class\s*(?P<dcname>\w+)\s*"
-            list(set([d_name for d_name in re.findall(pattern, file_content)]))
-            device_classes = list(set([device_class for device_class in re.findall(pattern, file_content)]))
-            for device_class in device_classes:
-                Pycboard.device_class2file[device_class] = device_file
+        return Pycboard.device_index.used_device_files(ref_file_path, user_folder("devices"))
 
     def setup_state_machine(self, sm_name, sm_dir=None, uploaded=False):
         """Transfer state machine descriptor file sm_name.py from folder sm_dir
@@ -411,11 +689,11 @@ class Pycboard(Pyboard):
         events = self.get_events()
         self.sm_info = State_machine_info(
             name=sm_name,
-            task_hash=_djb2_file(sm_path),
+            task_hash=Pycboard.device_index.file_hash(sm_path),
             states=states,  # {name:ID}
             events=events,  # {name:ID}
             ID2name={ID: name for name, ID in {**states, **events}.items()},  # {ID:name}
-            analog_inputs=self.get_analog_inputs(),  # {ID: {'name':, 'fs':, 'dtype': 'plot':}}
+            analog_inputs=self.get_analog_inputs(),  # {ID: {'name':, 'fs':, 'dtype':, 'plot':, 'group':}}
             variables=self.get_variables(),
             framework_version=self.framework_version,
             micropython_version=self.micropython_version,
@@ -432,13 +710,16 @@ class Pycboard(Pyboard):
         return eval(self.eval("sm.events").decode())
 
     def get_analog_inputs(self):
-        """Return analog_inputs as a dictionary: {ID: {'name':, 'fs':, 'dtype': 'plot':}}"""
+        """Return analog_inputs as a dictionary: {ID: {'name':, 'fs':, 'dtype':, 'plot':, 'group':}}
+        where group is (group_ID, index) for channels streamed by an Analog_group, else None."""
         return eval(self.exec("hw.get_analog_inputs()").decode().strip())
 
-    def start_framework(self, data_output=True):
-        """Start pyControl framwork running on pyboard."""
+    def start_framework(self, data_output=True, profile=False):
+        """Start pyControl framwork running on pyboard.  If profile is True the framework
+        main loop is instrumented and a summary output at the end of the run."""
         self.gc_collect()
         self.exec("fw.data_output = " + repr(data_output))
+        self.exec("fw.profile = " + repr(profile))
         self.serial.reset_input_buffer()
         self.last_message_time = 0
         self.exec_raw_no_follow("fw.run()")
@@ -479,7 +760,8 @@ class Pycboard(Pyboard):
                 # Compute checksum
                 if msg_type == MsgType.ANLOG:  # Need to extract analog data to compute checksum.
                     ID = int.from_bytes(content_bytes[:2], "little")
-                    data = array(self.sm_info.analog_inputs[ID]["dtype"], content_bytes[2:])
+                    group = self.sm_info.analog_groups.get(ID)  # Channel IDs if grouped stream.
+                    data = array(self.sm_info.analog_inputs[group[0] if group else ID]["dtype"], content_bytes[2:])
                     content = (ID, data)
                     message_sum = sum(message[:8]) + sum(data)
                 else:
@@ -495,7 +777,17 @@ class Pycboard(Pyboard):
                     elif msg_type == MsgType.VARBL:
                         content = content_bytes.decode()  # JSON string
                         self.sm_info.variables.update(json.loads(content))
-                    new_data.append(Datatuple(time=self.timestamp, type=msg_type, subtype=msg_subtype, content=content))
+                    elif msg_type == MsgType.PROFL:
+                        content = content_bytes.decode()  # JSON string
+                    if msg_type == MsgType.ANLOG and group:  # Split grouped stream into channels.
+                        new_data.extend(
+                            Datatuple(time=self.timestamp, type=msg_type, content=(channel_ID, data[i :: len(group)]))
+                            for i, channel_ID in enumerate(group)
+                        )
+                    else:
+                        new_data.append(
+                            Datatuple(time=self.timestamp, type=msg_type, subtype=msg_subtype, content=content)
+                        )
                 else:  # Bad checksum
                     new_data.append(
                         Datatuple(time=self.get_timestamp(), type=MsgType.WARNG, content="Bad data checksum.")
@@ -532,7 +824,7 @@ class Pycboard(Pyboard):
         """Send data to the pyboard while framework is running."""
         encoded_data = cmd_type.encode() + data.encode()
         data_len = len(encoded_data).to_bytes(2, "little")
-        checksum = sum(encoded_data).to_bytes(2, "little")
+        checksum = (sum(encoded_data) & 0xFFFF).to_bytes(2, "little")
         self.serial.write(command.encode() + data_len + encoded_data + checksum)
 
     # ------------------------------------------------------------------------------------
@@ -554,6 +846,22 @@ class Pycboard(Pyboard):
                 self.sm_info.variables[v_name] = v_value
             return set_OK
 
+    def set_variables(self, v_dict):
+        """Set the values of multiple state machine variables using a single REPL call.
+        Framework must not be running.  Returns dict {v_name: set_OK}, each variable is set
+        separately on the board so a value that can not be set does not affect the others."""
+        for v_name in v_dict:
+            if v_name not in self.sm_info.variables:
+                raise PyboardError("Invalid variable name: {}".format(v_name))
+        if not v_dict:
+            return {}
+        v_strs = {v_name: repr(v_value) for v_name, v_value in v_dict.items()}
+        set_OK = eval(self.eval(f"sm.set_variables({repr(v_strs)})").decode())
+        for v_name, v_set_OK in set_OK.items():
+            if v_set_OK:
+                self.sm_info.variables[v_name] = v_dict[v_name]
+        return set_OK
+
     def get_variable(self, v_name):
         """Get the value of a state machine variable. If framework not running returns
         variable value if got OK, None if get fails.  Returns None if framework
@@ -569,6 +877,22 @@ class Pycboard(Pyboard):
             except Exception:  # Variable is a string.
                 return var_str
 
-    def get_variables(self):
-        """Return variables as a dictionary {v_name: v_value}"""
-        return eval(self.eval("{k: v for k, v in sm.variables.__dict__.items() if not hasattr(v, '__init__')}"))
+    def get_variables(self, v_names=None):
+        """Return variables as a dictionary {v_name: v_value}.  If v_names is specified only the
+        named variables are returned, read from the board using a single REPL call, with value
+        None for any variable which could not be read.  Framework must not be running."""
+        if v_names is None:
+            return eval(self.eval("{k: v for k, v in sm.variables.__dict__.items() if not hasattr(v, '__init__')}"))
+        for v_name in v_names:
+            if v_name not in self.sm_info.variables:
+                raise PyboardError("Invalid variable name: {}".format(v_name))
+        if not v_names:
+            return {}
+        var_strs = eval(self.eval(f"sm.get_variables({repr(list(v_names))})").decode())
+        v_dict = {}
+        for v_name, var_str in var_strs.items():
+            try:
+                v_dict[v_name] = eval(var_str)
+            except Exception:  # Variable is a string.
+                v_dict[v_name] = var_str
+        return v_dict
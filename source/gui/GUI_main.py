@@ -1,4 +1,3 @@
-import os
 import sys
 import ctypes
 import traceback
@@ -6,15 +5,15 @@ import logging
 import platform
 
 from pathlib import Path
-from serial.tools import list_ports
 from pyqtgraph.Qt import QtGui, QtCore, QtWidgets
 
-from source.gui.settings import VERSION, get_setting, user_folder
+from source.gui.settings import VERSION, get_setting, user_folder, settings_store
 from source.gui.run_task_tab import Run_task_tab
 from source.gui.dialogs import Keyboard_shortcuts_dialog, Settings_dialog, Error_log_dialog
 from source.gui.configure_experiment_tab import Configure_experiment_tab
 from source.gui.run_experiment_tab import Run_experiment_tab
 from source.gui.setups_tab import Setups_tab
+from source.gui.utility import Folder_watcher, Serial_port_watcher
 
 if platform.system() == "Windows":  # Needed on windows to get taskbar icon to display correctly.
     ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("pyControl")
@@ -43,6 +42,10 @@ class GUI_main(QtWidgets.QMainWindow):
         self.data_dir_changed = False
         self.current_tab_ind = 0  # Which tab is currently selected.
         self.app = app
+        self.task_watcher = None  # Folder_watcher for tasks folder.
+        self.experiment_watcher = None  # Folder_watcher for experiments folder.
+        self.port_watcher = Serial_port_watcher(self)
+        settings_store.subscribe(self.settings_changed)
 
         # Dialogs.
         self.shortcuts_dialog = Keyboard_shortcuts_dialog(parent=self)
@@ -158,44 +161,38 @@ class GUI_main(QtWidgets.QMainWindow):
                 QtWidgets.QMessageBox.StandardButton.Ok,
             )
 
-    def get_nested_file_list(self, folder_to_walk, file_extension):
-        """Return list of files within a parent directory and subdirectories in the format:
-        subdir_1/subdir_2/filename"""
-        nested_files = []
-        for dirpath, _, filenames in os.walk(folder_to_walk):
-            nested_files += [
-                os.path.join(dirpath, file).split(folder_to_walk)[1][1 : -len(file_extension)]
-                for file in filenames
-                if file.endswith(file_extension)
-            ]
-        return nested_files
-
     def pcx2json(self):
         """Converts legacy .pcx files to .json files"""
         exp_dir = Path(user_folder("experiments"))
         for f in exp_dir.glob("*.pcx"):
             f.rename(f.with_suffix(".json"))
 
+    def settings_changed(self, changed_keys):
+        """Called when the user settings are saved or settings.json is modified."""
+        self.data_dir_changed = True
+        self.task_directory = user_folder("tasks")
+
     def refresh(self):
         """Called regularly when framework not running."""
-        # Scan task folder.
-        # this function gets called every second. Normally we would use get_setting("folder","tasks")
-        # but there is no need to constantly be rereading the settings.json file that isn't changing
-        # so we use this self.task_directory variable that is only updated when a new user settting is saved
-        tasks = self.get_nested_file_list(self.task_directory, ".py")
-        self.available_tasks_changed = tasks != self.available_tasks
-        if self.available_tasks_changed:
-            self.available_tasks = tasks
-        # Scan experiments folder.
-        experiments = self.get_nested_file_list(user_folder("experiments"), ".json")
-        self.available_experiments_changed = experiments != self.available_experiments
-        if self.available_experiments_changed:
-            self.available_experiments = experiments
-        # Scan serial ports.
-        ports = set([c[0] for c in list_ports.comports() if ("Pyboard" in c[1]) or ("USB Serial Device" in c[1])])
-        self.available_ports_changed = ports != self.available_ports
-        if self.available_ports_changed:
-            self.available_ports = ports
+        settings_store.check_for_changes()
+        # Check task folder, folder contents are only listed again if they have changed.
+        if not self.task_watcher or self.task_watcher.folder != self.task_directory:
+            self.task_watcher = Folder_watcher(self.task_directory, ".py", parent=self)
+            self.available_tasks_changed = True
+        else:
+            self.available_tasks_changed = self.task_watcher.check()
+        self.available_tasks = self.task_watcher.files
+        # Check experiments folder.
+        experiments_folder = user_folder("experiments")
+        if not self.experiment_watcher or self.experiment_watcher.folder != experiments_folder:
+            self.experiment_watcher = Folder_watcher(experiments_folder, ".json", parent=self)
+            self.available_experiments_changed = True
+        else:
+            self.available_experiments_changed = self.experiment_watcher.check()
+        self.available_experiments = self.experiment_watcher.files
+        # Check serial ports.
+        self.available_ports_changed = self.port_watcher.check() or self.available_ports is None
+        self.available_ports = self.port_watcher.ports
         # Refresh tabs.
         self.run_task_tab.refresh()
         self.configure_experiment_tab.refresh()
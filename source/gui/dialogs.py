@@ -1,9 +1,8 @@
 import os
 import sys
-import json
 import logging
 from pyqtgraph.Qt import QtGui, QtCore, QtWidgets
-from source.gui.settings import get_setting, user_folder
+from source.gui.settings import get_setting, settings_store
 from source.gui.utility import variable_constants
 
 
@@ -380,12 +379,18 @@ class Settings_dialog(QtWidgets.QDialog):
             ("plotting", "analog_history_dur"),
             " s",
         )
+        self.overview_opengl = Check_setter(
+            self,
+            "Overview uses OpenGL",
+            ("plotting", "overview_opengl"),
+        )
 
         self.plotting_spins = [
             self.update_interval,
             self.event_history_len,
             self.state_history_len,
             self.analog_history_dur,
+            self.overview_opengl,
         ]
         for i, variable in enumerate(self.plotting_spins):
             variable.add_to_grid(plotting_layout, i)
@@ -397,8 +402,10 @@ class Settings_dialog(QtWidgets.QDialog):
         gui_layout = QtWidgets.QGridLayout()
         self.ui_font_size = Spin_setter(self, "UI font size", ("GUI", "ui_font_size"), " pt")
         self.log_font_size = Spin_setter(self, "Log font size", ("GUI", "log_font_size"), " pt")
+        self.log_max_lines = Spin_setter(self, "Log length", ("GUI", "log_max_lines"), " lines", maximum=1000000)
+        self.log_max_lines.spn.setSpecialValueText("Unlimited")
 
-        self.gui_spins = [self.ui_font_size, self.log_font_size]
+        self.gui_spins = [self.ui_font_size, self.log_font_size, self.log_max_lines]
         for i, variable in enumerate(self.gui_spins):
             variable.add_to_grid(gui_layout, i)
         gui_layout.setColumnStretch(2, 1)
@@ -449,18 +456,7 @@ class Settings_dialog(QtWidgets.QDialog):
         for variable in self.path_setters + self.plotting_spins + self.gui_spins:
             top_key, sub_key = variable.key
             user_setting_dict_new[top_key][sub_key] = variable.get()
-        # Store newly edited paths.
-        json_path = os.path.join("config", "settings.json")
-        if os.path.exists(json_path):
-            with open(json_path, "r", encoding="utf-8") as f:
-                user_settings = json.loads(f.read())
-        else:
-            user_settings = {}
-        user_settings.update(user_setting_dict_new)
-        with open(json_path, "w", encoding="utf-8") as f:
-            f.write(json.dumps(user_settings, indent=4))
-        self.parent().data_dir_changed = True
-        self.parent().task_directory = user_folder("tasks")
+        settings_store.save(user_setting_dict_new)
 
         self.save_settings_btn.setEnabled(False)
         QtCore.QCoreApplication.quit()
@@ -554,7 +550,7 @@ class Path_setter(QtWidgets.QHBoxLayout):
 class Spin_setter:
     """Spinbox input for changing user settings"""
 
-    def __init__(self, parent, label, key, suffix=None):
+    def __init__(self, parent, label, key, suffix=None, maximum=10000):
         center = QtCore.Qt.AlignmentFlag.AlignCenter
         Vcenter = QtCore.Qt.AlignmentFlag.AlignVCenter
         right = QtCore.Qt.AlignmentFlag.AlignRight
@@ -566,7 +562,7 @@ class Spin_setter:
         self.label.setAlignment(right | Vcenter)
 
         self.spn = QtWidgets.QSpinBox()
-        self.spn.setMaximum(10000)
+        self.spn.setMaximum(maximum)
         self.spn.setAlignment(center)
         self.spn.setMinimumWidth(spin_width)
         if suffix:
@@ -599,6 +595,9 @@ class Spin_setter:
                     self.parent.save_settings_btn.setEnabled(False)
                     self.parent.discard_changes_btn.setEnabled(False)
 
+        self.deselect()
+
+    def deselect(self):
         self.spn.lineEdit().deselect()
 
     def fill_with_default(self):
@@ -614,6 +613,37 @@ class Spin_setter:
         return self.spn.value()
 
 
+class Check_setter(Spin_setter):
+    """Checkbox input for changing boolean user settings"""
+
+    def __init__(self, parent, label, key):
+        Vcenter = QtCore.Qt.AlignmentFlag.AlignVCenter
+        right = QtCore.Qt.AlignmentFlag.AlignRight
+        self.parent = parent
+        self.key = key
+        self.edited = False
+        self.label = QtWidgets.QLabel(label)
+        self.label.setAlignment(right | Vcenter)
+
+        self.spn = QtWidgets.QCheckBox()
+        self.spn.stateChanged.connect(self.show_edit)
+
+    def deselect(self):
+        pass
+
+    def fill_with_default(self):
+        top_key, sub_key = self.key
+        self.spn.setChecked(get_setting(top_key, sub_key, want_default=True))
+
+    def reset(self):
+        self.start_value = get_setting(*self.key)
+        self.spn.setChecked(self.start_value)
+        self.show_edit()
+
+    def get(self):
+        return self.spn.isChecked()
+
+
 # Error log dialog. ---------------------------------------------------------
 class Error_log_dialog(QtWidgets.QDialog):
     def __init__(self, parent):
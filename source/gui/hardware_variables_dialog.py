@@ -150,16 +150,25 @@ def get_task_hw_vars(task_file_path):
     return list(set(["hw_" + v_name for v_name in re.findall(pattern, task_file_content, flags=re.MULTILINE)]))
 
 
-def set_hardware_variables(parent, task_hw_vars):
+def get_hardware_variables(parent, task_hw_vars):
     # parent is either a run_task tab or an experiment subjectbox
+    # Returns dict {var_name: var_value} and list of (var_name, value_str, "(hardware variable)") for printing.
     setups_dict = parent.GUI_main.setups_tab.get_setups_from_json()
     setup_hw_variables = setups_dict[parent.serial_port].get("variables")
+    hw_vars_dict = {}
     hw_vars_set = []
     for hw_var in task_hw_vars:
         var_name = hw_var
         var_value = setup_hw_variables.get(hw_var)
         hw_vars_set.append((var_name, str(var_value), "(hardware variable)"))
-        parent.board.set_variable(var_name, var_value)
+        hw_vars_dict[var_name] = var_value
+    return hw_vars_dict, hw_vars_set
+
+
+def set_hardware_variables(parent, task_hw_vars):
+    # parent is either a run_task tab or an experiment subjectbox
+    hw_vars_dict, hw_vars_set = get_hardware_variables(parent, task_hw_vars)
+    parent.board.set_variables(hw_vars_dict)
     return hw_vars_set
 
 
@@ -1,9 +1,10 @@
 import time
+from collections import deque
 from datetime import timedelta
 import numpy as np
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtGui, QtWidgets, QtCore
-from source.gui.settings import get_setting
+from source.gui.settings import get_setting, settings_store
 from source.gui.utility import detachableTabWidget
 from source.communication.pycboard import MsgType
 
@@ -28,6 +29,8 @@ class Task_plot(QtWidgets.QWidget):
         self.pause_button = QtWidgets.QPushButton()
         self.pause_button.setEnabled(False)
         self.pause_button.setCheckable(True)
+        self.frame_time_label = QtWidgets.QLabel()
+        self.frame_time_label.setStyleSheet("color: grey;")
         self.events_plot.axis.setXLink(self.states_plot.axis)
         self.analog_plot.axis.setXLink(self.states_plot.axis)
         self.analog_plot.axis.setVisible(False)
@@ -39,6 +42,7 @@ class Task_plot(QtWidgets.QWidget):
         self.layout.addWidget(self.events_plot.axis, 1, 0, 1, 3)
         self.layout.addWidget(self.analog_plot.axis, 2, 0, 1, 3)
         self.layout.addWidget(self.pause_button, 3, 0, 1, 3, QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.layout.addWidget(self.frame_time_label, 3, 2, QtCore.Qt.AlignmentFlag.AlignRight)
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(self.layout)
 
@@ -69,6 +73,8 @@ class Task_plot(QtWidgets.QWidget):
         self.pause_button.setEnabled(True)
         self.update_pause_btn_text()
         self.start_time = time.time()
+        self.last_update_time = 0
+        self.data_changed = False
         self.states_plot.run_start()
         self.events_plot.run_start()
         self.analog_plot.run_start()
@@ -78,21 +84,34 @@ class Task_plot(QtWidgets.QWidget):
     def run_stop(self):
         self.pause_button.setEnabled(False)
         self.run_clock.run_stop()
+        self.frame_time_label.setText("")
 
     def process_data(self, new_data):
         """Store new data from board."""
         self.states_plot.process_data(new_data)
         self.events_plot.process_data(new_data)
         self.analog_plot.process_data(new_data)
+        self.data_changed = True
 
     def update(self):
-        """Update plots."""
-        if not self.pause_button.isChecked():
-            run_time = time.time() - self.start_time
-            self.states_plot.update(run_time)
-            self.events_plot.update(run_time)
-            self.analog_plot.update(run_time)
-            self.run_clock.update(run_time)
+        """Update plots unless plotting is paused, the plots are not visible, or there is no new
+        data and the plots have scrolled by less than one pixel since the last update.  Return
+        True if the plots were updated."""
+        if self.pause_button.isChecked() or self.visibleRegion().isEmpty():
+            return False
+        run_time = time.time() - self.start_time
+        view_box = self.states_plot.axis.getViewBox()
+        x_range = view_box.viewRange()[0]
+        pixel_dur = (x_range[1] - x_range[0]) / max(view_box.width(), 1)
+        if not self.data_changed and (run_time - self.last_update_time) < pixel_dur:
+            return False
+        self.states_plot.update(run_time)
+        self.events_plot.update(run_time)
+        self.analog_plot.update(run_time)
+        self.run_clock.update(run_time)
+        self.last_update_time = run_time
+        self.data_changed = False
+        return True
 
     def update_pause_btn_text(self):
         if self.pause_button.isChecked():
@@ -107,9 +126,13 @@ class Task_plot(QtWidgets.QWidget):
 
 
 class States_plot:
+    """Plots state history as horizontal line segments.  Segments are stored in a ring buffer
+    in absolute time and the plot items are translated by the run time on each update, so
+    only plots whose data has changed need to be redrawn."""
+
     def __init__(self, parent=None, data_len=100):
         self.task_plot = parent
-        self.data_len = data_len
+        self.data_len = max(data_len, 2)
         self.axis = pg.PlotWidget(title="States")
         self.axis.showAxis("right")
         self.axis.hideAxis("left")
@@ -124,42 +147,69 @@ class States_plot:
         self.axis.getAxis("right").setTicks([[(i, n) for (n, i) in sm_info.states.items()]])
         self.axis.setYRange(min(self.state_IDs), max(self.state_IDs), padding=0.1)
         self.n_colours = len(sm_info.states) + len(sm_info.events)
-        self.plots = {
-            ID: self.axis.plot(pen=pg.mkPen(pg.intColor(ID, self.n_colours), width=3)) for ID in self.state_IDs
-        }
+        self.pens = {ID: pg.mkPen(pg.intColor(ID, self.n_colours), width=3) for ID in self.state_IDs}
+        self.plots = {ID: self.axis.plot(pen=self.pens[ID]) for ID in self.state_IDs}
+        self.current_state_plot = self.axis.plot()  # Plot for the segment of the current state.
         self.axis.getAxis("right").setWidth(self.task_plot.axiswidth)
         self.axis.getAxis("right").setStyle(hideOverlappingLabels=False)
 
     def run_start(self):
-        self.data = np.zeros([self.data_len * 2, 2], int)
-        for plot in self.plots.values():
+        self.times = np.zeros([self.data_len, 2])  # State entry and exit times (seconds).
+        self.IDs = np.zeros(self.data_len, int)  # State ID of each segment, 0 if segment is unused.
+        self.head = 0  # Index of the next segment to write.
+        self.current_segment = None  # Index of the segment for the current state.
+        self.state_segments = {ID: deque() for ID in self.state_IDs}  # Indices of completed segments by state.
+        self.changed_states = set()  # IDs of states whose completed segments have changed.
+        self.current_state_changed = False
+        for plot in list(self.plots.values()) + [self.current_state_plot]:
             plot.setData(x=[], y=[])
 
     def process_data(self, new_data):
         """Store new data from board"""
-        new_states = [nd for nd in new_data if nd.type == MsgType.STATE]
-        if new_states:
-            n_new = len(new_states)
-            self.data = np.roll(self.data, -2 * n_new, axis=0)
-            for i, nd in enumerate(new_states):  # Update data array.
-                j = 2 * (-n_new + i)  # Index of state entry in self.data
-                self.data[j - 1 :, 0] = nd.time
-                self.data[j:, 1] = nd.content
+        for nd in new_data:
+            if nd.type != MsgType.STATE:
+                continue
+            if self.current_segment is not None:  # Complete segment of previous state.
+                previous_ID = self.IDs[self.current_segment]
+                self.times[self.current_segment, 1] = nd.time / 1000
+                self.state_segments[previous_ID].append(self.current_segment)
+                self.changed_states.add(previous_ID)
+            overwritten_ID = self.IDs[self.head]
+            if overwritten_ID:  # Oldest segment is overwritten.
+                self.state_segments[overwritten_ID].popleft()
+                self.changed_states.add(overwritten_ID)
+            self.times[self.head, 0] = nd.time / 1000
+            self.IDs[self.head] = nd.content
+            self.current_segment = self.head
+            self.current_state_changed = True
+            self.head = (self.head + 1) % self.data_len
 
     def update(self, run_time):
         """Update plots."""
-        self.data[-1, 0] = run_time * 1000  # Update exit time of current state to current time.
-        for ID in self.state_IDs:
-            state_data = self.data[self.data[:, 1] == ID, :]
-            timestamps, IDs = (state_data[:, 0] / 1000 - run_time, state_data[:, 1])
-            if timestamps.size > 0:
-                self.plots[ID].setData(x=timestamps, y=IDs, connect="pairs")
+        for ID in self.changed_states:
+            segments = list(self.state_segments[ID])
+            self.plots[ID].setData(x=self.times[segments].ravel(), y=np.full(2 * len(segments), ID), connect="pairs")
+        self.changed_states.clear()
+        if self.current_segment is not None:
+            current_ID = self.IDs[self.current_segment]
+            if self.current_state_changed:
+                self.current_state_plot.setPen(self.pens[current_ID])
+                self.current_state_changed = False
+            self.current_state_plot.setData(
+                x=[self.times[self.current_segment, 0], run_time], y=[current_ID, current_ID]
+            )
+        for plot in list(self.plots.values()) + [self.current_state_plot]:
+            plot.setPos(-run_time, 0)
 
 
 # Events_plot--------------------------------------------------------
 
 
 class Events_plot:
+    """Plots events as points, using one scatter plot per event ID.  Events are stored in a ring
+    buffer in absolute time and plots are translated by the run time on each update, so only the
+    plots of event IDs with new or overwritten events are redrawn."""
+
     def __init__(self, parent=None, data_len=100):
         self.task_plot = parent
         self.axis = pg.PlotWidget(title="Events")
@@ -180,42 +230,59 @@ class Events_plot:
         self.axis.getAxis("right").setWidth(self.task_plot.axiswidth)
         if self.event_IDs:  # Task has events.
             self.axis.setYRange(min(self.event_IDs), max(self.event_IDs), padding=0.1)
-            self.n_colours = len(sm_info.states) + len(sm_info.events)
-            self.plot = self.axis.plot(pen=None, symbol="o", symbolSize=6, symbolPen=None)
+            self.plots = {
+                ID: self.axis.plot(pen=None, symbol="o", symbolSize=6, symbolPen=None, symbolBrush=pg.intColor(ID))
+                for ID in self.event_IDs
+            }
 
     def run_start(self):
         if not self.event_IDs:
             return  # State machine can have no events.
-        self.plot.clear()
-        self.data = np.zeros([self.data_len, 2])
+        for plot in self.plots.values():
+            plot.clear()
+        self.times = np.zeros(self.data_len)  # Event times (seconds).
+        self.IDs = np.zeros(self.data_len, int)  # Event IDs, 0 if entry is unused.
+        self.head = 0  # Index of the next entry to write.
+        self.event_entries = {ID: deque() for ID in self.event_IDs}  # Indices of entries by event ID.
+        self.changed_events = set()  # IDs of events whose entries have changed.
 
     def process_data(self, new_data):
         """Store new data from board."""
         if not self.event_IDs:
             return  # State machine can have no events.
-        new_events = [nd for nd in new_data if nd.type == MsgType.EVENT]
-        if new_events:
-            n_new = len(new_events)
-            self.data = np.roll(self.data, -n_new, axis=0)
-            for i, nd in enumerate(new_events):
-                self.data[-n_new + i, 0] = nd.time / 1000
-                self.data[-n_new + i, 1] = nd.content
+        for nd in new_data:
+            if nd.type != MsgType.EVENT:
+                continue
+            overwritten_ID = self.IDs[self.head]
+            if overwritten_ID:  # Oldest entry is overwritten.
+                self.event_entries[overwritten_ID].popleft()
+                self.changed_events.add(overwritten_ID)
+            self.times[self.head] = nd.time / 1000
+            self.IDs[self.head] = nd.content
+            self.event_entries[nd.content].append(self.head)
+            self.changed_events.add(nd.content)
+            self.head = (self.head + 1) % self.data_len
 
     def update(self, run_time):
         """Update plots"""
         if not self.event_IDs:
             return
-        self.plot.setData(
-            x=self.data[:, 0] - run_time,
-            y=self.data[:, 1],
-            symbolBrush=[pg.intColor(ID) for ID in self.data[:, 1]],
-        )
+        for ID in self.changed_events:
+            entries = list(self.event_entries[ID])
+            self.plots[ID].setData(x=self.times[entries], y=np.full(len(entries), ID))
+        self.changed_events.clear()
+        for plot in self.plots.values():
+            plot.setPos(-run_time, 0)
 
 
 # ------------------------------------------------------------------------------------------
 
 
 class Analog_plot:
+    """Plots analog inputs.  Data is stored in Analog_store ring buffers with min/max envelopes
+    at multiple decimation factors, and each plot draws the envelope level that gives roughly
+    one point per pixel column of the visible time range."""
+
     def __init__(self, parent=None, data_dur=10):
         self.task_plot = parent
         self.data_dur = data_dur
@@ -246,8 +313,9 @@ class Analog_plot:
             return  # State machine may not have analog inputs.
         for plot in self.plots.values():
             plot.clear()
-        self.data = {ID: np.zeros([ai["fs"] * self.data_dur, 2]) for ID, ai in self.inputs.items()}
-        self.updated_inputs = []
+        self.data = {ID: Analog_store(ai["fs"] * self.data_dur) for ID, ai in self.inputs.items()}
+        self.plotted_levels = {ID: None for ID in self.inputs.keys()}  # Envelope level currently plotted.
+        self.updated_inputs = set()
 
     def process_data(self, new_data):
         """Store new data from board."""
@@ -257,17 +325,96 @@ class Analog_plot:
         for na in new_analog:
             ID, data = na.content
             if ID in self.plots.keys():
-                new_len = len(data)
-                t = na.time / 1000 + np.arange(new_len) / self.inputs[ID]["fs"]
-                self.data[ID] = np.roll(self.data[ID], -new_len, axis=0)
-                self.data[ID][-new_len:, :] = np.vstack([t, data]).T
+                t = na.time / 1000 + np.arange(len(data)) / self.inputs[ID]["fs"]
+                self.data[ID].put(t, np.asarray(data))
+                self.updated_inputs.add(ID)
 
     def update(self, run_time):
         """Update plots."""
         if not self.inputs:
             return  # State machine may not have analog inputs.
-        for ID in self.inputs.keys():
-            self.plots[ID].setData(x=self.data[ID][:, 0] - run_time, y=self.data[ID][:, 1])
+        view_box = self.axis.getViewBox()
+        x_range = view_box.viewRange()[0]
+        n_pixels = max(view_box.width(), 100)
+        for ID, ai in self.inputs.items():
+            level = self.data[ID].get_level(max_bins=n_pixels * ai["fs"] * self.data_dur / (x_range[1] - x_range[0]))
+            if ID in self.updated_inputs or level != self.plotted_levels[ID]:
+                x, y = self.data[ID].get_plot_data(level)
+                self.plots[ID].setData(x=x, y=y)
+                self.plotted_levels[ID] = level
+            self.plots[ID].setPos(-run_time, 0)
+        self.updated_inputs.clear()
+
+
+class Minmax_ring:
+    """Ring buffer of (time, min, max) bins.  Each bin is written at two positions in an array
+    of twice the buffer capacity, so the buffer contents in time order are always available
+    as a contiguous view without copying."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros([3, 2 * capacity])
+        self.head = 0  # Index of the next bin to write.
+        self.count = 0  # Number of bins stored, saturates at capacity.
+
+    def put(self, bins):
+        """Store array of bins with shape [3, n_bins]."""
+        bins = bins[:, -self.capacity :]
+        n_bins = bins.shape[1]
+        inds = (self.head + np.arange(n_bins)) % self.capacity
+        self.data[:, inds] = bins
+        self.data[:, inds + self.capacity] = bins
+        self.head = (self.head + n_bins) % self.capacity
+        self.count = min(self.count + n_bins, self.capacity)
+
+    def view(self):
+        """Return the stored bins in time order."""
+        end = self.head + self.capacity
+        return self.data[:, end - self.count : end]
+
+
+class Analog_store:
+    """Ring buffer of analog samples with min/max envelopes at decimation factors that
+    increase by decimation_ratio at each level.  Envelopes are computed incrementally as
+    chunks of data arrive, by combining completed bins from the level below."""
+
+    def __init__(self, n_samples, decimation_ratio=4, min_bins=100):
+        self.decimation_ratio = decimation_ratio
+        self.factors = [1]  # Decimation factor of each level, level 0 stores raw samples.
+        self.levels = [Minmax_ring(n_samples)]
+        while n_samples // (self.factors[-1] * decimation_ratio) >= min_bins:
+            self.factors.append(self.factors[-1] * decimation_ratio)
+            self.levels.append(Minmax_ring(n_samples // self.factors[-1]))
+        self.pending = [np.zeros([3, 0]) for level in self.levels]  # Bins not yet combined into next level.
+
+    def put(self, t, data):
+        """Store a chunk of samples with times t."""
+        new_bins = np.vstack([t, data, data])
+        self.levels[0].put(new_bins)
+        for i in range(1, len(self.levels)):
+            new_bins = np.hstack([self.pending[i], new_bins])
+            n_complete = new_bins.shape[1] // self.decimation_ratio
+            self.pending[i] = new_bins[:, n_complete * self.decimation_ratio :]
+            if not n_complete:
+                break
+            binned = new_bins[:, : n_complete * self.decimation_ratio].reshape(3, n_complete, self.decimation_ratio)
+            new_bins = np.vstack([binned[0, :, 0], binned[1].min(axis=1), binned[2].max(axis=1)])
+            self.levels[i].put(new_bins)
+
+    def get_level(self, max_bins):
+        """Return the highest resolution level with at most max_bins bins over the buffer duration."""
+        for i, factor in enumerate(self.factors):
+            if self.levels[0].capacity / factor <= max_bins:
+                return i
+        return len(self.levels) - 1
+
+    def get_plot_data(self, level):
+        """Return x, y arrays for plotting specified level, decimated levels are plotted as
+        a line alternating between the min and max of each bin."""
+        t, bin_min, bin_max = self.levels[level].view()
+        if level == 0:
+            return t, bin_min
+        return np.repeat(t, 2), np.column_stack([bin_min, bin_max]).ravel()
 
 
 # -----------------------------------------------------
@@ -315,13 +462,22 @@ class Experiment_plot(QtWidgets.QMainWindow):
         self.subject_tabs = detachableTabWidget(self)
         self.setCentralWidget(self.subject_tabs)
         self.subject_plots = {}
+        self.overview_plot = None
         self.running_subjects = []
 
     def setup_experiment(self, experiment):
-        """Create task plotters in seperate tabs for each subject."""
+        """Create overview plot showing all subjects in the first tab and task plotters
+        in seperate tabs for each subject."""
         subject_dict = experiment.subjects
         subjects = list(experiment.subjects.keys())
         subjects.sort(key=lambda s: experiment.subjects[s]["setup"])
+        self.overview_plot = Overview_plot(
+            self,
+            subject_labels={subject: f"{subject_dict[subject]['setup']} : {subject}" for subject in subjects},
+            data_len=get_setting("plotting", "state_history_len"),
+            use_opengl=get_setting("plotting", "overview_opengl"),
+        )
+        self.subject_tabs.addTab(self.overview_plot, "Overview")
         for subject in subjects:
             self.subject_plots[subject] = Task_plot(self)
             self.subject_tabs.addTab(self.subject_plots[subject], f"{subject_dict[subject]['setup']} : {subject}")
@@ -330,9 +486,11 @@ class Experiment_plot(QtWidgets.QMainWindow):
         """Provide the task plotters with the state machine info."""
         for subject_plot in self.subject_plots.values():
             subject_plot.set_state_machine(sm_info)
+        self.overview_plot.set_state_machine(sm_info)
 
     def run_start(self, subject):
         self.subject_plots[subject].run_start(False)
+        self.overview_plot.run_start(subject)
         self.running_subjects.append(subject)
 
     def run_stop(self, subject):
@@ -340,15 +498,247 @@ class Experiment_plot(QtWidgets.QMainWindow):
 
     def close_experiment(self):
         """Remove and delete all subject plot tabs."""
-        for subject_plot in self.subject_plots.values():
+        for subject_plot in list(self.subject_plots.values()) + [self.overview_plot]:
             subject_plot.setParent(None)
             subject_plot.deleteLater()
         self.subject_tabs.closeDetachedTabs()
         self.subject_plots.clear()
+        self.overview_plot = None
         self.close()
 
     def update(self):
-        """Update the plots of the active tab."""
-        for subject in self.running_subjects:
-            if not self.subject_plots[subject].visibleRegion().isEmpty():
-                self.subject_plots[subject].update()
+        """Update the plots of the running subjects, return True if any plots were redrawn."""
+        if not self.running_subjects:
+            return False
+        updated = [self.overview_plot.update()]
+        updated += [self.subject_plots[subject].update() for subject in self.running_subjects]
+        return any(updated)
+
+
+# Overview_plot --------------------------------------------------------
+
+_opengl_available = None  # Whether an OpenGL context can be created, None if not yet checked.
+
+
+def opengl_available():
+    """Return True if an OpenGL context can be created and made current, checked once."""
+    global _opengl_available
+    if _opengl_available is None:
+        context = QtGui.QOpenGLContext()
+        surface = QtGui.QOffscreenSurface()
+        surface.create()
+        _opengl_available = context.create() and surface.isValid() and context.makeCurrent(surface)
+        if _opengl_available:
+            context.doneCurrent()
+    return _opengl_available
+
+
+class Overview_plot(QtWidgets.QWidget):
+    """Compact state and event rasters for all subjects in an experiment, drawn in a single
+    plot so the whole experiment can be monitored at a glance.  Each state and event ID is
+    drawn by one curve whose vertex buffer is shared by all subjects, with a fixed block of
+    vertices for each entry of each subject's ring buffer.  New data is written into the
+    vertex buffers in place and only the curves of changed IDs are uploaded on update.
+    Times are stored relative to the start of the first subject's run and curves are translated
+    by the current time, so subjects started at different times share the same time axis while
+    vertex times stay small enough to be represented accurately as float32 by OpenGL.  If
+    use_opengl is True but an OpenGL context cannot be created the normal raster viewport is used."""
+
+    def __init__(self, parent=None, subject_labels=None, data_len=100, use_opengl=True):
+        super(QtWidgets.QWidget, self).__init__(parent)
+        if subject_labels is None:
+            subject_labels = {}
+        self.subjects = list(subject_labels.keys())
+        self.data_len = max(data_len, 2)
+        self.axis = pg.PlotWidget(title="Overview")
+        if use_opengl and opengl_available():
+            self.axis.useOpenGL(True)
+        self.axis.showAxis("right")
+        self.axis.hideAxis("left")
+        self.axis.setRange(xRange=[-30.5, 0], padding=0)
+        self.axis.setMouseEnabled(x=True, y=False)
+        self.axis.showGrid(x=True, alpha=0.75)
+        self.axis.setLimits(xMax=0)
+        self.axis.getAxis("bottom").setLabel("Time (seconds)")
+        n_subjects = len(self.subjects)
+        self.row_y = {subject: n_subjects - 1 - i for i, subject in enumerate(self.subjects)}  # Top to bottom.
+        self.axis.getAxis("right").setTicks([[(self.row_y[s], label) for s, label in subject_labels.items()]])
+        self.axis.setYRange(-0.5, n_subjects - 0.5, padding=0)
+        self.rows = {subject: Overview_row(self, i) for i, subject in enumerate(self.subjects)}
+        self.layout = QtWidgets.QVBoxLayout(self)
+        self.layout.addWidget(self.axis)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+
+    def set_state_machine(self, sm_info):
+        self.axis.clear()
+        n_colours = len(sm_info.states) + len(sm_info.events)
+        n_vertices = 2 * self.data_len * len(self.subjects)
+        # Y values of vertices, states are drawn as lines above events drawn as vertical ticks.
+        row_y = np.repeat([self.row_y[subject] for subject in self.subjects], 2 * self.data_len)
+        state_y = row_y + 0.2
+        event_y = row_y + np.tile([-0.4, -0.05], self.data_len * len(self.subjects))
+        self.curves = {}  # {ID: curve}
+        self.x = {}  # {ID: x vertex buffer}
+        self.y = {}  # {ID: y vertex buffer}
+        for ID in sm_info.states.values():
+            self.curves[ID] = pg.PlotCurveItem(pen=pg.mkPen(pg.intColor(ID, n_colours), width=6), connect="pairs")
+            self.y[ID] = state_y
+        for ID in sm_info.events.values():
+            self.curves[ID] = pg.PlotCurveItem(pen=pg.mkPen(pg.intColor(ID), width=2), connect="pairs")
+            self.y[ID] = event_y
+        for ID, curve in self.curves.items():
+            self.x[ID] = np.full(n_vertices, np.nan)
+            self.axis.addItem(curve)
+        self.changed_IDs = set()
+        self.start_time = None  # Wall clock time of first run start.
+
+    def run_start(self, subject):
+        now = time.time()
+        if self.start_time is None:
+            self.start_time = now
+        self.rows[subject].run_start(now - self.start_time)
+
+    def update(self):
+        """Upload vertex buffers of changed IDs and translate curves to current time.  Return
+        True if the plot was updated."""
+        if self.visibleRegion().isEmpty():
+            return False
+        updated = bool(self.changed_IDs)
+        for ID in self.changed_IDs:
+            self.curves[ID].setData(x=self.x[ID], y=self.y[ID], connect="pairs")
+        self.changed_IDs.clear()
+        if self.start_time is None:
+            return updated
+        run_time = time.time() - self.start_time
+        for curve in self.curves.values():
+            curve.setPos(-run_time, 0)
+        return True
+
+
+class Overview_row:
+    """Ring buffers for one subject of the Overview_plot.  Entries are written directly into
+    the overview plots shared vertex buffers.  The segment of the current state extends into
+    the future so it does not need updating until the state changes, the part after the
+    current time is outside the visible range."""
+
+    future_dur = 86400  # Duration the segment of the current state extends into the future (seconds).
+
+    def __init__(self, overview_plot, row_n):
+        self.overview_plot = overview_plot
+        self.data_len = overview_plot.data_len
+        self.first_vertex = 2 * self.data_len * row_n  # Index of subjects first vertex in vertex buffers.
+        self.running = False
+
+    def run_start(self, start_time):
+        self.start_time = start_time  # Time of run start relative to overview plot start (seconds).
+        self.state_IDs = np.zeros(self.data_len, int)  # ID of state in each ring buffer entry, 0 if unused.
+        self.event_IDs = np.zeros(self.data_len, int)  # ID of event in each ring buffer entry, 0 if unused.
+        self.state_head = 0  # Index of next state entry to write.
+        self.event_head = 0  # Index of next event entry to write.
+        self.current_state_vertex = None  # Index of first vertex of current state segment.
+        self.running = True
+
+    def process_data(self, new_data):
+        """Store new data from board."""
+        if not self.running:
+            return
+        x, changed_IDs = self.overview_plot.x, self.overview_plot.changed_IDs
+        for nd in new_data:
+            if nd.type == MsgType.STATE:
+                t = self.start_time + nd.time / 1000
+                if self.current_state_vertex is not None:  # Set exit time of previous state.
+                    previous_ID = self.state_IDs[(self.state_head - 1) % self.data_len]
+                    x[previous_ID][self.current_state_vertex + 1] = t
+                    changed_IDs.add(previous_ID)
+                v = self.first_vertex + 2 * self.state_head
+                overwritten_ID = self.state_IDs[self.state_head]
+                if overwritten_ID:
+                    x[overwritten_ID][v : v + 2] = np.nan
+                    changed_IDs.add(overwritten_ID)
+                x[nd.content][v : v + 2] = (t, t + self.future_dur)
+                changed_IDs.add(nd.content)
+                self.state_IDs[self.state_head] = nd.content
+                self.current_state_vertex = v
+                self.state_head = (self.state_head + 1) % self.data_len
+            elif nd.type == MsgType.EVENT:
+                t = self.start_time + nd.time / 1000
+                v = self.first_vertex + 2 * self.event_head
+                overwritten_ID = self.event_IDs[self.event_head]
+                if overwritten_ID:
+                    x[overwritten_ID][v : v + 2] = np.nan
+                    changed_IDs.add(overwritten_ID)
+                x[nd.content][v : v + 2] = t
+                changed_IDs.add(nd.content)
+                self.event_IDs[self.event_head] = nd.content
+                self.event_head = (self.event_head + 1) % self.data_len
+            elif nd.type in (MsgType.ERROR, MsgType.STOPF):  # End current state segment at run end.
+                if self.current_state_vertex is not None:
+                    current_ID = self.state_IDs[(self.state_head - 1) % self.data_len]
+                    x[current_ID][self.current_state_vertex + 1] = self.start_time + nd.time / 1000
+                    changed_IDs.add(current_ID)
+                self.running = False
+
+
+# --------------------------------------------------------------------------------
+# Render scheduler
+# --------------------------------------------------------------------------------
+
+
+class Render_scheduler:
+    """Controls how often plots are redrawn while data is read from the boards on every tick of
+    the tabs plot update timer.  The frame time is measured from the start of rendering until
+    the Qt event loop has finished painting, and the render interval is adapted so that at most
+    max_load of the time is spent rendering, between the plotting update interval setting and
+    max_interval (ms)."""
+
+    def __init__(self, max_interval=250, max_load=0.5, report_func=None):
+        self.min_interval = get_setting("plotting", "update_interval") / 1000
+        self.max_interval = max_interval / 1000
+        self.max_load = max_load
+        self.report_func = report_func  # Called with a string reporting frame times once per second.
+        self.reset()
+        settings_store.subscribe(self.settings_changed)
+
+    def settings_changed(self, changed_keys):
+        """Called when the user settings change, update minimum render interval."""
+        if ("plotting", "update_interval") in changed_keys:
+            self.min_interval = get_setting("plotting", "update_interval") / 1000
+            self.render_interval = min(max(self.render_interval, self.min_interval), self.max_interval)
+
+    def reset(self):
+        self.render_interval = self.min_interval
+        self.last_render_time = 0
+        self.last_report_time = 0
+        self.mean_frame_time = None  # Exponential moving average of frame time (seconds).
+        self.max_frame_time = 0
+
+    def render(self, render_func):
+        """Call render_func if the render interval has elapsed since the last render.  render_func
+        returns True if it redrew the plots, calls where it had nothing to draw are not timed and
+        do not delay the next render."""
+        frame_start = time.perf_counter()
+        if frame_start - self.last_render_time < self.render_interval:
+            return
+        if not render_func():
+            return
+        self.last_render_time = frame_start
+        # Zero timer fires once pending events, including paint events, have been processed.
+        QtCore.QTimer.singleShot(0, lambda: self._frame_done(frame_start))
+
+    def _frame_done(self, frame_start):
+        # Update frame time statistics and render interval.
+        now = time.perf_counter()
+        frame_time = now - frame_start
+        if self.mean_frame_time is None:
+            self.mean_frame_time = frame_time
+        else:
+            self.mean_frame_time = 0.9 * self.mean_frame_time + 0.1 * frame_time
+        self.max_frame_time = max(self.max_frame_time, frame_time)
+        self.render_interval = min(max(self.mean_frame_time / self.max_load, self.min_interval), self.max_interval)
+        if self.report_func and (now - self.last_report_time) > 1:
+            self.report_func(
+                f"Frame time: {1000*self.mean_frame_time:.1f} ms (max {1000*self.max_frame_time:.0f} ms), "
+                f"refresh rate: {1/self.render_interval:.0f} Hz"
+            )
+            self.last_report_time = now
+            self.max_frame_time = 0
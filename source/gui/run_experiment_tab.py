@@ -10,11 +10,11 @@ from serial import SerialException
 
 from source.communication.pycboard import Pycboard, PyboardError
 from source.gui.settings import get_setting, user_folder
-from source.gui.plotting import Experiment_plot
+from source.gui.plotting import Experiment_plot, Render_scheduler
 from source.gui.dialogs import Controls_dialog, Summary_variables_dialog
-from source.gui.utility import variable_constants, TaskInfo, parallel_call
+from source.gui.utility import variable_constants, TaskInfo, Log_textbox, parallel_call, pipelined_call
 from source.gui.custom_controls_dialog import Custom_controls_dialog, Custom_gui
-from source.gui.hardware_variables_dialog import set_hardware_variables
+from source.gui.hardware_variables_dialog import get_hardware_variables
 
 # ----------------------------------------------------------------------------------------
 #  Run_experiment_tab
@@ -64,6 +64,9 @@ class Run_experiment_tab(QtWidgets.QWidget):
 
         self.plot_update_timer = QtCore.QTimer()  # Timer to regularly call update() during run.
         self.plot_update_timer.timeout.connect(self.plot_update)
+        self.render_scheduler = Render_scheduler(  # Controls how often plots are redrawn during run.
+            report_func=self.experiment_plot.statusBar().showMessage
+        )
 
     # Main setup experiment function.
 
@@ -76,6 +79,7 @@ class Run_experiment_tab(QtWidgets.QWidget):
         self.GUI_main.tab_widget.setTabEnabled(2, False)  # Disable setups tab.
         self.GUI_main.experiments_tab.setCurrentWidget(self)
         self.experiment_plot.setup_experiment(experiment)
+        self.render_scheduler.reset()
         self.logs_visible = True
         self.logs_button.setText("Hide logs")
         self.startstopclose_all_button.setText("Start all")
@@ -103,12 +107,8 @@ class Run_experiment_tab(QtWidgets.QWidget):
         else:
             self.persistent_variables = {}
         self.GUI_main.app.processEvents()
-        # Setup boards.
-        self.print_to_logs("Connecting to board.. ")
-        parallel_call("connect_to_board", self.subjectboxes)
-        if self.setup_has_failed():
-            return
-        # Hardware test.
+        # Check whether to run hardware test.
+        run_hardware_test = False
         if experiment.hardware_test != "no hardware test":
             reply = QtWidgets.QMessageBox.question(
                 self,
@@ -116,32 +116,34 @@ class Run_experiment_tab(QtWidgets.QWidget):
                 "Run hardware test?",
                 QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No,
             )
-            if reply == QtWidgets.QMessageBox.StandardButton.Yes:
-                self.print_to_logs("\nStarting hardware test.")
-                parallel_call("start_hardware_test", self.subjectboxes)
-                if self.setup_has_failed():
-                    return
-                QtWidgets.QMessageBox.question(
-                    self,
-                    "Hardware test",
-                    "Press OK when finished with hardware test.",
-                    QtWidgets.QMessageBox.StandardButton.Ok,
-                )
-                for box in self.subjectboxes:
-                    try:
-                        box.board.stop_framework()
-                        time.sleep(0.05)
-                        box.board.process_data()
-                    except PyboardError:
-                        box.setup_failed = True
-                        box.error()
-                if self.setup_has_failed():
-                    return
-        # Setup task
-        self.print_to_logs("\nSetting up task.")
-        parallel_call("setup_task", self.subjectboxes)
+            run_hardware_test = reply == QtWidgets.QMessageBox.StandardButton.Yes
+        # Setup boards, each board progresses through the setup phases independently.
+        if run_hardware_test:
+            pipelined_call(
+                ["connect_to_board", "start_hardware_test"],
+                self.subjectboxes,
+                self.setup_phase_done,
+                self.setup_widgets(),
+            )
+            if self.setup_has_failed():
+                return
+            QtWidgets.QMessageBox.question(
+                self,
+                "Hardware test",
+                "Press OK when finished with hardware test.",
+                QtWidgets.QMessageBox.StandardButton.Ok,
+            )
+            pipelined_call(
+                ["stop_hardware_test", "setup_task"], self.subjectboxes, self.setup_phase_done, self.setup_widgets()
+            )
+        else:
+            pipelined_call(
+                ["connect_to_board", "setup_task"], self.subjectboxes, self.setup_phase_done, self.setup_widgets()
+            )
         if self.setup_has_failed():
             return
+        for box in self.subjectboxes:
+            box.print_setup_times()
         # Copy task file to experiments data folder.
         self.subjectboxes[0].board.data_logger.copy_task_file(self.experiment.data_dir, user_folder("tasks"))
         # Configure GUI ready to run.
@@ -256,14 +258,22 @@ class Run_experiment_tab(QtWidgets.QWidget):
             self.logs_button.setText("Hide logs")
 
     def plot_update(self):
-        """Called every plotting update interval (default=10ms)
-        while experiment is running"""
+        """Called every plotting update interval (default=10ms) while experiment is running.
+        Data is read from the boards on every call, plots are redrawn when due."""
         for box in self.subjectboxes:
             box.update()
-        self.experiment_plot.update()
+        self.render_scheduler.render(self.experiment_plot.update)
         if self.setups_finished == self.num_subjects:
             self.stop_experiment()
 
+    def setup_widgets(self):
+        """Widgets disabled while boards are being setup."""
+        return [self, self.GUI_main.menuBar()]
+
+    def setup_phase_done(self, box, method_name, duration):
+        """Called when a subjectbox has completed a setup phase."""
+        box.setup_phase_done(method_name, duration)
+
     def print_to_logs(self, print_str):
         """Print to all subjectbox logs."""
         for box in self.subjectboxes:
@@ -288,6 +298,7 @@ class Subjectbox(QtWidgets.QGroupBox):
         self.setup_failed = False
         self.print_queue = []
         self.delay_printing = False
+        self.setup_times = {}  # {setup phase: duration (seconds)}
         self.subject_pers_vars = {}
         self.subject_sumr_vars = {}
 
@@ -307,10 +318,10 @@ class Subjectbox(QtWidgets.QGroupBox):
         self.controls_button = QtWidgets.QPushButton("Controls")
         self.controls_button.setIcon(QtGui.QIcon("source/gui/icons/filter.svg"))
         self.controls_button.setEnabled(False)
-        self.log_textbox = QtWidgets.QTextEdit()
+        self.log_textbox = Log_textbox(
+            max_lines=get_setting("GUI", "log_max_lines"), font_size=get_setting("GUI", "log_font_size")
+        )
         self.log_textbox.setMinimumHeight(180)
-        self.log_textbox.setFont(QtGui.QFont("Courier New", get_setting("GUI", "log_font_size")))
-        self.log_textbox.setReadOnly(True)
 
         self.Vlayout = QtWidgets.QVBoxLayout(self)
         self.Hlayout1 = QtWidgets.QHBoxLayout()
@@ -335,10 +346,10 @@ class Subjectbox(QtWidgets.QGroupBox):
         if self.delay_printing:
             self.print_queue.append((print_string, end))
             return
-        self.log_textbox.moveCursor(QtGui.QTextCursor.MoveOperation.End)
-        self.log_textbox.insertPlainText(print_string + end)
-        self.log_textbox.moveCursor(QtGui.QTextCursor.MoveOperation.End)
-        self.GUI_main.app.processEvents()
+        self.log_textbox.print(print_string, end)
+        if self.state != "running":  # During run log is updated by update.
+            self.log_textbox.flush(force=True)
+            self.GUI_main.app.processEvents()
 
     def start_delayed_print(self):
         """Store print output to display later to avoid error
@@ -354,13 +365,19 @@ class Subjectbox(QtWidgets.QGroupBox):
 
     def connect_to_board(self):
         """Connect to pyboard and instantiate Pycboard and Data_logger objects."""
+        self.print_to_log("Connecting to board.. ")
         self.serial_port = self.GUI_main.setups_tab.get_port(self.setup_name)
         try:
             self.board = Pycboard(
                 self.serial_port,
                 print_func=self.print_to_log,
-                data_consumers=[self.run_exp_tab.experiment_plot.subject_plots[self.subject], self.task_info],
+                data_consumers=[
+                    self.run_exp_tab.experiment_plot.subject_plots[self.subject],
+                    self.run_exp_tab.experiment_plot.overview_plot.rows[self.subject],
+                    self.task_info,
+                ],
             )
+            self.log_textbox.set_data_logger(self.board.data_logger)
         except SerialException:
             self.print_to_log("\nConnection failed.")
             self.setup_failed = True
@@ -373,6 +390,7 @@ class Subjectbox(QtWidgets.QGroupBox):
 
     def start_hardware_test(self):
         """Transefer hardware test file to board and start framework running."""
+        self.print_to_log("\nStarting hardware test.")
         try:
             self.board.setup_state_machine(self.run_exp_tab.experiment.hardware_test)
             self.board.start_framework(data_output=False)
@@ -382,8 +400,19 @@ class Subjectbox(QtWidgets.QGroupBox):
             self.setup_failed = True
             self.error()
 
+    def stop_hardware_test(self):
+        """Stop the hardware test running on the board."""
+        try:
+            self.board.stop_framework()
+            time.sleep(0.05)
+            self.board.process_data()
+        except PyboardError:
+            self.setup_failed = True
+            self.error()
+
     def setup_task(self):
         """Load the task state machine and set variables"""
+        self.print_to_log("\nSetting up task.")
         # Setup task state machine.
         try:
             self.board.setup_state_machine(self.run_exp_tab.experiment.task)
@@ -408,10 +437,12 @@ class Subjectbox(QtWidgets.QGroupBox):
         if self.subject_variables or task_hw_vars:
             self.print_to_log("\nSetting variables.\n")
             self.variables_set_pre_run = []
+            v_dict = {}  # Variables to set {v_name: v_value}.
             try:
                 # hardware specific variables
                 if task_hw_vars:
-                    hw_vars_set = set_hardware_variables(self, task_hw_vars)
+                    hw_vars_dict, hw_vars_set = get_hardware_variables(self, task_hw_vars)
+                    v_dict.update(hw_vars_dict)
                     self.variables_set_pre_run += hw_vars_set
                 # persistent variables or value specified in variable table
                 subject_pv_dict = self.run_exp_tab.persistent_variables.get(self.subject, {})
@@ -424,13 +455,17 @@ class Subjectbox(QtWidgets.QGroupBox):
                             continue
                         v_value = eval(v["value"], variable_constants)  # Use value from variables table.
                         self.variables_set_pre_run.append((v["name"], v["value"], ""))
-                    self.board.set_variable(v["name"], v_value)
+                    v_dict[v["name"]] = v_value
+                set_OK = self.board.set_variables(v_dict)  # Set all variables with a single call to board.
                 # Print set variables to log.
                 if self.variables_set_pre_run:
                     name_len = max([len(v[0]) for v in self.variables_set_pre_run])
                     value_len = max([len(v[1]) for v in self.variables_set_pre_run])
                     for v_name, v_value, pv_str in self.variables_set_pre_run:
                         self.print_to_log(v_name.ljust(name_len + 4) + v_value.ljust(value_len + 4) + pv_str)
+                for v_name, v_set_OK in set_OK.items():
+                    if not v_set_OK:
+                        self.print_to_log(f"Setting variable {v_name} failed.")
             except PyboardError as e:
                 self.print_to_log("Setting variable failed. " + str(e))
                 self.setup_failed = True
@@ -463,6 +498,23 @@ class Subjectbox(QtWidgets.QGroupBox):
             self.print_to_log(f"Unable to intialise API: {API_name}\nTraceback: {e}")
             raise (PyboardError)
 
+    def setup_phase_done(self, method_name, duration):
+        """Display the setup phase completed and store the time it took."""
+        phase, status = {
+            "connect_to_board": ("connect", "Connected"),
+            "start_hardware_test": ("hardware test upload", "Testing"),
+            "stop_hardware_test": ("hardware test stop", "Tested"),
+            "setup_task": ("task setup", "Set up"),
+        }[method_name]
+        self.setup_times[phase] = duration
+        if not self.setup_failed:
+            self.status_text.setText(status)
+        self.status_text.setToolTip("\n".join(f"{p}: {t:.2f}s" for p, t in self.setup_times.items()))
+
+    def print_setup_times(self):
+        """Print the time taken by each setup phase to the log."""
+        self.print_to_log("\nSetup times: " + ", ".join(f"{p} {t:.2f}s" for p, t in self.setup_times.items()))
+
     def make_variables_dialog(self):
         """Configure variables dialog and ready subjectbox to start experiment."""
         if "custom_controls_dialog" in self.board.sm_info.variables:  # Task uses custon variables dialog
@@ -528,20 +580,21 @@ class Subjectbox(QtWidgets.QGroupBox):
                 self.print_to_log("\nError while stopping framework run.")
             if self.user_API:
                 self.user_API.run_stop()
-        # Read persistent variables.
-        subject_pvs = [v for v in self.subject_variables if v["persistent"]]
+        # Read persistent and summary variables with a single call to board.
+        subject_pvs = [v["name"] for v in self.subject_variables if v["persistent"]]
+        summary_variables = [v["name"] for v in self.run_exp_tab.experiment.variables if v["summary"]]
         if subject_pvs:
             self.print_to_log("\nReading persistent variables.")
-            self.subject_pers_vars = {v["name"]: self.board.get_variable(v["name"]) for v in subject_pvs}
-        # Read summary variables.
-        summary_variables = [v for v in self.run_exp_tab.experiment.variables if v["summary"]]
-        if summary_variables:
-            self.subject_sumr_vars = {v["name"]: self.board.get_variable(v["name"]) for v in summary_variables}
+        if subject_pvs or summary_variables:
+            v_dict = self.board.get_variables(set(subject_pvs + summary_variables))
+            self.subject_pers_vars = {v_name: v_dict[v_name] for v_name in subject_pvs}
+            self.subject_sumr_vars = {v_name: v_dict[v_name] for v_name in summary_variables}
         # Close data files and disconnect from board.
         self.board.data_logger.close_files()
         self.board.close()
         # Update GUI elements.
         self.state = "post_run"
+        self.log_textbox.flush()
         self.task_info.state_text.setText("Stopped")
         self.task_info.state_text.setStyleSheet("color: grey;")
         self.status_text.setText("Stopped")
@@ -563,3 +616,4 @@ class Subjectbox(QtWidgets.QGroupBox):
                 self.error()
             if self.user_API:
                 self.user_API.plot_update()
+        self.log_textbox.flush()
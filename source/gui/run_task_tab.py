@@ -8,8 +8,8 @@ from source.communication.pycboard import Pycboard, PyboardError, _djb2_file
 from source.gui.settings import get_setting, user_folder
 from source.gui.dialogs import Controls_dialog
 from source.gui.custom_controls_dialog import Custom_controls_dialog, Custom_gui
-from source.gui.plotting import Task_plot
-from source.gui.utility import init_keyboard_shortcuts, NestedMenu, TaskInfo
+from source.gui.plotting import Task_plot, Render_scheduler
+from source.gui.utility import init_keyboard_shortcuts, NestedMenu, TaskInfo, Log_textbox
 from source.gui.hardware_variables_dialog import set_hardware_variables, hw_vars_defined_in_setup
 
 
@@ -141,9 +141,9 @@ class Run_task_tab(QtWidgets.QWidget):
 
         # Log text and task plots.
 
-        self.log_textbox = QtWidgets.QTextEdit()
-        self.log_textbox.setFont(QtGui.QFont("Courier New", get_setting("GUI", "log_font_size")))
-        self.log_textbox.setReadOnly(True)
+        self.log_textbox = Log_textbox(
+            max_lines=get_setting("GUI", "log_max_lines"), font_size=get_setting("GUI", "log_font_size")
+        )
 
         self.task_plot = Task_plot()
 
@@ -172,6 +172,9 @@ class Run_task_tab(QtWidgets.QWidget):
         # Create timers
         self.plot_update_timer = QtCore.QTimer()  # Timer to regularly call update() during run.
         self.plot_update_timer.timeout.connect(self.plot_update)
+        self.render_scheduler = Render_scheduler(  # Controls how often plots are redrawn during run.
+            report_func=self.task_plot.frame_time_label.setText
+        )
 
         # Keyboard Shortcuts
         shortcut_dict = {
@@ -187,10 +190,10 @@ class Run_task_tab(QtWidgets.QWidget):
 
     # General methods
     def print_to_log(self, print_string, end="\n"):
-        self.log_textbox.moveCursor(QtGui.QTextCursor.MoveOperation.End)
-        self.log_textbox.insertPlainText(print_string + end)
-        self.log_textbox.moveCursor(QtGui.QTextCursor.MoveOperation.End)
-        self.GUI_main.app.processEvents()  # To update gui during long operations that print progress.
+        self.log_textbox.print(print_string, end)
+        if not self.running:  # During run log is updated by plot_update.
+            self.log_textbox.flush(force=True)
+            self.GUI_main.app.processEvents()  # To update gui during long operations that print progress.
 
     def test_data_path(self):
         # Checks whether data dir and subject ID are valid.
@@ -299,6 +302,7 @@ class Run_task_tab(QtWidgets.QWidget):
             self.board = Pycboard(
                 self.serial_port, print_func=self.print_to_log, data_consumers=[self.task_plot, self.task_info]
             )
+            self.log_textbox.set_data_logger(self.board.data_logger)
             self.connected = True
             self.config_dropdown.setEnabled(True)
             flashdrive_enabled = "MSC" in self.board.status["usb_mode"]
@@ -470,6 +474,7 @@ class Run_task_tab(QtWidgets.QWidget):
         if self.using_json_gui:
             self.controls_dialog.edit_action.setEnabled(False)
         self.print_to_log(f"\nRun started at: {datetime.now().strftime('%Y/%m/%d %H:%M:%S')}\n")
+        self.render_scheduler.reset()
         self.plot_update_timer.start(get_setting("plotting", "update_interval"))
         self.GUI_main.refresh_timer.stop()
         self.GUI_main.settings_action.setEnabled(False)  # settings shouldn't be opened when task is running
@@ -507,8 +512,8 @@ class Run_task_tab(QtWidgets.QWidget):
     # Timer updates
 
     def plot_update(self):
-        """Called every plotting update interval (default=10ms)
-        while experiment is running"""
+        """Called every plotting update interval (default=10ms) while experiment is running.
+        Data is read from the board on every call, plots are redrawn when due."""
         try:
             self.board.process_data()
             if not self.board.framework_running:
@@ -516,7 +521,8 @@ class Run_task_tab(QtWidgets.QWidget):
         except PyboardError:
             self.print_to_log("\nError during framework run.")
             self.stop_task(error=True)
-        self.task_plot.update()
+        self.log_textbox.flush()
+        self.render_scheduler.render(self.task_plot.update)
         if self.user_API:
             self.user_API.plot_update()
 
@@ -1,16 +1,13 @@
 import os
 import json
+import threading
 
 VERSION = "2.0.2"
 
 
-def get_setting(setting_type, setting_name, want_default=False):
-    """
-    gets a user setting from settings.json or, if that doesn't exist,
-    the default_user_settings dictionary
-    """
-
-    default_user_settings = {
+def get_default_settings():
+    """Return the default_user_settings dictionary used for settings not in settings.json"""
+    return {
         "folders": {
             "api_classes": os.path.join(os.getcwd(), "api_classes"),
             "controls_dialogs": os.path.join(os.getcwd(), "controls_dialogs"),
@@ -25,23 +22,109 @@ def get_setting(setting_type, setting_name, want_default=False):
             "event_history_len": 200,
             "state_history_len": 100,
             "analog_history_dur": 12,
+            "overview_opengl": True,
         },
         "GUI": {
             "ui_font_size": 11,
             "log_font_size": 9,
+            "log_max_lines": 10000,
         },
     }
 
+
+class Settings_store:
+    """Cache of the user settings in settings.json.  The file is read the first time a
+    setting is requested and again only if check_for_changes() finds the file has been
+    modified, or when settings are saved with save().  Default settings are not cached
+    as the default folders depend on the current working directory.  Functions
+    registered with subscribe() are called with the set of (setting_type, setting_name)
+    keys whose values changed whenever settings are saved or the modified file is
+    reloaded with changed values."""
+
     json_path = os.path.join("config", "settings.json")
-    if os.path.exists(json_path) and not want_default:  # user has a settings.json
-        with open(json_path, "r", encoding="utf-8") as f:
-            custom_settings = json.loads(f.read())
-        if setting_name in custom_settings[setting_type]:
-            return custom_settings[setting_type][setting_name]
-        else:
-            return default_user_settings[setting_type][setting_name]
-    else:  # use defaults
-        return default_user_settings[setting_type][setting_name]
+
+    def __init__(self):
+        self.user_settings = None  # Contents of settings.json, None if not loaded.
+        self.file_stat = None  # (mtime, size) of settings.json when loaded.
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.json_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:  # User does not have a settings.json.
+            return None
+
+    def _load(self):
+        """Read settings.json, return set of keys whose values changed."""
+        with self.lock:
+            old_settings = self.user_settings
+            self.file_stat = self._file_stat()
+            if self.file_stat:
+                with open(self.json_path, "r", encoding="utf-8") as f:
+                    self.user_settings = json.loads(f.read())
+            else:
+                self.user_settings = {}
+        if old_settings is None:
+            return set()
+        return self._changed_keys(old_settings, self.user_settings)
+
+    def _changed_keys(self, old_settings, new_settings):
+        default_settings = get_default_settings()
+        return {
+            (setting_type, setting_name)
+            for setting_type in default_settings
+            for setting_name in default_settings[setting_type]
+            if old_settings.get(setting_type, {}).get(setting_name)
+            != new_settings.get(setting_type, {}).get(setting_name)
+        }
+
+    def _notify(self, changed_keys):
+        for subscriber in self.subscribers:
+            subscriber(changed_keys)
+
+    def get(self, setting_type, setting_name, want_default=False):
+        if self.user_settings is None:
+            self._load()
+        if not want_default and setting_name in self.user_settings.get(setting_type, {}):
+            return self.user_settings[setting_type][setting_name]
+        return get_default_settings()[setting_type][setting_name]
+
+    def save(self, new_settings):
+        """Update settings.json with the settings in new_settings, a dict
+        {setting_type: {setting_name: value}}."""
+        self._load()  # Include any changes made to the file since it was loaded.
+        user_settings = {setting_type: dict(settings) for setting_type, settings in self.user_settings.items()}
+        user_settings.update(new_settings)
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(user_settings, indent=4))
+        changed_keys = self._changed_keys(self.user_settings, user_settings)
+        with self.lock:
+            self.user_settings = user_settings
+            self.file_stat = self._file_stat()
+        self._notify(changed_keys)
+
+    def check_for_changes(self):
+        """Reload settings.json if it has been modified since it was loaded."""
+        if self.user_settings is not None and self._file_stat() != self.file_stat:
+            changed_keys = self._load()
+            if changed_keys:
+                self._notify(changed_keys)
+
+    def subscribe(self, subscriber):
+        self.subscribers.append(subscriber)
+
+
+settings_store = Settings_store()
+
+
+def get_setting(setting_type, setting_name, want_default=False):
+    """
+    gets a user setting from settings.json or, if that doesn't exist,
+    the default_user_settings dictionary
+    """
+    return settings_store.get(setting_type, setting_name, want_default)
 
 
 def user_folder(folder_name):
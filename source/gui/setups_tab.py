@@ -1,5 +1,8 @@
 import json
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from serial import SerialException
 from pyqtgraph.Qt import QtGui, QtCore, QtWidgets
 from source.gui.settings import get_setting, user_folder
 from source.gui.utility import TableCheckbox, parallel_call
@@ -11,6 +14,8 @@ class Setups_tab(QtWidgets.QWidget):
     """The setups tab is used to name and configure setups, where one setup is one
     pyboard and connected hardware."""
 
+    max_workers = 8  # Maximum number of setups configured concurrently.
+
     def __init__(self, parent=None):
         super(QtWidgets.QWidget, self).__init__(parent)
 
@@ -74,6 +79,11 @@ class Setups_tab(QtWidgets.QWidget):
         self.dfu_btn = QtWidgets.QPushButton("DFU mode")
         self.dfu_btn.setIcon(QtGui.QIcon("source/gui/icons/wrench.svg"))
         self.dfu_btn.clicked.connect(self.DFU_mode)
+        self.skip_up_to_date_checkbox = QtWidgets.QCheckBox("Skip up to date")
+        self.skip_up_to_date_checkbox.setToolTip(
+            "Only load the framework or hardware definition onto setups whose file manifest shows them out of date."
+        )
+        self.skip_up_to_date = False
 
         config_layout = QtWidgets.QGridLayout()
         config_layout.addWidget(load_fw_button, 0, 0)
@@ -82,6 +92,7 @@ class Setups_tab(QtWidgets.QWidget):
         config_layout.addWidget(self.dfu_btn, 1, 1)
         config_layout.addWidget(enable_flashdrive_button, 0, 2)
         config_layout.addWidget(disable_flashdrive_button, 1, 2)
+        config_layout.addWidget(self.skip_up_to_date_checkbox, 0, 3)
         self.configure_group.setLayout(config_layout)
         self.configure_group.setEnabled(False)
 
@@ -243,28 +254,55 @@ class Setups_tab(QtWidgets.QWidget):
         hardware_var_editor.exec()
 
     def load_framework(self):
-        self.print_to_log("Loading framework...\n")
-        parallel_call("load_framework", self.get_selected_setups())
+        self.skip_up_to_date = self.skip_up_to_date_checkbox.isChecked()
+        self.run_operation("load_framework", "Load framework", self.get_selected_setups())
 
     def enable_flashdrive(self):
-        self.print_to_log("Enabling flashdrive...\n")
-        parallel_call("enable_flashdrive", self.get_selected_setups())
+        self.run_operation("enable_flashdrive", "Enable flashdrive", self.get_selected_setups())
 
     def disable_flashdrive(self):
-        self.print_to_log("Disabling flashdrive...\n")
-        parallel_call("disable_flashdrive", self.get_selected_setups())
+        self.run_operation("disable_flashdrive", "Disable flashdrive", self.get_selected_setups())
 
     def DFU_mode(self):
-        self.print_to_log("Enabling DFU mode...\n")
-        parallel_call("DFU_mode", self.get_selected_setups())
+        self.run_operation("DFU_mode", "Enable DFU mode", self.get_selected_setups())
 
     def load_hardware_definition(self):
         self.hwd_path = QtWidgets.QFileDialog.getOpenFileName(
             self, "Select hardware definition:", user_folder("hardware_definitions"), filter="*.py"
         )[0]
         if self.hwd_path:
-            self.print_to_log("Loading hardware definition...\n")
-            parallel_call("load_hardware_definition", self.get_selected_setups())
+            self.skip_up_to_date = self.skip_up_to_date_checkbox.isChecked()
+            self.run_operation("load_hardware_definition", "Load hardware definition", self.get_selected_setups())
+
+    def run_operation(self, method_name, description, setups):
+        """Call the specified method of each setup using a pool of at most max_workers threads,
+        with failed operations retried by Setup.run_operation.  Print output from each setup
+        is shown when it finishes and a table of results is shown once all have finished."""
+        if not setups:
+            return
+        self.print_to_log(f"{description}...\n")
+        self.configure_group.setEnabled(False)
+        start_time = time.time()
+        for setup in setups:
+            setup.start_delayed_print()
+        with ThreadPoolExecutor(max_workers=min(len(setups), self.max_workers)) as executor:
+            futures = {setup: executor.submit(setup.run_operation, method_name) for setup in setups}
+            running = list(setups)
+            while running:
+                for setup in [setup for setup in running if futures[setup].done()]:
+                    setup.end_delayed_print()
+                    running.remove(setup)
+                self.GUI_main.app.processEvents()
+                time.sleep(0.05)
+        results = {setup: futures[setup].result() for setup in setups}  # {setup: (result, attempts, duration)}
+        n_failed = len([r for r, _, _ in results.values() if r not in ("OK", "Up to date")])
+        n_current = len([r for r, _, _ in results.values() if r == "Up to date"])
+        self.print_to_log(
+            f"{description}: {len(setups) - n_failed - n_current} OK, {n_current} up to date, {n_failed} failed "
+            f"({time.time() - start_time:.1f}s)\n"
+        )
+        self.multi_config_enable()
+        Operation_results_dialog(self, description, results).exec()
 
     def refresh(self):
         """Called regularly when no task running to update tab with currently
@@ -370,7 +408,7 @@ class Setup:
         self.print("\nConnecting to board.")
         try:
             self.board = Pycboard(self.port, print_func=self.print)
-        except PyboardError:
+        except (PyboardError, SerialException):
             self.print("\nUnable to connect.")
 
     def disconnect(self):
@@ -386,17 +424,43 @@ class Setup:
         self.setups_tab.setups_table.removeRow(self.port_item.row())
         del self.setups_tab.setups[self.port]
 
+    def run_operation(self, method_name, max_attempts=3, retry_delay=1):
+        """Call the specified method, reconnecting and retrying if the board could not be
+        connected to or a serial or pyboard error occured.  The method returns a string
+        describing the result, or None if not connected to board.  Returns tuple
+        (result, number of attempts, duration in seconds)."""
+        start_time = time.time()
+        for attempt in range(1, max_attempts + 1):
+            try:
+                result = getattr(self, method_name)()
+                if result:
+                    break
+                result = "Unable to connect"
+            except (PyboardError, SerialException, OSError):
+                result = "Error"
+                self.disconnect()
+            if attempt < max_attempts:
+                self.print(f"\n{result}, retrying.")
+                time.sleep(retry_delay)
+        return result, attempt, time.time() - start_time
+
     def load_framework(self):
         if not self.board:
             self.connect()
         if self.board:
-            self.board.load_framework()
+            transferred = self.board.load_framework(skip_up_to_date=self.setups_tab.skip_up_to_date)
+            if not self.board.status["framework"]:
+                return "Import error"
+            return "OK" if transferred else "Up to date"
 
     def load_hardware_definition(self):
         if not self.board:
             self.connect()
         if self.board:
-            self.board.load_hardware_definition(self.setups_tab.hwd_path)
+            if self.setups_tab.skip_up_to_date and self.board.hardware_definition_up_to_date(self.setups_tab.hwd_path):
+                self.print("\nHardware definition up to date.")
+                return "Up to date"
+            return "OK" if self.board.load_hardware_definition(self.setups_tab.hwd_path) else "Import error"
 
     def DFU_mode(self):
         """Enter DFU mode"""
@@ -406,6 +470,7 @@ class Setup:
         if self.board:
             self.board.DFU_mode()
             self.board.close()
+            return "OK"
 
     def enable_flashdrive(self):
         self.select_checkbox.setChecked(False)
@@ -415,6 +480,7 @@ class Setup:
             self.board.enable_mass_storage()
             self.board.close()
             self.board = None
+            return "OK"
 
     def disable_flashdrive(self):
         self.select_checkbox.setChecked(False)
@@ -424,3 +490,33 @@ class Setup:
             self.board.disable_mass_storage()
             self.board.close()
             self.board = None
+            return "OK"
+
+
+# Operation results dialog --------------------------------------------------------
+
+
+class Operation_results_dialog(QtWidgets.QDialog):
+    """Dialog showing the result of an operation run on multiple setups."""
+
+    def __init__(self, parent, description, results):
+        super(QtWidgets.QDialog, self).__init__(parent)
+        self.setWindowTitle(description)
+        self.results_table = QtWidgets.QTableWidget(len(results), 5, parent=self)
+        self.results_table.setHorizontalHeaderLabels(["Setup", "Serial port", "Result", "Attempts", "Time (s)"])
+        self.results_table.verticalHeader().setVisible(False)
+        self.results_table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        for row, (setup, (result, attempts, duration)) in enumerate(results.items()):
+            for column, value in enumerate([setup.name, setup.port, result, str(attempts), f"{duration:.1f}"]):
+                item = QtWidgets.QTableWidgetItem(value)
+                if column == 2 and result not in ("OK", "Up to date"):
+                    item.setForeground(QtGui.QColor("red"))
+                self.results_table.setItem(row, column, item)
+        self.results_table.resizeColumnsToContents()
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        self.close_button = QtWidgets.QPushButton("Close")
+        self.close_button.clicked.connect(self.close)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.results_table)
+        layout.addWidget(self.close_button, alignment=QtCore.Qt.AlignmentFlag.AlignRight)
+        self.resize(500, min(600, 100 + 30 * len(results)))
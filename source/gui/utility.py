@@ -1,5 +1,10 @@
 import os
+import time
+import platform
+import queue
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
+from serial.tools import list_ports
 from pyqtgraph.Qt import QtGui, QtCore, QtWidgets
 from source.communication.pycboard import MsgType
 
@@ -441,6 +446,249 @@ class TaskInfo:
         self.print_text.setText("")
 
 
+# ----------------------------------------------------------------------------------
+# Log_textbox
+# ----------------------------------------------------------------------------------
+
+
+class Log_textbox(QtWidgets.QPlainTextEdit):
+    """Read only textbox for displaying the pyControl output log.  Text passed to print and
+    data passed to log_data are buffered and only added to the textbox when flush is called,
+    so that output generated during a run is inserted once per GUI update rather than once per
+    message.  Data is stored as Datatuples and only formatted into text when it is flushed
+    while the textbox is visible, so a hidden log costs little.  If more than max_pending
+    items are buffered they are flushed even if the textbox is hidden, so the buffer stays
+    bounded.  The number of lines retained is limited to max_lines (0 for no limit), with
+    the oldest lines removed first.  The types of data messages shown in the log can be
+    selected from the right click menu."""
+
+    max_pending = 10000  # Maximum number of buffered strings and Datatuples before flushing.
+
+    filterable_types = {
+        "States": MsgType.STATE,
+        "Events": MsgType.EVENT,
+        "Prints": MsgType.PRINT,
+        "Variables": MsgType.VARBL,
+        "Warnings": MsgType.WARNG,
+        "Profile": MsgType.PROFL,
+    }
+
+    def __init__(self, parent=None, max_lines=0, font_size=9):
+        super(QtWidgets.QPlainTextEdit, self).__init__(parent)
+        self.setReadOnly(True)
+        self.setFont(QtGui.QFont("Courier New", font_size))
+        self.setMaximumBlockCount(max_lines)
+        self.pending = deque()  # Strings and Datatuples not yet shown.
+        self.log_types = set(self.filterable_types.values()) | {MsgType.ERROR, MsgType.STOPF}  # Data types shown.
+        self.format_data = None
+
+    def set_data_logger(self, data_logger):
+        """Receive data from the data logger and use it to format data as text."""
+        data_logger.log_func = self.log_data
+        self.format_data = lambda new_data: data_logger.data_to_string(new_data, prettify=True)
+
+    def print(self, print_string, end="\n"):
+        """Add text to the buffer of text to be shown at next flush."""
+        self.pending.append(print_string + end)
+        if len(self.pending) > self.max_pending:
+            self.flush(force=True)
+
+    def log_data(self, new_data):
+        """Add data of the types shown in the log to the buffer of data to be shown at next flush."""
+        self.pending.extend(nd for nd in new_data if nd.type in self.log_types)
+        if len(self.pending) > self.max_pending:
+            self.flush(force=True)
+
+    def flush(self, force=False):
+        """Add buffered text and data to the end of the log. Unless force is True nothing is done
+        if the textbox is not visible, buffered output is then shown when it becomes visible."""
+        if not self.pending or not (force or self.isVisible()):
+            return
+        text, new_data = [], []
+        for item in self.pending:
+            if isinstance(item, str):
+                if new_data:
+                    text.append(self.format_data(new_data))
+                    new_data = []
+                text.append(item)
+            else:
+                new_data.append(item)
+        if new_data:
+            text.append(self.format_data(new_data))
+        self.pending.clear()
+        text = "".join(text)
+        if self.maximumBlockCount():  # Discard text that would be removed immediately.
+            n_lines = text.count("\n")
+            if n_lines > self.maximumBlockCount():
+                text = text.split("\n", n_lines - self.maximumBlockCount())[-1]
+        self.moveCursor(QtGui.QTextCursor.MoveOperation.End)
+        self.insertPlainText(text)
+        self.moveCursor(QtGui.QTextCursor.MoveOperation.End)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.flush()
+
+    def clear(self):
+        self.pending.clear()
+        super().clear()
+
+    def contextMenuEvent(self, event):
+        """Add checkable actions for selecting message types shown to context menu."""
+        menu = self.createStandardContextMenu()
+        menu.addSeparator()
+        for label, msg_type in self.filterable_types.items():
+            action = menu.addAction(f"Show {label.lower()}")
+            action.setCheckable(True)
+            action.setChecked(msg_type in self.log_types)
+            action.toggled.connect(lambda checked, msg_type=msg_type: self.set_type_shown(msg_type, checked))
+        menu.exec(event.globalPos())
+
+    def set_type_shown(self, msg_type, shown):
+        if shown:
+            self.log_types.add(msg_type)
+        else:
+            self.log_types.discard(msg_type)
+
+
+# ----------------------------------------------------------------------------------
+# Folder watcher
+# ----------------------------------------------------------------------------------
+
+
+class Folder_watcher(QtCore.QObject):
+    """Maintains a cached list of the files with a given extension in a folder and its
+    subfolders, in the format subdir_1/subdir_2/filename.  Directories are watched using a
+    QFileSystemWatcher and only directories reported as changed are listed again.  As
+    notifications are not delivered for some file systems (e.g. network drives), directories
+    are also polled by comparing their modification time with the cached value, every call
+    to check() for directories that could not be watched and every poll_every calls for
+    the others."""
+
+    def __init__(self, folder, file_extension, poll_every=10, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.file_extension = file_extension
+        self.poll_every = poll_every
+        self.n_checks = 0
+        self.dir_listings = {}  # {dir_path: (mtime_ns, file_names, subdir_names)}
+        self.changed_dirs = set()  # Directories reported as changed by the watcher.
+        self.unwatched_dirs = set()  # Directories the watcher was unable to watch.
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._dir_changed)
+        self._list_dir(folder)
+        self.files = self._get_file_list()
+
+    def check(self):
+        """Update the file list, return True if it has changed since the last call."""
+        self.n_checks += 1
+        if self.n_checks % self.poll_every:
+            dirs_to_poll = self.unwatched_dirs & self.dir_listings.keys()
+        else:
+            dirs_to_poll = list(self.dir_listings.keys())
+        for dir_path in dirs_to_poll:
+            if self._mtime(dir_path) != self.dir_listings[dir_path][0]:
+                self.changed_dirs.add(dir_path)
+        if not self.changed_dirs:
+            return False
+        changed_dirs, self.changed_dirs = self.changed_dirs, set()
+        for dir_path in changed_dirs:
+            if dir_path in self.dir_listings:
+                self._list_dir(dir_path)
+        files = self._get_file_list()
+        if files == self.files:
+            return False
+        self.files = files
+        return True
+
+    def _dir_changed(self, dir_path):
+        self.changed_dirs.add(dir_path)
+
+    def _mtime(self, dir_path):
+        try:
+            return os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _list_dir(self, dir_path):
+        """List the contents of a directory, updating the listings of its subdirectories."""
+        mtime = self._mtime(dir_path)
+        file_names, subdir_names = [], []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        subdir_names.append(entry.name)
+                    elif entry.name.endswith(self.file_extension):
+                        file_names.append(entry.name)
+        except OSError:  # Directory does not exist.
+            pass
+        old_subdirs = self.dir_listings[dir_path][2] if dir_path in self.dir_listings else []
+        if dir_path not in self.dir_listings and not self.watcher.addPath(dir_path):
+            self.unwatched_dirs.add(dir_path)
+        self.dir_listings[dir_path] = (mtime, sorted(file_names), sorted(subdir_names))
+        for subdir_name in set(old_subdirs) - set(subdir_names):
+            self._remove_dir(os.path.join(dir_path, subdir_name))
+        for subdir_name in subdir_names:
+            subdir_path = os.path.join(dir_path, subdir_name)
+            if subdir_path not in self.dir_listings:
+                self._list_dir(subdir_path)
+
+    def _remove_dir(self, dir_path):
+        """Remove a deleted directory and its subdirectories from the listings."""
+        if dir_path not in self.dir_listings:
+            return
+        _, _, subdir_names = self.dir_listings.pop(dir_path)
+        self.watcher.removePath(dir_path)
+        self.unwatched_dirs.discard(dir_path)
+        for subdir_name in subdir_names:
+            self._remove_dir(os.path.join(dir_path, subdir_name))
+
+    def _get_file_list(self, dir_path=None, rel_path=""):
+        """Return list of files from the cached directory listings."""
+        if dir_path is None:
+            dir_path = self.folder
+        _, file_names, subdir_names = self.dir_listings[dir_path]
+        files = [os.path.join(rel_path, f)[: -len(self.file_extension)] for f in file_names]
+        for subdir_name in subdir_names:
+            files += self._get_file_list(os.path.join(dir_path, subdir_name), os.path.join(rel_path, subdir_name))
+        return files
+
+
+# ----------------------------------------------------------------------------------
+# Serial port watcher
+# ----------------------------------------------------------------------------------
+
+
+class Serial_port_watcher(QtCore.QObject):
+    """Maintains the set of serial ports with pyboards connected.  On Linux, where serial
+    devices appear in /dev, ports are only enumerated when the contents of /dev change,
+    on other platforms ports are enumerated every call to check()."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ports = None
+        self.dev_changed = True
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watched = platform.system() == "Linux" and self.watcher.addPath("/dev")
+        self.watcher.directoryChanged.connect(self._dev_changed)
+        self.check()
+
+    def _dev_changed(self, path):
+        self.dev_changed = True
+
+    def check(self):
+        """Update the set of ports, return True if it has changed since the last call."""
+        if self.watched and not self.dev_changed:
+            return False
+        self.dev_changed = False
+        ports = set([c[0] for c in list_ports.comports() if ("Pyboard" in c[1]) or ("USB Serial Device" in c[1])])
+        if ports == self.ports:
+            return False
+        self.ports = ports
+        return True
+
+
 # ----------------------------------------------------------------------------------
 # Parallel call
 # ----------------------------------------------------------------------------------
@@ -458,3 +706,48 @@ def parallel_call(method_name, setups):
         list(executor.map(func, setups))
     for setup in setups:
         setup.end_delayed_print()
+
+
+def pipelined_call(method_names, setups, progress_func=None, disabled_widgets=(), poll_interval=0.05):
+    """Call the specified methods of each setup in order, with each setup progressing
+    through the methods independently in its own thread rather than all setups waiting
+    for the slowest to complete each method.  If the setup_failed attribute of any setup
+    is set to True, setups skip their remaining methods.  progress_func(setup, method_name,
+    duration) is called from the main thread when a setup completes a method, with the
+    duration in seconds, and the GUI is kept responsive while waiting.  The widgets in
+    disabled_widgets are disabled for the duration of the call so user input processed
+    while waiting can not re-enter the code that made the call.  Print output is delayed
+    as for parallel_call."""
+    progress_queue = queue.Queue()
+
+    def call_methods(setup):
+        for method_name in method_names:
+            if any(getattr(s, "setup_failed", False) for s in setups):
+                return
+            start_time = time.perf_counter()
+            getattr(setup, method_name)()
+            progress_queue.put((setup, method_name, time.perf_counter() - start_time))
+
+    widgets_enabled = [widget.isEnabled() for widget in disabled_widgets]
+    for widget in disabled_widgets:
+        widget.setEnabled(False)
+    for setup in setups:
+        setup.start_delayed_print()
+    try:
+        with ThreadPoolExecutor(max_workers=len(setups)) as executor:
+            futures = [executor.submit(call_methods, setup) for setup in setups]
+            while not (all(future.done() for future in futures) and progress_queue.empty()):
+                try:
+                    setup, method_name, duration = progress_queue.get(timeout=poll_interval)
+                    if progress_func:
+                        progress_func(setup, method_name, duration)
+                except queue.Empty:
+                    pass
+                QtWidgets.QApplication.processEvents()
+            for future in futures:
+                future.result()  # Raise any exception that occured in thread.
+    finally:
+        for setup in setups:
+            setup.end_delayed_print()
+        for widget, enabled in zip(disabled_widgets, widgets_enabled):
+            widget.setEnabled(enabled)
@@ -5,6 +5,7 @@ from . import timer
 from . import state_machine as sm
 from . import hardware as hw
 from . import utility as ut
+from . import profiler
 
 VERSION = "2.0.2"
 
@@ -24,6 +25,7 @@ HARDW_TYP = b"H"  # Harware callback : (time, HARDW_TYP, "", hardware_ID)
 VARBL_TYP = b"V"  # Variable change  : (time, VARBL_TYP, [g]et/user_[s]et/[a]pi_set/[p]rint/s[t]art/[e]nd, json_str)
 WARNG_TYP = b"!"  # Warning          : (time, WARNG_TYP, "", print_string)
 STOPF_TYP = b"X"  # Stop framework   : (time, STOPF_TYP, "", "")
+PROFL_TYP = b"R"  # Profile summary  : (time, PROFL_TYP, "", json_str)
 
 # Event_queue -----------------------------------------------------------------
 
@@ -57,6 +59,8 @@ data_output_queue = Event_queue()  # Queue used for outputing events to serial l
 
 data_output = True  # Whether to output data to the serial line.
 
+profile = False  # Whether to profile the main loop, see profiler.py.
+
 current_time = None  # Time since run started (milliseconds).
 
 running = False  # Set to True when framework is running, set to False to stop run.
@@ -88,7 +92,7 @@ def output_data(event):
     content_bytes = str(event.content).encode() if event.content else b""
     message = timestamp + event.type + subtype_byte + content_bytes
     message_len = len(message).to_bytes(2, "little")
-    checksum = sum(message).to_bytes(2, "little")
+    checksum = (sum(message) & 0xFFFF).to_bytes(2, "little")
     usb_serial.send(b"\x07" + checksum + message_len + message)
 
 
@@ -140,22 +144,34 @@ def run():
     sm.start()
     hw.run_start()
     running = True
+    profiling = profile  # Local copy as checked every loop iteration.
+    if profiling:
+        profiler.reset()
     # Run
     while running:
+        if profiling:
+            t0 = profiler.loop_start()
         # Priority 1: Process hardware interrupts.
         if hw.interrupt_queue.available:
             hw.IO_dict[hw.interrupt_queue.get()]._process_interrupt()
+            priority = 0
         # Priority 2: Process event from queue.
         elif event_queue.available:
             event = event_queue.get()
             data_output_queue.put(event)
             sm.process_event(event.content)
-        # Priority 3: Check for elapsed timers.
+            priority = 1
+        # Priority 3: Check for elapsed timers and hardware queue overflow.
         elif check_timers:
             timer.check()
+            if hw.overflow:
+                hw.check_overflow()
+            priority = 2
         # Priority 4: Process timer event.
         elif timer.elapsed:
             event = timer.get()
+            if profiling:
+                profiler.record_lateness(current_time - event.time)
             if event.type == EVENT_TYP:
                 if event.subtype:
                     data_output_queue.put(event)
@@ -164,17 +180,29 @@ def run():
                 hw.IO_dict[event.content]._timer_callback()
             elif event.type == STATE_TYP:
                 sm.goto_state(event.content)
+            priority = 3
         # Priority 5: Check for serial input from computer.
         elif usb_serial.any():
             receive_data()
+            priority = 4
         # Priority 6: Stream analog data.
         elif hw.stream_data_queue.available:
             hw.IO_dict[hw.stream_data_queue.get()].send_buffer()
+            priority = 5
         # Priority 7: Output framework data.
         elif data_output_queue.available:
             output_data(data_output_queue.get())
+            priority = 6
+        else:
+            priority = -1  # Nothing to process.
+        if profiling:
+            profiler.record_service(priority, t0)
     # Post run
+    if hw.overflow:
+        hw.check_overflow()
     ut.print_variables(when="e")
+    if profile:
+        data_output_queue.put(Datatuple(current_time, PROFL_TYP, "", profiler.summary()))
     data_output_queue.put(Datatuple(current_time, STOPF_TYP, "", ""))
     usb_serial.setinterrupt(3)  # Enable 'ctrl+c' on serial raising KeyboardInterrupt.
     clock.deinit()
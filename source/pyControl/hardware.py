@@ -1,4 +1,5 @@
 import pyb
+import uctypes
 from array import array
 from . import timer
 from . import framework as fw
@@ -9,21 +10,37 @@ from .utility import randint, warning
 
 
 class Ring_buffer:
-    #  Ring buffer for storing data from interrupt service routines.
-    def __init__(self, buffer_length=20):
+    #  Ring buffer for storing data from interrupt service routines.  If the buffer is full
+    #  new values are dropped and counted in n_dropped, which is checked by the framework
+    #  main loop to output a warning.  The buffer length can be changed before the framework
+    #  is run with set_length(), e.g. in a hardware definition.
+    def __init__(self, buffer_length=20, name="Ring_buffer"):
+        self.name = name
+        self.set_length(buffer_length)
+        ring_buffers.append(self)
+
+    def set_length(self, buffer_length):
+        # Set the number of values the buffer can hold, emptying the buffer.
         self.buffer_length = buffer_length
         self.buffer = array("i", [0] * self.buffer_length)
         self.reset()
 
     def reset(self):
-        # Empty buffer.
+        # Empty buffer and reset dropped value counts.
         self.read_ind = 0
         self.write_ind = 0
         self.available = False
+        self.n_dropped = 0  # Number of values dropped as buffer was full.
+        self.n_dropped_reported = 0  # Number of dropped values reported by check_overflow().
 
     @micropython.native
     def put(self, x: int):
-        # Put value in buffer.
+        # Put value in buffer, if buffer is full value is dropped.
+        global overflow
+        if self.available and self.write_ind == self.read_ind:
+            self.n_dropped += 1
+            overflow = True
+            return
         self.buffer[self.write_ind] = x
         self.write_ind = (self.write_ind + 1) % self.buffer_length
         self.available = True
@@ -36,6 +53,12 @@ class Ring_buffer:
         self.available = self.read_ind != self.write_ind
         return x
 
+    def count(self):
+        # Return number of values in buffer.
+        if self.available and self.write_ind == self.read_ind:
+            return self.buffer_length
+        return (self.write_ind - self.read_ind) % self.buffer_length
+
 
 # Variables -------------------------------------------------------------------
 
@@ -48,9 +71,32 @@ available_timers = [3, 4, 5, 7, 8, 9, 10, 11, 12, 13, 14]  # Hardware timers not
 
 initialised = False  # Set to True once hardware has been intiialised.
 
-interrupt_queue = Ring_buffer()  # Queue for processing hardware interrupts.
+overflow = False  # Set True when a Ring_buffer drops a value, cleared by check_overflow().
+
+ring_buffers = []  # List of all Ring_buffer objects.
+
+interrupt_queue = Ring_buffer(name="interrupt_queue")  # Queue for processing hardware interrupts.
+
+stream_data_queue = Ring_buffer(name="stream_data_queue")  # Queue for streaming data to computer.
+
+analog_samplers = {}  # {sampling_rate or stream_group: Analog_sampler} used by Analog_inputs with shared timers.
+
+# Analog buffer sizing, see size_analog_buffers().  Values can be changed before the
+# framework is run, e.g. in a hardware definition.
+
+analog_latency = 100  # Default maximum time (ms) between a sample being aquired and sent to computer.
+
+max_analog_buffer_bytes = 1024  # Maximum size of each automatically sized analog buffer (bytes).
+
+max_analog_memory = 32768  # Maximum total memory used by analog buffers (bytes).
+
+max_analog_sample_rate = 20000  # Approximate maximum sustainable total sample rate of all analog channels (Hz).
+
+max_analog_bandwidth = 250000  # Approximate maximum sustainable analog data rate to computer (bytes/second).
+
+max_analog_message_rate = 1000  # Approximate maximum sustainable analog message rate to computer (messages/second).
 
-stream_data_queue = Ring_buffer()  # Queue for streaming data to computer.
+analog_load_warning = None  # Warning output at run start if analog configuration cannot be sustained.
 
 # Functions -------------------------------------------------------------------
 
@@ -66,26 +112,101 @@ def assign_ID(hardware_object):
 def initialise():
     # Called once after state machines setup and before framework first run.
     global initialised
+    size_analog_buffers()
     for IO_object in IO_dict.values():
         IO_object._initialise()
     initialised = True
 
 
+def size_analog_buffers():
+    # Set the number of samples per channel in the buffers of each streaming Analog_channel.
+    # Channels with a specified buffer_size use it, other channels are sized automatically
+    # to hold the samples aquired in their latency target (analog_latency if not specified),
+    # up to max_analog_buffer_bytes, so high rate channels send fewer larger messages and
+    # low rate channels send data promptly.  If the total memory used by the buffers would
+    # exceed max_analog_memory the automatically sized buffers are reduced proportionally.
+    # The total aquisition sample rate, data rate and message rate of all channels is then checked
+    # against the approximate limits of what can be sustained and analog_load_warning set
+    # if any are exceeded.
+    global analog_load_warning
+    channels = [io for io in IO_dict.values() if isinstance(io, Analog_channel) and not io.group]
+    for channel in channels:
+        channel.samples_per_buffer = channel.target_buffer_size()
+    fixed_memory = sum([channel.buffer_memory() for channel in channels if channel.requested_buffer_size])
+    auto_memory = sum([channel.buffer_memory() for channel in channels if not channel.requested_buffer_size])
+    if auto_memory and fixed_memory + auto_memory > max_analog_memory:
+        scale = max(max_analog_memory - fixed_memory, 0) / auto_memory
+        for channel in channels:
+            if not channel.requested_buffer_size:
+                channel.samples_per_buffer = max(1, int(channel.samples_per_buffer * scale))
+    sample_rate = sum([channel.sampling_rate * channel.decimation * channel.n_channels() for channel in channels])
+    message_rate = sum([channel.sampling_rate / channel.samples_per_buffer for channel in channels])
+    bandwidth = 13 * message_rate + sum(
+        [channel.sampling_rate * channel.n_channels() * channel.bytes_per_sample for channel in channels]
+    )
+    memory = sum([channel.buffer_memory() for channel in channels])
+    problems = []
+    if sample_rate > max_analog_sample_rate:
+        problems.append("total sample rate {}Hz > {}Hz".format(sample_rate, max_analog_sample_rate))
+    if bandwidth > max_analog_bandwidth:
+        problems.append("data rate {:.0f} bytes/s > {} bytes/s".format(bandwidth, max_analog_bandwidth))
+    if message_rate > max_analog_message_rate:
+        problems.append("message rate {:.0f}/s > {}/s".format(message_rate, max_analog_message_rate))
+    if memory > max_analog_memory:
+        problems.append("buffer memory {} bytes > {} bytes".format(memory, max_analog_memory))
+    if problems:
+        analog_load_warning = "Analog inputs may not be sustainable: " + ", ".join(problems)
+    else:
+        analog_load_warning = None
+
+
 def run_start():
     # Called at start of each framework run.
-    interrupt_queue.reset()
-    stream_data_queue.reset()
+    global overflow
+    if analog_load_warning:
+        warning(analog_load_warning)
+    for ring_buffer in ring_buffers:
+        ring_buffer.reset()
+    overflow = False
     for IO_object in IO_dict.values():
         IO_object._run_start()
+    for analog_sampler in analog_samplers.values():
+        analog_sampler.start()
 
 
 def run_stop():
-    # Called at end of each framework run.
+    # Called at end of each framework run.  Analog sampling is stopped and any analog data
+    # buffers still in the stream data queue are sent before the IO objects are stopped, so
+    # that partially filled buffers are sent after the full buffers that preceded them.
+    for analog_sampler in analog_samplers.values():
+        analog_sampler.stop()
+    for IO_object in IO_dict.values():
+        if isinstance(IO_object, Analog_input):
+            IO_object._run_stop()
+    while stream_data_queue.available:
+        IO_dict[stream_data_queue.get()].send_buffer()
     for IO_object in IO_dict.values():
-        IO_object._run_stop()
+        if not isinstance(IO_object, Analog_input):
+            IO_object._run_stop()
     off()
 
 
+def check_overflow():
+    # Output warning for any values dropped by Ring_buffers since the last check, called
+    # by the framework main loop when overflow is True.
+    global overflow
+    overflow = False
+    for ring_buffer in ring_buffers:
+        n_dropped = ring_buffer.n_dropped
+        if n_dropped != ring_buffer.n_dropped_reported:
+            warning(
+                "{} full, {} values dropped ({} total). Interrupts may have been missed.".format(
+                    ring_buffer.name, n_dropped - ring_buffer.n_dropped_reported, n_dropped
+                )
+            )
+            ring_buffer.n_dropped_reported = n_dropped
+
+
 def off():
     # Turn off hardware objects.
     for IO_object in IO_dict.values():
@@ -96,9 +217,15 @@ def get_analog_inputs():
     # Print dict of analog input info.
     print(
         {
-            ai.ID: {"name": ai.name, "fs": ai.sampling_rate, "dtype": ai.data_type, "plot": ai.plot}
+            ai.ID: {
+                "name": ai.name,
+                "fs": ai.sampling_rate,
+                "dtype": ai.data_type,
+                "plot": ai.plot,
+                "group": (ai.group.ID, ai.group_index) if ai.group else None,
+            }
             for ai in IO_dict.values()
-            if isinstance(ai, Analog_channel)
+            if isinstance(ai, Analog_channel) and not isinstance(ai, Analog_group)
         }
     )
 
@@ -233,40 +360,109 @@ class Digital_input(IO_object):
 class Analog_input(IO_object):
     # Analog_input samples analog voltage from specified pin at specified frequency and
     # streams data to computer. Optionally can generate framework events when voltage
-    #  goes above / below specified value theshold.
-
-    def __init__(self, pin, name, sampling_rate, threshold=None, rising_event=None, falling_event=None, data_type="H"):
+    #  goes above / below specified value theshold.  By default each Analog_input uses its
+    #  own hardware timer, if shared_timer is True all Analog_inputs with the same sampling
+    #  rate are sampled by a single timer interrupt, see Analog_sampler.  Analog_inputs
+    #  with the same stream_group name are sampled by a single timer interrupt and their
+    #  data streamed to the computer together, see Analog_group.  The number of samples per
+    #  data message can be set with buffer_size, or the maximum time from a sample being
+    #  aquired to it being sent to the computer with latency (ms), otherwise buffers are
+    #  sized automatically, see size_analog_buffers().  If decimation is greater than 1 only
+    #  one sample is streamed for every decimation samples aquired, reducing the data sent
+    #  to the computer while threshold crossings are detected at the full sampling rate.
+    #  With decimation_filter "boxcar" each streamed sample is the mean of the samples
+    #  aquired since the previous one, if None every decimation'th sample is streamed.
+
+    def __init__(
+        self,
+        pin,
+        name,
+        sampling_rate,
+        threshold=None,
+        rising_event=None,
+        falling_event=None,
+        data_type="H",
+        shared_timer=False,
+        stream_group=None,
+        buffer_size=None,
+        latency=None,
+        decimation=1,
+        decimation_filter="boxcar",
+    ):
+        assert sampling_rate % decimation == 0, "sampling_rate must be a multiple of decimation."
+        assert decimation_filter in ("boxcar", None), "decimation_filter must be 'boxcar' or None."
         if rising_event or falling_event:
             self.threshold = Analog_threshold(threshold, rising_event, falling_event)
         else:
             self.threshold = False
-        self.timer = pyb.Timer(available_timers.pop())
         if pin:  # pin argument can be None when Analog_input subclassed.
             self.ADC = pyb.ADC(pin)
             self.read_sample = self.ADC.read
         self.name = name
-        self.Analog_channel = Analog_channel(name, sampling_rate, data_type)
+        self.decimation = decimation
+        self.boxcar = decimation_filter == "boxcar"
+        self.Analog_channel = Analog_channel(
+            name,
+            sampling_rate // decimation,
+            data_type,
+            buffer_size=buffer_size,
+            latency=latency,
+            decimation=decimation,
+        )
+        if stream_group:
+            if stream_group not in analog_samplers:
+                group = Analog_group(stream_group, sampling_rate // decimation, data_type, decimation)
+                analog_samplers[stream_group] = Analog_sampler(sampling_rate, group)
+            analog_samplers[stream_group].add(self)
+            self.timer = None
+        elif shared_timer:
+            if sampling_rate not in analog_samplers:
+                analog_samplers[sampling_rate] = Analog_sampler(sampling_rate)
+            analog_samplers[sampling_rate].add(self)
+            self.timer = None
+        else:
+            self.timer = pyb.Timer(available_timers.pop())
         assign_ID(self)
 
     def _run_start(self):
-        # Start sampling timer, initialise threshold, aquire first sample.
-        self.timer.init(freq=self.Analog_channel.sampling_rate)
-        self.timer.callback(self._timer_ISR)
+        # Start sampling timer, initialise threshold, aquire first sample.  If a shared
+        # timer is used the first sample is aquired by the Analog_sampler.
         if self.threshold:
             self.threshold.run_start(self.read_sample())
-        self._timer_ISR(0)
+        self.decimation_count = 0  # Samples aquired since last sample streamed.
+        self.decimation_sum = 0  # Sum of samples aquired since last sample streamed.
+        if self.timer:
+            self.timer.init(freq=self.Analog_channel.sampling_rate * self.decimation)
+            self.timer.callback(self._timer_ISR)
+            self._timer_ISR(0)
 
     def _run_stop(self):
-        self.timer.deinit()
+        if self.timer:
+            self.timer.deinit()
 
     @micropython.native
     def _timer_ISR(self, t):
         # Read a sample to the buffer, update write index.
         sample = self.read_sample()
-        self.Analog_channel.put(sample)
+        if self.decimation == 1:
+            self.Analog_channel.put(sample)
+        else:
+            self._decimate(sample)
         if self.threshold:
             self.threshold.check(sample)
 
+    @micropython.native
+    def _decimate(self, sample: int):
+        # Put one sample in the buffer for every decimation samples aquired.
+        self.decimation_sum += sample
+        self.decimation_count += 1
+        if self.decimation_count == self.decimation:
+            if self.boxcar:
+                sample = self.decimation_sum // self.decimation
+            self.Analog_channel.put(sample)
+            self.decimation_count = 0
+            self.decimation_sum = 0
+
     def record(self):  # For backward compatibility.
         pass
 
@@ -274,6 +470,76 @@ class Analog_input(IO_object):
         pass
 
 
+class Analog_sampler:
+    # Samples a group of Analog_inputs with the same sampling rate from a single hardware
+    # timer interrupt, so the interrupt overhead and the hardware timer are shared by the
+    # group rather than incurred for each input.  The first sample is aquired and the timer
+    # started once all inputs have been started.  If an Analog_group is specified the
+    # inputs' data is streamed by the group rather than by each input's Analog_channel.
+
+    def __init__(self, sampling_rate, group=None):
+        self.sampling_rate = sampling_rate
+        self.group = group
+        self.analog_inputs = ()
+        self.n_inputs = 0
+        self.timer = pyb.Timer(available_timers.pop())
+
+    def add(self, analog_input):
+        assert (
+            analog_input.Analog_channel.sampling_rate * analog_input.decimation == self.sampling_rate
+        ), "Shared timer sampling rates differ."
+        if self.group:
+            self.group.add(analog_input.Analog_channel)
+            analog_input.Analog_channel = self.group
+        self.analog_inputs += (analog_input,)
+        self.n_inputs = len(self.analog_inputs)
+
+    def start(self):
+        self._timer_ISR(0)
+        self.timer.init(freq=self.sampling_rate)
+        self.timer.callback(self._timer_ISR)
+
+    def stop(self):
+        self.timer.deinit()
+
+    @micropython.native
+    def _timer_ISR(self, t):
+        # Sample all inputs in group.
+        for i in range(self.n_inputs):
+            self.analog_inputs[i]._timer_ISR(t)
+
+
+@micropython.viper
+def _write_uint(buf: ptr8, index: int, value: int, n_bytes: int):
+    # Write value to n_bytes of buf starting at index, little endian.
+    for i in range(n_bytes):
+        buf[index + i] = (value >> (8 * i)) & 0xFF
+
+
+@micropython.viper
+def _checksum(message: ptr8, n_samples: int, bytes_per_sample: int, signed_bytes: bool) -> int:
+    # Analog message checksum, sum of header bytes 5-12 and sample values modulo 2**16.
+    # Samples are read bytewise so alignment does not matter, signed 2 and 4 byte samples
+    # need no sign extension as the checksum is modulo 2**16.
+    checksum = 0
+    for i in range(5, 13):
+        checksum += message[i]
+    end = 13 + n_samples * bytes_per_sample
+    if bytes_per_sample == 1:
+        for i in range(13, end):
+            if signed_bytes:
+                checksum += (message[i] ^ 0x80) - 0x80
+            else:
+                checksum += message[i]
+    elif bytes_per_sample == 2:
+        for i in range(13, end, 2):
+            checksum += message[i] | (message[i + 1] << 8)
+    else:
+        for i in range(13, end, 4):
+            checksum += message[i] | (message[i + 1] << 8) | (message[i + 2] << 16) | (message[i + 3] << 24)
+    return checksum & 0xFFFF
+
+
 class Analog_channel(IO_object):
     # Buffers analog data and streams it to computer in chunks.
     # Data format is 13 byte header + data array:
@@ -284,8 +550,12 @@ class Analog_channel(IO_object):
     #     message type [A] and subtype [_] (2 byte)
     #     ID of analog input (2 byte)
     #     data array bytes (variable)
+    # Each buffer is an array whose first 16 bytes hold 3 padding bytes and the header, so
+    # the data is word aligned and each message is sent with a single write of a view of
+    # the buffer starting at the header.  Full buffers are sent without copying or
+    # allocating memory.
 
-    def __init__(self, name, sampling_rate, data_type, plot=True):
+    def __init__(self, name, sampling_rate, data_type, plot=True, buffer_size=None, latency=None, decimation=1):
         assert data_type in ("b", "B", "h", "H", "i", "I"), "Invalid data_type."
         assert not any(
             [name == io.name for io in IO_dict.values() if isinstance(io, Analog_channel)]
@@ -296,14 +566,48 @@ class Analog_channel(IO_object):
         self.data_type = data_type
         self.plot = plot
         self.bytes_per_sample = {"b": 1, "B": 1, "h": 2, "H": 2, "i": 4, "I": 4}[data_type]
-        self.buffer_size = max(4, min(256 // self.bytes_per_sample, sampling_rate // 10))
-        self.buffers = (array(data_type, [0] * self.buffer_size), array(data_type, [0] * self.buffer_size))
-        self.buffers_mv = (memoryview(self.buffers[0]), memoryview(self.buffers[1]))
-        self.buffer_start_times = array("i", [0, 0])
-        self.data_header = array("B", b"\x07" + b"_" * 8 + b"A_" + self.ID.to_bytes(2, "little"))
+        self.requested_buffer_size = buffer_size  # Samples per channel in each buffer, None for automatic.
+        self.latency = latency  # Maximum time (ms) from sample aquisition to sending, None for default.
+        self.decimation = decimation  # Number of samples aquired by the input for each sample put in buffer.
+        self.group = None  # Analog_group which streams the channel's data.
+        self.group_index = None  # Index of channel in group.
         self.write_buffer = 0  # Buffer to write new data to.
         self.write_index = 0  # Buffer index to write new data to.
 
+    def _initialise(self):
+        # Allocate buffers, unless data is streamed by an Analog_group.
+        if self.group:
+            return
+        self.buffer_size = self.n_channels() * self.samples_per_buffer
+        self.data_start = 16 // self.bytes_per_sample  # Buffer index of first sample.
+        self.signed_bytes = self.data_type == "b"  # Checksum must sign extend samples.
+        self.buffers = tuple([array(self.data_type, [0] * (self.data_start + self.buffer_size)) for i in range(2)])
+        self.messages = tuple(  # Views of the buffers' header and data bytes.
+            [
+                uctypes.bytearray_at(uctypes.addressof(buffer) + 3, 13 + self.bytes_per_sample * self.buffer_size)
+                for buffer in self.buffers
+            ]
+        )
+        for message in self.messages:
+            message[0:13] = b"\x07" + b"_" * 8 + b"A_" + self.ID.to_bytes(2, "little")
+        self.buffer_start_times = array("i", [0, 0])
+
+    def n_channels(self):
+        # Number of channels whose samples are interleaved in buffer.
+        return 1
+
+    def target_buffer_size(self):
+        # Samples per channel in each buffer before the memory limit is applied.
+        if self.requested_buffer_size:
+            return self.requested_buffer_size
+        latency_samples = self.sampling_rate * (self.latency or analog_latency) // 1000
+        max_samples = max_analog_buffer_bytes // (self.bytes_per_sample * self.n_channels())
+        return max(1, min(max_samples, latency_samples))
+
+    def buffer_memory(self):
+        # Memory used by the channel's two buffers (bytes).
+        return 2 * (16 + self.n_channels() * self.samples_per_buffer * self.bytes_per_sample)
+
     def _run_start(self):
         self.write_index = 0  # Buffer index to write new data to.
 
@@ -316,7 +620,7 @@ class Analog_channel(IO_object):
         # Put a sample in the buffer.
         if self.write_index == 0:  # Record buffer start timestamp.
             self.buffer_start_times[self.write_buffer] = fw.current_time
-        self.buffers[self.write_buffer][self.write_index] = sample
+        self.buffers[self.write_buffer][self.data_start + self.write_index] = sample
         self.write_index = (self.write_index + 1) % self.buffer_size
         if self.write_index == 0:  # Buffer full, switch buffers.
             self.write_buffer = 1 - self.write_buffer
@@ -331,17 +635,42 @@ class Analog_channel(IO_object):
         else:  # Send the buffer not currently being written to.
             buffer_n = 1 - self.write_buffer
             n_samples = self.buffer_size
-        message_len = 8 + self.bytes_per_sample * n_samples
-        self.data_header[3:5] = message_len.to_bytes(2, "little")
-        self.data_header[5:9] = self.buffer_start_times[buffer_n].to_bytes(4, "little")
-        checksum = sum(self.data_header[5:])
-        checksum += sum(self.buffers_mv[buffer_n][:n_samples] if run_stop else self.buffers[buffer_n])
-        self.data_header[1:3] = checksum.to_bytes(2, "little")
-        fw.usb_serial.write(self.data_header)
+        message = self.messages[buffer_n]
+        _write_uint(message, 3, 8 + self.bytes_per_sample * n_samples, 2)
+        _write_uint(message, 5, self.buffer_start_times[buffer_n], 4)
+        _write_uint(message, 1, _checksum(message, n_samples, self.bytes_per_sample, self.signed_bytes), 2)
         if run_stop:
-            fw.usb_serial.send(self.buffers_mv[buffer_n][:n_samples])
+            fw.usb_serial.send(memoryview(message)[: 13 + self.bytes_per_sample * n_samples])
         else:
-            fw.usb_serial.send(self.buffers[buffer_n])
+            fw.usb_serial.send(message)
+
+
+class Analog_group(Analog_channel):
+    # Streams the data of a group of Analog_channels sampled synchronously by an
+    # Analog_sampler as a single message per buffer, reducing the number of messages and
+    # header overhead when many channels are used.  Samples are interleaved in the buffer in
+    # the order channels were added to the group, one sample from each channel per sampling
+    # timer tick.  The message format is the same as for an Analog_channel, with the group
+    # ID, the host splits the data into the member channels using the channel info output
+    # by get_analog_inputs().
+
+    def __init__(self, name, sampling_rate, data_type, decimation=1):
+        self.channels = []
+        Analog_channel.__init__(self, name, sampling_rate, data_type, plot=False, decimation=decimation)
+
+    def add(self, channel):
+        assert channel.data_type == self.data_type, "Analog inputs in a stream group must have the same data_type."
+        assert channel.decimation == self.decimation, "Analog inputs in a stream group must have the same decimation."
+        channel.group = self
+        if channel.requested_buffer_size:  # Group uses smallest buffer size and latency of its channels.
+            self.requested_buffer_size = min(channel.requested_buffer_size, self.requested_buffer_size or 0xFFFF)
+        if channel.latency:
+            self.latency = min(channel.latency, self.latency or 0xFFFF)
+        channel.group_index = len(self.channels)
+        self.channels.append(channel)
+
+    def n_channels(self):
+        return len(self.channels)
 
 
 class Analog_threshold(IO_object):
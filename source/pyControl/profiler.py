@@ -0,0 +1,125 @@
+# Optional instrumentation of the framework main loop.  If fw.profile is True when the
+# framework is run, the main loop in framework.run() calls the functions below to record,
+# in preallocated arrays: the number of times each priority is serviced, the maximum and a
+# histogram of the time taken to service each priority, how late timers are processed
+# relative to their trigger time, and the maximum number of items waiting in the framework
+# queues.  A summary is output to the computer at the end of the run.
+
+import pyb
+import ujson
+from array import array
+from . import framework as fw
+from . import hardware as hw
+
+N_PRIORITIES = const(7)  # Number of main loop priorities.
+
+N_BINS = const(8)  # Number of histogram bins.
+
+service_bins_us = [16, 64, 256, 1024, 4096, 16384, 65536]  # Upper edges of service time histogram bins (us).
+
+lateness_bins_ms = [1, 2, 4, 8, 16, 32, 64]  # Upper edges of timer lateness histogram bins (ms).
+
+queue_names = ["event_queue", "data_output_queue", "interrupt_queue"]
+
+# Profiling data --------------------------------------------------------------
+
+iterations = array("I", [0] * N_PRIORITIES)  # Number of times each priority was serviced.
+
+max_service_us = array("I", [0] * N_PRIORITIES)  # Maximum time to service each priority.
+
+service_histogram = array("I", [0] * (N_PRIORITIES * N_BINS))  # Service time histograms, N_BINS per priority.
+
+lateness_histogram = array("I", [0] * N_BINS)  # Histogram of timer lateness.
+
+queue_max = array("I", [0] * len(queue_names))  # Maximum number of items in each queue.
+
+idle_iterations = 0  # Number of main loop iterations with nothing to process.
+
+max_lateness_ms = 0  # Maximum timer lateness.
+
+# Functions -------------------------------------------------------------------
+
+
+def reset():
+    # Zero profiling data.
+    global idle_iterations, max_lateness_ms
+    for a in (iterations, max_service_us, service_histogram, lateness_histogram, queue_max):
+        for i in range(len(a)):
+            a[i] = 0
+    idle_iterations = 0
+    max_lateness_ms = 0
+
+
+@micropython.native
+def _service_bin(dt: int) -> int:
+    # Histogram bin for service time dt, bins are a factor of 4 wide starting at 16us.
+    b = 0
+    dt = dt >> 4
+    while dt and b < N_BINS - 1:
+        dt = dt >> 2
+        b += 1
+    return b
+
+
+@micropython.native
+def _lateness_bin(dt: int) -> int:
+    # Histogram bin for timer lateness dt, bins are a factor of 2 wide starting at 1ms.
+    b = 0
+    while dt and b < N_BINS - 1:
+        dt = dt >> 1
+        b += 1
+    return b
+
+
+def loop_start():
+    # Called at the start of each main loop iteration, update queue high-water marks and
+    # return start time for record_service().
+    n = len(fw.event_queue.Q)
+    if n > queue_max[0]:
+        queue_max[0] = n
+    n = len(fw.data_output_queue.Q)
+    if n > queue_max[1]:
+        queue_max[1] = n
+    n = hw.interrupt_queue.count()
+    if n > queue_max[2]:
+        queue_max[2] = n
+    return pyb.micros()
+
+
+def record_service(priority, t0):
+    # Called at the end of each main loop iteration, record time taken to service priority,
+    # which is negative if there was nothing to process.
+    global idle_iterations
+    if priority < 0:
+        idle_iterations += 1
+        return
+    dt = pyb.elapsed_micros(t0)
+    iterations[priority] += 1
+    if dt > max_service_us[priority]:
+        max_service_us[priority] = dt
+    service_histogram[priority * N_BINS + _service_bin(dt)] += 1
+
+
+def record_lateness(lateness):
+    # Record how late (ms) a timer event is processed relative to its trigger time.
+    global max_lateness_ms
+    if lateness > max_lateness_ms:
+        max_lateness_ms = lateness
+    lateness_histogram[_lateness_bin(lateness)] += 1
+
+
+def summary():
+    # Return JSON string summarising profiling data.
+    return ujson.dumps(
+        {
+            "iterations": list(iterations),
+            "idle_iterations": idle_iterations,
+            "max_service_us": list(max_service_us),
+            "service_bins_us": service_bins_us,
+            "service_histogram": [list(service_histogram[p * N_BINS : (p + 1) * N_BINS]) for p in range(N_PRIORITIES)],
+            "max_timer_lateness_ms": max_lateness_ms,
+            "lateness_bins_ms": lateness_bins_ms,
+            "timer_lateness_histogram": list(lateness_histogram),
+            "queue_max": {name: queue_max[i] for i, name in enumerate(queue_names)},
+        }
+    )
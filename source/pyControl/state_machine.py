@@ -109,3 +109,25 @@ def get_variable(v_name):
         return getattr(variables, v_name)
     except Exception:
         return None  # Bad variable name
+
+
+def set_variables(v_strs):
+    # Set variables from dict {v_name: v_value_string}, return dict {v_name: set_OK}.
+    set_OK = {}
+    for v_name, v_str in v_strs.items():
+        try:
+            set_OK[v_name] = set_variable(v_name, eval(v_str))
+        except Exception:
+            set_OK[v_name] = False  # Value string could not be evaluated.
+    return set_OK
+
+
+def get_variables(v_names):
+    # Return dict {v_name: v_value_string} for specified variables, "None" if variable can't be read.
+    v_strs = {}
+    for v_name in v_names:
+        try:
+            v_strs[v_name] = repr(getattr(variables, v_name))
+        except Exception:
+            v_strs[v_name] = "None"
+    return v_strs
@@ -0,0 +1,5 @@
+# Simulated pyboard for running the pyControl framework and tasks on the host computer,
+# without a physical pyboard.  See virtual_board.py for details of the simulation.
+
+from .virtual_board import Virtual_board, Virtual_clock, Virtual_serial
+from .simulated_pycboard import Simulated_pycboard
@@ -0,0 +1,44 @@
+# Stand-in for the MicroPython machine module, providing the classes imported by
+# device drivers.  Writes are discarded and reads return zeros.
+
+from .pyb import Pin, UART, freq, unique_id
+
+
+class I2C:
+    def __init__(self, id=0, *args, **kwargs):
+        pass
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def scan(self):
+        return []
+
+    def readfrom(self, addr, nbytes, stop=True):
+        return bytes(nbytes)
+
+    def readfrom_into(self, addr, buf, stop=True):
+        pass
+
+    def writeto(self, addr, buf, stop=True):
+        return 1
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        return bytes(nbytes)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        pass
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        pass
+
+
+SoftI2C = I2C
+
+
+def reset():
+    pass
+
+
+def soft_reset():
+    pass
@@ -0,0 +1,57 @@
+# Stand-in for the MicroPython micropython module.  Code emitter decorators return the
+# function unchanged as the code is run by the host Python interpreter.
+
+
+# Viper pointer types, added to the board builtins so viper function annotations can be evaluated.
+
+
+class ptr8:
+    pass
+
+
+class ptr16:
+    pass
+
+
+class ptr32:
+    pass
+
+
+def native(f):
+    return f
+
+
+def viper(f):
+    return f
+
+
+def bytecode(f):
+    return f
+
+
+def const(x):
+    return x
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def schedule(func, arg):
+    func(arg)
+
+
+def opt_level(level=None):
+    return 0
+
+
+def mem_info(verbose=False):
+    pass
+
+
+def heap_lock():
+    pass
+
+
+def heap_unlock():
+    pass
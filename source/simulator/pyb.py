@@ -0,0 +1,523 @@
+# Stand-in for the MicroPython pyb module, used to run pyControl framework code on the
+# host computer.  Time is read from the virtual clock of the Virtual_board using the
+# module, hardware timer callbacks and pin interrupts are run by the virtual clock as
+# it is advanced, and USB_VCP data is passed to and from the board's virtual serial port.
+
+import random as _random
+
+_board = None  # Virtual_board using the module, set by _reset().
+
+_rng = _random.Random(0)
+
+
+def _reset(board, seed):
+    # Called by Virtual_board on soft reset.
+    global _board, _rng
+    _board = board
+    _rng = _random.Random(seed)
+    Pin._pins = {}
+
+
+# Time functions --------------------------------------------------------------
+
+
+def millis():
+    return _board.clock.read_us() // 1000
+
+
+def micros():
+    return _board.clock.read_us()
+
+
+def elapsed_millis(start):
+    return millis() - start
+
+
+def elapsed_micros(start):
+    return micros() - start
+
+
+def delay(ms):
+    _board.clock.advance(ms * 1000)
+
+
+def udelay(us):
+    _board.clock.advance(us)
+
+
+# Misc functions --------------------------------------------------------------
+
+
+def rng():
+    # 30 bit random number generated by deterministic generator.
+    return _rng.getrandbits(30)
+
+
+def unique_id():
+    return b"pyControlSim"
+
+
+def usb_mode(mode=None, **kwargs):
+    return "VCP"
+
+
+def freq(*args):
+    return (168000000, 168000000, 42000000, 84000000)
+
+
+def disable_irq():
+    return True
+
+
+def enable_irq(state=True):
+    pass
+
+
+def wfi():
+    _board.clock.advance_to_next_event()
+
+
+def info(*args):
+    pass
+
+
+def main(filename):
+    pass
+
+
+def bootloader():
+    pass
+
+
+def hard_reset():
+    pass
+
+
+# USB_VCP ---------------------------------------------------------------------
+
+
+class USB_VCP:
+    # Virtual USB serial port, data written by the board is read by the host from the
+    # Virtual_serial object of the Virtual_board.  Calling any() is the point at which
+    # the framework main loop is idle so the virtual clock is advanced by the board.
+
+    def __init__(self, id=0):
+        pass
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def setinterrupt(self, chr):
+        pass
+
+    def isconnected(self):
+        return True
+
+    def any(self):
+        return _board.poll()
+
+    def read(self, nbytes=None):
+        data = _board.serial.board_read(nbytes)
+        return data if data else None
+
+    def readinto(self, buf, maxlen=None):
+        data = _board.serial.board_read(len(buf) if maxlen is None else min(maxlen, len(buf)))
+        buf[: len(data)] = data
+        return len(data) if data else None
+
+    def readline(self):
+        return _board.serial.board_readline()
+
+    def recv(self, data, timeout=5000):
+        if isinstance(data, int):
+            return _board.serial.board_read(data)
+        received = _board.serial.board_read(len(data))
+        data[: len(received)] = received
+        return len(received)
+
+    def write(self, buf):
+        return _board.serial.board_write(buf)
+
+    def send(self, data, timeout=5000):
+        return _board.serial.board_write(data)
+
+
+# Pin -------------------------------------------------------------------------
+
+
+class Pin:
+    # Pins are identified by name, calling Pin with the name of an existing pin returns
+    # the same object.  The level of input pins is set by the Virtual_board, which runs
+    # any ExtInt callback for the pin.  Output pins connected to an input pin with
+    # Virtual_board.connect_pins set the level of the input pin.
+
+    IN = 0
+    OUT = 1
+    OUT_PP = 1
+    OUT_OD = 17
+    AF_PP = 2
+    AF_OD = 18
+    ANALOG = 3
+    PULL_NONE = 0
+    PULL_UP = 1
+    PULL_DOWN = 2
+    AF1_TIM2 = 1
+
+    _pins = {}  # {pin_name: Pin}
+
+    def __new__(cls, id, *args, **kwargs):
+        name = id._name if isinstance(id, Pin) else id
+        if name not in Pin._pins:
+            pin = object.__new__(cls)
+            pin._name = name
+            pin._mode = Pin.IN
+            pin._pull = Pin.PULL_NONE
+            pin._driven = name in _board.pin_levels  # True if level is set by Virtual_board.
+            pin._value = _board.pin_levels.get(name, 0)
+            pin._extint = None  # ExtInt for pin.
+            Pin._pins[name] = pin
+        return Pin._pins[name]
+
+    def __init__(self, id, mode=None, pull=None, value=None, af=-1, **kwargs):
+        if mode is not None:
+            self.init(mode, pull, value=value, af=af)
+
+    def init(self, mode=None, pull=None, value=None, af=-1, **kwargs):
+        if mode is not None:
+            self._mode = mode
+        if pull is not None:
+            self._pull = pull
+        if not self._driven:
+            self._value = 1 if self._pull == Pin.PULL_UP else 0
+        if value is not None:
+            self._value = int(bool(value))
+
+    def value(self, x=None):
+        if x is None:
+            return self._value
+        self._output(x)
+
+    def on(self):
+        self._output(1)
+
+    def off(self):
+        self._output(0)
+
+    high = on
+    low = off
+
+    def name(self):
+        return self._name
+
+    def mode(self):
+        return self._mode
+
+    def pull(self):
+        return self._pull
+
+    def _output(self, level):
+        # Set level of pin from the board, driving any input pin connected to it.
+        self._value = int(bool(level))
+        if self._name in _board.pin_connections:
+            _board.set_pin(_board.pin_connections[self._name], self._value)
+
+    def _drive(self, level):
+        # Set level of pin from outside the board, running interrupt callback if edge matches.
+        level = int(bool(level))
+        self._driven = True
+        if level == self._value:
+            return
+        self._value = level
+        if self._extint and self._extint._enabled:
+            edge = ExtInt.IRQ_RISING if level else ExtInt.IRQ_FALLING
+            if self._extint._mode in (edge, ExtInt.IRQ_RISING_FALLING):
+                self._extint._callback(self._extint._line)
+
+
+class ExtInt:
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+    IRQ_RISING_FALLING = 3
+
+    _next_line = 0
+
+    def __init__(self, pin, mode, pull, callback):
+        self._pin = Pin(pin)
+        self._pin.init(pull=pull)
+        self._mode = mode
+        self._callback = callback
+        self._enabled = True
+        self._line = ExtInt._next_line
+        ExtInt._next_line += 1
+        self._pin._extint = self
+
+    def line(self):
+        return self._line
+
+    def enable(self):
+        self._enabled = True
+
+    def disable(self):
+        self._enabled = False
+
+    def swint(self):
+        self._callback(self._line)
+
+
+# Timer -----------------------------------------------------------------------
+
+
+class Timer:
+    # Timer callbacks are scheduled on the virtual clock at the timer frequency.
+
+    UP = 0
+    DOWN = 1
+    CENTER = 2
+    PWM = 0
+    PWM_INVERTED = 1
+    OC_TIMING = 2
+    OC_ACTIVE = 3
+    OC_INACTIVE = 4
+    OC_TOGGLE = 5
+    OC_FORCED_ACTIVE = 6
+    OC_FORCED_INACTIVE = 7
+    IC = 8
+    ENC_A = 9
+    ENC_B = 10
+    ENC_AB = 11
+    HIGH = 0
+    LOW = 1
+    RISING = 0
+    FALLING = 1
+    BOTH = 2
+
+    source_freq = 84000000  # Frequency of timer clock (Hz).
+
+    def __init__(self, id, freq=None, prescaler=None, period=None, **kwargs):
+        self._id = id
+        self._freq = None
+        self._callback = None
+        self._generation = 0  # Incremented to cancel scheduled callbacks.
+        self._counter = 0
+        if freq or period is not None:
+            self.init(freq=freq, prescaler=prescaler, period=period, **kwargs)
+
+    def init(self, freq=None, prescaler=None, period=None, **kwargs):
+        if freq is None and period is not None:
+            freq = Timer.source_freq / ((prescaler or 0) + 1) / (period + 1)
+        self._freq = freq
+        self._start_us = _board.clock.time_us
+        self._n_ticks = 0
+        self._schedule()
+
+    def deinit(self):
+        self._freq = None
+        self._callback = None
+        self._generation += 1
+
+    def callback(self, fun):
+        self._callback = fun
+        self._schedule()
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        self.init(freq=value)
+
+    def counter(self, value=None):
+        if value is None:
+            return self._counter
+        self._counter = value
+
+    def period(self, value=None):
+        return 0
+
+    def prescaler(self, value=None):
+        return 0
+
+    def channel(self, channel, mode=None, **kwargs):
+        return _Timer_channel()
+
+    def _schedule(self):
+        self._generation += 1
+        if self._freq and self._callback:
+            self._schedule_tick(self._generation)
+
+    def _schedule_tick(self, generation):
+        tick_us = self._start_us + round((self._n_ticks + 1) * 1000000 / self._freq)
+        _board.clock.schedule(tick_us, lambda: self._tick(generation))
+
+    def _tick(self, generation):
+        if generation != self._generation:
+            return  # Timer has been deinitialised or reconfigured.
+        self._n_ticks += 1
+        self._schedule_tick(generation)
+        self._callback(self)
+
+
+class _Timer_channel:
+    def callback(self, fun):
+        pass
+
+    def capture(self, value=None):
+        return 0
+
+    def compare(self, value=None):
+        return 0
+
+    def pulse_width(self, value=None):
+        return 0
+
+    def pulse_width_percent(self, value=None):
+        return 0
+
+
+# Analog IO -------------------------------------------------------------------
+
+
+class ADC:
+    # Samples are read from the signal set for the pin with Virtual_board.set_analog_signal.
+
+    def __init__(self, pin):
+        self._name = pin._name if isinstance(pin, Pin) else pin
+
+    def read(self):
+        return _board.analog_value(self._name)
+
+
+class DAC:
+    NORMAL = 0
+    CIRCULAR = 256
+
+    def __init__(self, port, bits=8, buffering=None):
+        self._value = 0
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def deinit(self):
+        pass
+
+    def write(self, value):
+        self._value = value
+
+    def write_timed(self, data, freq, mode=NORMAL):
+        pass
+
+    def noise(self, freq):
+        pass
+
+    def triangle(self, freq):
+        pass
+
+
+# Communication ---------------------------------------------------------------
+
+
+class I2C:
+    # Writes are discarded and reads return zeros.
+
+    MASTER = 0
+    SLAVE = 1
+
+    def __init__(self, bus, mode=None, **kwargs):
+        pass
+
+    def init(self, mode, **kwargs):
+        pass
+
+    def deinit(self):
+        pass
+
+    def is_ready(self, addr):
+        return True
+
+    def scan(self):
+        return []
+
+    def send(self, send, addr=0, timeout=5000):
+        pass
+
+    def recv(self, recv, addr=0, timeout=5000):
+        return bytes(recv) if isinstance(recv, int) else recv
+
+    def mem_read(self, data, addr, memaddr, timeout=5000, addr_size=8):
+        return bytes(data) if isinstance(data, int) else data
+
+    def mem_write(self, data, addr, memaddr, timeout=5000, addr_size=8):
+        pass
+
+
+class UART:
+    # Writes are discarded and no data is received.
+
+    def __init__(self, bus, baudrate=9600, *args, **kwargs):
+        pass
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def deinit(self):
+        pass
+
+    def any(self):
+        return 0
+
+    def read(self, nbytes=None):
+        return None
+
+    def readline(self):
+        return None
+
+    def readinto(self, buf, nbytes=None):
+        return None
+
+    def readchar(self):
+        return -1
+
+    def write(self, buf):
+        return len(buf)
+
+    def writechar(self, char):
+        pass
+
+
+# Board -----------------------------------------------------------------------
+
+
+class LED:
+    def __init__(self, id):
+        self._intensity = 0
+
+    def on(self):
+        self._intensity = 255
+
+    def off(self):
+        self._intensity = 0
+
+    def toggle(self):
+        self._intensity = 0 if self._intensity else 255
+
+    def intensity(self, value=None):
+        if value is None:
+            return self._intensity
+        self._intensity = value
+
+
+class Switch:
+    def __init__(self):
+        pass
+
+    def __call__(self):
+        return False
+
+    def value(self):
+        return False
+
+    def callback(self, fun):
+        pass
+
+
+class RTC:
+    def datetime(self, datetimetuple=None):
+        return (2000, 1, 1, 6, 0, 0, 0, 0)
@@ -0,0 +1,51 @@
+# Run a pyControl task on the simulated pyboard and print the data log, optionally saving
+# the data file.  Inputs are specified as pin_name:time_ms:value, e.g. X17:1000:0 sets
+# pin X17 low 1 second after the run starts.  Run from the pyControl root folder with:
+#     python -m source.simulator.run_task example/button --duration 10000 --input X17:1000:0 --input X17:1100:1
+
+import os
+import time
+import argparse
+from source.gui.settings import user_folder
+from source.simulator import Virtual_board, Simulated_pycboard
+
+
+def run_task(task, duration, hwd=None, inputs=(), seed=0, data_dir=None, profile=False, print_func=print):
+    """Setup and run task on a simulated pyboard, return the Simulated_pycboard."""
+    board = Simulated_pycboard(Virtual_board(seed=seed), print_func=print_func)
+    if hwd:
+        board.load_hardware_definition(os.path.join(user_folder("hardware_definitions"), hwd + ".py"))
+    board.setup_state_machine(task)
+    if data_dir:
+        data_dir = os.path.abspath(data_dir)
+        os.makedirs(data_dir, exist_ok=True)
+        board.data_logger.open_data_file(data_dir, "simulation", "simulator", "subject")
+    for pin_name, time_ms, value in inputs:
+        board.board.set_pin(pin_name, value, time_ms)
+    board.start_framework(profile=profile)
+    board.run_framework(duration)
+    if data_dir:
+        board.data_logger.close_files()
+    return board
+
+
+def parse_input(input_str):
+    pin_name, time_ms, value = input_str.split(":")
+    return pin_name, float(time_ms), int(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a pyControl task on the simulated pyboard.")
+    parser.add_argument("task", help="Task name relative to tasks folder, e.g. example/blinker.")
+    parser.add_argument("--duration", type=int, default=10000, help="Run duration (ms).")
+    parser.add_argument("--hwd", help="Hardware definition name relative to hardware definitions folder.")
+    parser.add_argument("--input", action="append", default=[], help="Pin input as pin_name:time_ms:value.")
+    parser.add_argument("--seed", type=int, default=0, help="Random number generator seed.")
+    parser.add_argument("--data-dir", help="Folder to save data file in.")
+    parser.add_argument("--profile", action="store_true", help="Profile the framework main loop.")
+    args = parser.parse_args()
+    start_time = time.time()
+    run_task(
+        args.task, args.duration, args.hwd, [parse_input(i) for i in args.input], args.seed, args.data_dir, args.profile
+    )
+    print(f"\nSimulated {args.duration/1000:.1f}s in {time.time() - start_time:.2f}s.")
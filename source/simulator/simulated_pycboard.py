@@ -0,0 +1,80 @@
+# Pycboard connected to a Virtual_board instead of a serial port.  The REPL transport
+# methods of Pyboard are replaced to execute commands on the virtual board, while all
+# Pycboard methods used to setup and run tasks and to process data from the board are
+# unchanged, so data from the board is parsed from the same serial byte stream as
+# sent by a physical pyboard.
+
+import os
+import shutil
+from source.communication.pyboard import Pyboard
+from source.communication.pycboard import Pycboard
+from .virtual_board import Virtual_board
+
+
+class Virtual_pyboard(Pyboard):
+    """Pyboard REPL transport for a Virtual_board."""
+
+    def __init__(self, board, baudrate=115200):
+        self.board = board
+        self.serial = board.serial
+
+    def enter_raw_repl(self):
+        self.board.soft_reset()
+
+    def exit_raw_repl(self):
+        pass
+
+    def exec_raw_no_follow(self, command):
+        self.board.command = command
+
+    def exec_raw(self, command, timeout=10, data_consumer=None):
+        return self.board.execute(command)
+
+
+class Simulated_pycboard(Pycboard, Virtual_pyboard):
+    """Pycboard using a Virtual_board.  Task runs are started with start_framework() as
+    for a physical board then run with run_framework()."""
+
+    def __init__(self, board=None, verbose=False, print_func=print, data_consumers=None):
+        super().__init__(
+            board or Virtual_board(), verbose=verbose, print_func=print_func, data_consumers=data_consumers
+        )
+
+    def transfer_file(self, file_path, target_path=None, update_manifest=True):
+        """Copy file to the virtual board's flash folder, return the number of bytes sent."""
+        if not target_path:
+            target_path = os.path.split(file_path)[-1]
+        file_size = os.path.getsize(file_path)
+        file_hash = Pycboard.device_index.file_hash(file_path)
+        if self.file_manifest.get(target_path) == [file_hash, file_size]:
+            return 0  # File on pyboard is unchanged.
+        shutil.copyfile(file_path, os.path.join(self.board.flash_folder, target_path))
+        self.file_manifest[target_path] = [file_hash, file_size]
+        if update_manifest:
+            self.write_manifest()
+        return file_size
+
+    def close(self):
+        self.board.close()
+
+    # Running tasks.
+
+    def run_framework(self, duration, update_interval=10):
+        """Run the framework started by start_framework() for duration ms of virtual time,
+        calling process_data every update_interval ms as the GUI does, then stop it.
+        Callbacks scheduled on the board with Virtual_board.schedule are run at their
+        times relative to the start of the run.  Raises PyboardError if an error occurs
+        on the board."""
+
+        def update():
+            if self.framework_running:
+                self.process_data()
+                self.board.clock.schedule(self.board.clock.time_us + update_interval * 1000, queue_update)
+
+        def queue_update():
+            self.board.host_callbacks.append(update)
+
+        self.board.schedule(update_interval, update, host=True)
+        self.board.schedule(duration, self.stop_framework, host=True)
+        self.board.run_command()
+        self.process_data()
@@ -0,0 +1,12 @@
+# Stand-in for the MicroPython array module.  MicroPython arrays accept any buffer or
+# iterable of values for slice assignment, e.g. array_slice[:] = bytes, which CPython
+# arrays only accept from another array of the same type.
+
+import array as _array
+
+
+class array(_array.array):
+    def __setitem__(self, index, value):
+        if isinstance(index, slice) and not isinstance(value, _array.array):
+            value = _array.array(self.typecode, value)
+        super().__setitem__(index, value)
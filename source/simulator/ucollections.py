@@ -0,0 +1,3 @@
+# Stand-in for the MicroPython ucollections module.
+
+from collections import namedtuple, OrderedDict, deque
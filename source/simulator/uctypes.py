@@ -0,0 +1,13 @@
+# Stand-in for the MicroPython uctypes module, providing the functions used to access
+# memory by address.  Addresses are the real addresses of host Python buffers, so views
+# created with bytearray_at share memory with the buffer as on the pyboard.
+
+import ctypes
+
+
+def addressof(obj):
+    return ctypes.addressof(ctypes.c_char.from_buffer(obj))
+
+
+def bytearray_at(addr, size):
+    return memoryview((ctypes.c_char * size).from_address(addr)).cast("B")
@@ -0,0 +1,3 @@
+# Stand-in for the MicroPython ujson module.
+
+from json import dumps, loads, dump, load
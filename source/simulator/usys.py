@@ -0,0 +1,22 @@
+# Stand-in for the MicroPython sys module, used for "import sys" in board code.
+
+import sys as _sys
+from types import SimpleNamespace
+
+implementation = SimpleNamespace(name="micropython", version=(1, 22, 0))
+platform = "pyboard"
+byteorder = _sys.byteorder
+maxsize = _sys.maxsize
+modules = _sys.modules
+path = _sys.path
+argv = []
+
+
+def exit(retval=0):
+    raise SystemExit(retval)
+
+
+def print_exception(exc, file=None):
+    import traceback
+
+    traceback.print_exception(type(exc), exc, exc.__traceback__, file=file)
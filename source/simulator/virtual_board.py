@@ -0,0 +1,356 @@
+# Virtual pyboard used to run the pyControl framework on the host computer.  Board code
+# is run by the host Python interpreter with stand-ins for the MicroPython modules, using
+# a deterministic virtual clock so tasks run faster than real time and runs with the same
+# inputs and random seed produce identical output.
+#
+# The virtual clock is advanced at the points where the board would spend time: each time
+# the framework main loop polls the serial port for input, and when data is written to the
+# serial port.  When the main loop has no work to do, the clock jumps directly to the next
+# scheduled timer callback or input, so idle time costs nothing on the host.
+
+import os
+import sys
+import heapq
+import shutil
+import builtins
+import tempfile
+import traceback
+import importlib.util
+from source.gui.settings import user_folder
+from . import pyb, micropython, ujson, ucollections, machine, usys, uarray, uctypes
+
+stand_in_modules = {
+    "pyb": pyb,
+    "micropython": micropython,
+    "ujson": ujson,
+    "ucollections": ucollections,
+    "machine": machine,
+    "uctypes": uctypes,
+}
+
+framework_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pyControl")
+
+ignore_pycache = shutil.ignore_patterns("__pycache__")
+
+# Virtual_clock -----------------------------------------------------------------------
+
+
+class Virtual_clock:
+    """Virtual microsecond clock which runs callbacks scheduled with schedule() in time
+    order as the clock is advanced."""
+
+    def __init__(self, read_cost_us=1):
+        self.time_us = 0
+        self.read_cost_us = read_cost_us  # Time taken to read clock, so polling loops progress.
+        self.events = []  # Heap of (time_us, sequence_number, callback)
+        self.n_scheduled = 0
+        self.advancing = False  # True while running callbacks.
+
+    def schedule(self, time_us, callback):
+        heapq.heappush(self.events, (max(time_us, self.time_us), self.n_scheduled, callback))
+        self.n_scheduled += 1
+
+    def advance_to(self, time_us):
+        """Advance clock to time_us running any callbacks scheduled up to that time.  If
+        called from a callback the clock is advanced without running callbacks, which run
+        once the callback returns."""
+        if self.advancing:
+            self.time_us = max(self.time_us, time_us)
+            return
+        self.advancing = True
+        try:
+            while self.events and self.events[0][0] <= max(time_us, self.time_us):
+                event_time, _, callback = heapq.heappop(self.events)
+                self.time_us = max(self.time_us, event_time)
+                callback()
+            self.time_us = max(self.time_us, time_us)
+        finally:
+            self.advancing = False
+
+    def advance(self, interval_us):
+        self.advance_to(self.time_us + interval_us)
+
+    def advance_to_next_event(self):
+        if self.events:
+            self.advance_to(self.events[0][0])
+
+    def read_us(self):
+        self.advance(self.read_cost_us)
+        return self.time_us
+
+
+# Virtual_serial ----------------------------------------------------------------------
+
+
+class Virtual_serial:
+    """Virtual USB serial connection.  The host side methods match those of the
+    serial.Serial object used by Pyboard, the board side methods are called by the
+    pyb.USB_VCP stand-in."""
+
+    def __init__(self, board):
+        self.board = board
+        self.to_host = bytearray()  # Data written by board.
+        self.read_index = 0  # Index in to_host of next byte to be read by host.
+        self.to_board = bytearray()  # Data written by host.
+        self.timeout = None
+
+    # Host side.
+
+    @property
+    def in_waiting(self):
+        return len(self.to_host) - self.read_index
+
+    def read(self, size=1):
+        data = bytes(self.to_host[self.read_index : self.read_index + size])
+        self.read_index += len(data)
+        if self.read_index > 65536:  # Discard data already read.
+            del self.to_host[: self.read_index]
+            self.read_index = 0
+        return data
+
+    def write(self, data):
+        self.to_board += data
+        return len(data)
+
+    def reset_input_buffer(self):
+        self.to_host.clear()
+        self.read_index = 0
+
+    def close(self):
+        pass
+
+    # Board side.
+
+    def board_read(self, size=None):
+        if size is None:
+            size = len(self.to_board)
+        data = bytes(self.to_board[:size])
+        del self.to_board[:size]
+        return data
+
+    def board_readline(self):
+        end = self.to_board.find(b"\n")
+        return self.board_read(len(self.to_board) if end == -1 else end + 1)
+
+    def board_write(self, data):
+        data = bytes(data)
+        self.to_host += data
+        self.board.clock.advance(len(data) * self.board.byte_cost_us)
+        return len(data)
+
+
+# Board_importer ----------------------------------------------------------------------
+
+
+class Board_importer:
+    """Import hook which loads modules from the virtual board's flash folder as board
+    modules, with the board builtins."""
+
+    def __init__(self):
+        self.board = None  # Virtual_board currently using the importer.
+
+    def find_spec(self, fullname, path, target=None):
+        if not self.board:
+            return None
+        module_path = os.path.join(self.board.flash_folder, *fullname.split("."))
+        if os.path.exists(os.path.join(module_path, "__init__.py")):
+            return importlib.util.spec_from_file_location(
+                fullname,
+                os.path.join(module_path, "__init__.py"),
+                loader=self,
+                submodule_search_locations=[module_path],
+            )
+        elif os.path.exists(module_path + ".py"):
+            return importlib.util.spec_from_file_location(fullname, module_path + ".py", loader=self)
+        return None
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        self.board.modules.add(module.__name__)
+        module.__builtins__ = self.board.builtins
+        with open(module.__spec__.origin, "r", encoding="utf-8") as f:
+            code = compile(f.read(), module.__spec__.origin, "exec")
+        exec(code, module.__dict__)
+
+
+board_importer = Board_importer()
+
+
+def micropython_hasattr(obj, name):
+    """hasattr as on MicroPython, where instances of builtin types do not have an __init__
+    attribute.  Used by the framework to select task variables."""
+    if name == "__init__" and type(obj) in (int, float, bool, str, bytes, list, tuple, dict, set, type(None)):
+        return False
+    return hasattr(obj, name)
+
+
+# Virtual_board -----------------------------------------------------------------------
+
+
+class Virtual_board:
+    """Board side of the simulation.  The board's filesystem is a temporary flash folder,
+    initially containing the pyControl framework and devices/__init__.py, which is the
+    working directory while board code runs.  Commands sent to the board's REPL are run
+    with execute(), the command started by exec_raw_no_follow (normally fw.run()) is run
+    with run_command().  The state of the world outside the board (input pin levels, pin
+    connections, analog signals and scheduled inputs) is kept when the board is reset.
+    Only one Virtual_board can be used at a time as board modules are shared by the host
+    process.
+
+    Arguments:
+    seed         - Seed for the pyb.rng random number generator.
+    poll_cost_us - Virtual time taken by each main loop iteration that polls for serial input.
+    byte_cost_us - Virtual time taken to write each byte to the serial port."""
+
+    def __init__(self, seed=0, poll_cost_us=10, byte_cost_us=1):
+        self.seed = seed
+        self.poll_cost_us = poll_cost_us
+        self.byte_cost_us = byte_cost_us
+        self.serial = Virtual_serial(self)
+        self.flash = tempfile.TemporaryDirectory(prefix="pyboard_flash_")
+        self.flash_folder = self.flash.name
+        shutil.copytree(framework_folder, os.path.join(self.flash_folder, "pyControl"), ignore=ignore_pycache)
+        os.mkdir(os.path.join(self.flash_folder, "devices"))
+        shutil.copy(os.path.join(user_folder("devices"), "__init__.py"), os.path.join(self.flash_folder, "devices"))
+        self.modules = set()  # Names of board modules which have been imported.
+        self.pin_levels = {}  # {pin_name: level} of input pins.
+        self.pin_connections = {}  # {output_pin_name: input_pin_name}
+        self.analog_signals = {}  # {pin_name: signal}
+        self.scheduled = []  # (time_ms, callback, host) to schedule when command is run.
+        sys.modules.update(stand_in_modules)
+        if board_importer not in sys.meta_path:
+            sys.meta_path.insert(0, board_importer)
+        self.soft_reset()
+
+    def soft_reset(self):
+        """Reset the board state and remove board modules so they are imported again."""
+        board_importer.board = self
+        for module_name in self.modules:
+            sys.modules.pop(module_name, None)
+        self.modules = set()
+        self.clock = Virtual_clock()
+        self.host_callbacks = []  # Callbacks to run at next poll of serial input.
+        self.command = None  # Command to run with run_command().
+        self.stdout = None  # List collecting print output when executing REPL commands.
+        pyb._reset(self, self.seed)
+        self.builtins = dict(builtins.__dict__)
+        self.builtins.update({"micropython": micropython, "const": micropython.const})
+        self.builtins.update({"ptr8": micropython.ptr8, "ptr16": micropython.ptr16, "ptr32": micropython.ptr32})
+        self.builtins.update({"print": self._print, "hasattr": micropython_hasattr, "__import__": self._import})
+        self.namespace = {"__name__": "__main__", "__builtins__": self.builtins}
+
+    def close(self):
+        self.soft_reset()
+        board_importer.board = None
+        self.flash.cleanup()
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Board import, sys and array are imported as the usys and uarray stand-ins.
+        if level == 0 and name in ("sys", "usys"):
+            return usys
+        if level == 0 and name in ("array", "uarray"):
+            return uarray
+        return builtins.__import__(name, globals, locals, fromlist, level)
+
+    def _print(self, *args, sep=" ", end="\n", **kwargs):
+        # Board print, output goes to serial port when running command.
+        output = sep.join(str(arg) for arg in args) + end
+        if self.stdout is not None:
+            self.stdout.append(output)
+        else:
+            self.serial.board_write(output.encode())
+
+    # Running code ------------------------------------------------------------
+
+    def _exec(self, command):
+        """Execute command in the board's REPL namespace with the flash folder as working
+        directory, return traceback of any error as bytes."""
+        if isinstance(command, bytes):
+            command = command.decode()
+        host_cwd = os.getcwd()
+        os.chdir(self.flash_folder)
+        try:
+            exec(compile(command, "<stdin>", "exec"), self.namespace)
+        except Exception:
+            return traceback.format_exc().encode()
+        finally:
+            os.chdir(host_cwd)
+        return b""
+
+    def execute(self, command):
+        """Execute REPL command, return (output, error output)."""
+        self.stdout = []
+        error = self._exec(command)
+        output = "".join(self.stdout).replace("\n", "\r\n").encode()
+        self.stdout = None
+        return output, error
+
+    def run_command(self):
+        """Run the command sent with exec_raw_no_follow, writing its output to the serial
+        port followed by the end of command markers and any error output, as the REPL
+        does.  Callbacks added with schedule() are scheduled relative to the command start."""
+        self.host_cwd = os.getcwd()
+        start_us = self.clock.time_us
+        for time_ms, callback, host in self.scheduled:
+            if host:
+                callback = lambda callback=callback: self.host_callbacks.append(callback)
+            self.clock.schedule(start_us + int(time_ms * 1000), callback)
+        self.scheduled = []
+        command, self.command = self.command, None
+        error = self._exec(command)
+        self.serial.board_write(b"\x04" + error + b"\x04>")
+
+    def poll(self):
+        """Called when the framework main loop checks for serial input.  Runs any host
+        callbacks that are due, then advances the virtual clock, to the next scheduled
+        event if the main loop has nothing else to do.  Returns number of bytes available."""
+        if self.host_callbacks:
+            board_cwd = os.getcwd()
+            os.chdir(self.host_cwd)
+            try:
+                while self.host_callbacks:
+                    self.host_callbacks.pop(0)()
+            finally:
+                os.chdir(board_cwd)
+        if not self.serial.to_board:
+            fw = sys.modules.get("pyControl.framework")
+            hw = sys.modules.get("pyControl.hardware")
+            if fw and not (fw.data_output_queue.available or hw.stream_data_queue.available):
+                self.clock.advance_to_next_event()
+            else:
+                self.clock.advance(self.poll_cost_us)
+        return len(self.serial.to_board)
+
+    # Inputs ------------------------------------------------------------------
+
+    def schedule(self, time_ms, callback, host=False):
+        """Call callback at time_ms after the start of the next command run.  Callbacks are
+        called from interrupt context unless host is True, when they are called between
+        iterations of the framework main loop, as used for host actions such as reading
+        data from and sending commands to the board."""
+        self.scheduled.append((time_ms, callback, host))
+
+    def set_pin(self, pin_name, value, time_ms=None):
+        """Set the level of an input pin, now or at time_ms after the start of the next
+        command run.  Runs any interrupt callback for the pin."""
+        if time_ms is None:
+            self.pin_levels[pin_name] = int(bool(value))
+            pyb.Pin(pin_name)._drive(value)
+        else:
+            self.schedule(time_ms, lambda: self.set_pin(pin_name, value))
+
+    def connect_pins(self, output_pin, input_pin):
+        """Connect output_pin to input_pin, as with a jumper wire, so that setting the
+        output pin from the board sets the level of the input pin."""
+        self.pin_connections[output_pin] = input_pin
+
+    def set_analog_signal(self, pin_name, signal):
+        """Set signal read by ADC on pin, either a constant value or a function of time
+        in ms since the clock started."""
+        self.analog_signals[pin_name] = signal
+
+    def analog_value(self, pin_name):
+        signal = self.analog_signals.get(pin_name, 0)
+        return int(signal(self.clock.time_us / 1000)) if callable(signal) else signal
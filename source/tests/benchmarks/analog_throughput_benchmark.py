@@ -0,0 +1,186 @@
+# Benchmark for the maximum aggregate analog sample rate that can be streamed to the
+# computer.  Runs analog_throughput_task.py with a set of analog inputs at each of a set
+# of per input sampling rates and checks whether the data stream is sustained: all
+# expected samples are received, no messages fail the checksum, no data is dropped by
+# the framework queues, and the timestamps of the data messages do not fall behind the
+# sample times by more than a tolerance.  The time taken to send each analog data message
+# is measured by the framework main loop profiler (see source/pyControl/profiler.py).
+# The maximum sustained aggregate sample rate (number of inputs x sampling rate) is
+# reported and the results written to a JSON report for regression tracking, to compare
+# versions of the framework run the benchmark with each.  By default the benchmark runs
+# on the simulated pyboard, which models the time taken to write data to the serial port
+# but not the time taken by interrupts, to run on a pyboard with the pyControl framework
+# loaded specify the serial port.  With --regression the configurations in regression_cases
+# are run instead and the benchmark exits with an error if any is not sustained.  Run from
+# the pyControl root folder with:
+#     python -m source.tests.benchmarks.analog_throughput_benchmark --rates 1000 5000 10000
+#     python -m source.tests.benchmarks.analog_throughput_benchmark --port COM3 --n-inputs 8 --stream-group
+#     python -m source.tests.benchmarks.analog_throughput_benchmark --regression
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from source.communication.message import MsgType
+from source.communication.pycboard import Pycboard
+from source.simulator import Virtual_board, Simulated_pycboard
+from source.tests.benchmarks.interrupt_latency_benchmark import task_dir, write_config
+
+STREAM_PRIORITY = 5  # Index of analog data streaming in profiler main loop priorities.
+
+# Configurations which must be sustained, overriding the command line arguments, run with --regression.
+regression_cases = [
+    {"N_INPUTS": 4, "SAMPLING_RATE": 10000, "DATA_TYPE": "H"},
+    # Buffers of 1 byte types with 3 inputs fill as the run ends, buffers queued but not
+    # sent when the framework stops must be sent.
+    {"N_INPUTS": 3, "SAMPLING_RATE": 10000, "DATA_TYPE": "b", "DURATION": 1000},
+]
+
+
+class Stream_collector:
+    """Data consumer which counts the analog samples received for each input, the maximum
+    lag of message timestamps behind sample times, and warnings."""
+
+    def __init__(self, sampling_rate):
+        self.sampling_rate = sampling_rate
+        self.n_samples = {}  # {ID: number of samples received}
+        self.max_lag_ms = 0
+        self.warnings = []
+        self.profile = None
+
+    def process_data(self, new_data):
+        for nd in new_data:
+            if nd.type == MsgType.ANLOG:
+                ID, data = nd.content
+                n_samples = self.n_samples.get(ID, 0)
+                self.max_lag_ms = max(self.max_lag_ms, nd.time - n_samples * 1000 / self.sampling_rate)
+                self.n_samples[ID] = n_samples + len(data)
+            elif nd.type == MsgType.PROFL:
+                self.profile = json.loads(nd.content)
+            elif nd.type in (MsgType.WARNG, MsgType.ERROR):
+                self.warnings.append(nd.content)
+
+
+def run_benchmark(board, config, lag_tolerance):
+    """Run the analog throughput task on board with the specified configuration, return
+    the results dict."""
+    config_path = write_config(config)
+    try:
+        board.transfer_file(config_path, "analog_benchmark_config.py", update_manifest=False)
+    finally:
+        os.remove(config_path)
+    board.setup_state_machine("analog_throughput_task", sm_dir=task_dir)
+    collector = Stream_collector(config["SAMPLING_RATE"])
+    board.data_consumers = [collector]
+    board.start_framework(data_output=True, profile=True)
+    if isinstance(board, Simulated_pycboard):
+        board.run_framework(config["DURATION"] + 1000)
+    else:
+        timeout = time.time() + config["DURATION"] / 1000 + 5
+        while board.framework_running and time.time() < timeout:
+            time.sleep(0.01)
+            board.process_data()
+        if board.framework_running:
+            board.stop_framework()
+            time.sleep(0.05)
+            board.process_data()
+    expected_samples = config["SAMPLING_RATE"] * config["DURATION"] // 1000
+    min_samples = min([collector.n_samples.get(ID, 0) for ID in board.sm_info.analog_inputs])
+    failures = [w for w in collector.warnings if not w.startswith("Analog inputs may not be sustainable")]
+    if min_samples < expected_samples:
+        failures.append(f"{expected_samples - min_samples} samples missing.")
+    if collector.max_lag_ms > lag_tolerance:
+        failures.append(f"Message timestamps lag sample times by {collector.max_lag_ms:.1f}ms.")
+    profile = collector.profile
+    stream_service_us = None
+    if profile and profile["iterations"][STREAM_PRIORITY]:
+        stream_service_us = {
+            "messages": profile["iterations"][STREAM_PRIORITY],
+            "max": profile["max_service_us"][STREAM_PRIORITY],
+            "histogram": profile["service_histogram"][STREAM_PRIORITY],
+            "bins_us": profile["service_bins_us"],
+        }
+    return {
+        "config": config,
+        "aggregate_rate": config["N_INPUTS"] * config["SAMPLING_RATE"],
+        "sustained": not failures,
+        "failures": failures,
+        "warnings": collector.warnings,
+        "expected_samples": expected_samples,
+        "min_samples": min_samples,
+        "max_lag_ms": collector.max_lag_ms,
+        "stream_service_us": stream_service_us,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark maximum sustained analog streaming sample rate.")
+    parser.add_argument("--port", help="Serial port of pyboard, if not specified the simulator is used.")
+    parser.add_argument(
+        "--rates", type=int, nargs="+", default=[1000, 2000, 5000, 10000, 20000], help="Sampling rates (Hz)."
+    )
+    parser.add_argument("--n-inputs", type=int, default=4, help="Number of analog inputs (max 16).")
+    parser.add_argument("--data-type", default="H", help="Data type of analog inputs.")
+    parser.add_argument("--shared-timer", action="store_true", help="Sample inputs from a shared hardware timer.")
+    parser.add_argument("--stream-group", action="store_true", help="Sample and stream inputs as a single group.")
+    parser.add_argument("--duration", type=int, default=5000, help="Duration of each run (ms).")
+    parser.add_argument("--lag-tolerance", type=float, default=5, help="Maximum sustained timestamp lag (ms).")
+    parser.add_argument("--seed", type=int, default=0, help="Random number generator seed for simulator.")
+    parser.add_argument("--regression", action="store_true", help="Run the regression cases, fail if not sustained.")
+    parser.add_argument(
+        "--output",
+        default=os.path.join(tempfile.gettempdir(), "analog_throughput_report.json"),
+        help="Path of report file, saved in the temporary files folder by default.",
+    )
+    args = parser.parse_args()
+    quiet = lambda *args, **kwargs: None
+    if args.port:
+        board = Pycboard(args.port, verbose=False, print_func=quiet)
+    else:
+        board = Simulated_pycboard(Virtual_board(seed=args.seed), print_func=quiet)
+    report = {
+        "benchmark": "analog_throughput",
+        "target": args.port or "simulator",
+        "framework_version": board.framework_version,
+        "micropython_version": board.micropython_version,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "results": [],
+    }
+    print(f"{'Rate':>8}{'Aggregate':>11}{'Sustained':>11}{'Samples':>10}{'Lag (ms)':>10}{'Send max (us)':>15}")
+    configs = [
+        {
+            "N_INPUTS": args.n_inputs,
+            "SAMPLING_RATE": rate,
+            "DATA_TYPE": args.data_type,
+            "SHARED_TIMER": args.shared_timer,
+            "STREAM_GROUP": args.stream_group,
+            "DURATION": args.duration,
+        }
+        for rate in args.rates
+    ]
+    if args.regression:
+        configs = [{**configs[0], **case} for case in regression_cases]
+    try:
+        for config in configs:
+            result = run_benchmark(board, config, args.lag_tolerance)
+            report["results"].append(result)
+            send_max = result["stream_service_us"]["max"] if result["stream_service_us"] else "-"
+            print(
+                f"{config['SAMPLING_RATE']:>8}{result['aggregate_rate']:>11}{str(result['sustained']):>11}"
+                f"{result['min_samples']:>10}{result['max_lag_ms']:>10.1f}{send_max:>15}"
+            )
+            for failure in result["failures"]:
+                print(f"    {failure}")
+    finally:
+        board.close()
+    sustained = [result["aggregate_rate"] for result in report["results"] if result["sustained"]]
+    report["max_sustained_aggregate_rate"] = max(sustained) if sustained else None
+    print(f"\nMaximum sustained aggregate sample rate: {report['max_sustained_aggregate_rate']} Hz")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {args.output}")
+    if args.regression and len(sustained) < len(configs):
+        sys.exit("Regression cases not sustained.")
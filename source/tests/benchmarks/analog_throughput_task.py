@@ -0,0 +1,51 @@
+# Task run by analog_throughput_benchmark.py, see that file for a description of the
+# benchmark.  Streams data from N_INPUTS analog inputs sampled at SAMPLING_RATE, then
+# stops itself after the configured duration.
+
+from pyControl.utility import *
+from devices import *
+
+try:
+    from analog_benchmark_config import *  # Configuration written to board by benchmark.
+except ImportError:
+    N_INPUTS = 4  # Number of analog inputs.
+    SAMPLING_RATE = 1000  # Sampling rate of each input (Hz).
+    DATA_TYPE = "H"  # Data type of streamed samples.
+    SHARED_TIMER = False  # Whether inputs are sampled from a shared timer.
+    STREAM_GROUP = False  # Whether inputs are sampled and streamed as a single group.
+    DURATION = 5000  # Duration of run (ms).
+
+# Hardware.
+
+analog_pins = ["X1", "X2", "X3", "X4", "X5", "X6", "X7", "X8", "X11", "X12", "X19", "X20", "X21", "X22", "Y11", "Y12"]
+
+analog_inputs = [
+    Analog_input(
+        pin,
+        "analog_{}".format(i),
+        SAMPLING_RATE,
+        data_type=DATA_TYPE,
+        shared_timer=SHARED_TIMER,
+        stream_group="analog" if STREAM_GROUP else None,
+    )
+    for i, pin in enumerate(analog_pins[:N_INPUTS])
+]
+
+# States and events.
+
+states = ["streaming"]
+
+events = ["stop"]
+
+initial_state = "streaming"
+
+# Define behaviour.
+
+
+def run_start():
+    set_timer("stop", DURATION)
+
+
+def streaming(event):
+    if event == "stop":
+        stop_framework()
@@ -0,0 +1,150 @@
+# Benchmark for converting data from the board into tsv file rows and GUI log text.
+# Measures rows/second for Data_logger.data_to_string and for the previous implementation,
+# which built the output by repeated string concatenation, and checks the two produce
+# identical output.  Data is loaded from a recorded session .tsv file if specified,
+# otherwise a synthetic session is generated.  Run from the pyControl root folder with:
+#     python -m source.tests.benchmarks.data_logger_benchmark --file path/to/session.tsv
+
+import time
+import json
+import argparse
+import numpy as np
+from source.communication.data_logger import Data_logger, ms_to_readable_time
+from source.communication.message import MsgType, Datatuple
+from source.tests.benchmarks.plotting_benchmark import make_sm_info
+from source.tests.benchmarks.log_benchmark import Benchmark_board
+
+
+def data_to_string_concat(data_logger, new_data, prettify=False, max_len=60):
+    """Previous implementation of Data_logger.data_to_string, used as reference."""
+    data_string = ""
+    for nd in new_data:
+        time = ms_to_readable_time(nd.time) if prettify else nd.time
+        if nd.type == MsgType.STATE:
+            data_string += data_logger.tsv_row_str("state", time, content=data_logger.board.sm_info.ID2name[nd.content])
+        elif nd.type == MsgType.EVENT:
+            data_string += data_logger.tsv_row_str(
+                "event", time, nd.subtype, data_logger.board.sm_info.ID2name[nd.content]
+            )
+        elif nd.type == MsgType.PRINT:
+            if prettify:
+                print_str = nd.content.replace("\n", "\n\t\t\t")
+            else:
+                print_str = nd.content.replace("\n", "|").replace("\r", "|")
+            data_string += data_logger.tsv_row_str("print", time, nd.subtype, content=print_str)
+        elif nd.type == MsgType.VARBL:
+            var_str = nd.content
+            if prettify:
+                variables_dict = json.loads(nd.content)
+                if len(repr(variables_dict)) > max_len:
+                    var_str = "{\n"
+                    for var_name, var_value in sorted(variables_dict.items(), key=lambda x: x[0].lower()):
+                        var_str += f'\t\t\t"{var_name}": {var_value}\n'
+                    var_str += "\t\t\t}"
+            data_string += data_logger.tsv_row_str("variable", time, nd.subtype, content=var_str)
+        elif nd.type == MsgType.WARNG:
+            data_string += data_logger.tsv_row_str("warning", time, content=nd.content)
+        elif nd.type == MsgType.ERROR:
+            content = nd.content
+            if prettify:
+                content = f"\n\n{content}"
+            else:
+                content = content.replace("\n", "|").replace("\r", "|")
+            data_string += data_logger.tsv_row_str("error", time, content=content)
+    return data_string
+
+
+def load_session(file_path):
+    """Return state machine info and list of Datatuples for the rows of a recorded .tsv session file."""
+    rows = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        next(f)  # Skip header.
+        for line in f:
+            time_str, rtype, subtype, content = line.rstrip("\n").split("\t", 3)
+            rows.append((int(round(float(time_str) * 1000)), rtype, subtype, content))
+    states = sorted({content for _, rtype, _, content in rows if rtype == "state"})
+    events = sorted({content for _, rtype, _, content in rows if rtype == "event"})
+    sm_info = make_sm_info(0, 0, {})._replace(
+        states={name: i + 1 for i, name in enumerate(states)},
+        events={name: i + 1 + len(states) for i, name in enumerate(events)},
+    )
+    sm_info = sm_info._replace(ID2name={ID: name for name, ID in {**sm_info.states, **sm_info.events}.items()})
+    msg_types = {"print": MsgType.PRINT, "variable": MsgType.VARBL, "warning": MsgType.WARNG}
+    data = []
+    for t, rtype, subtype, content in rows:
+        if rtype == "state":
+            data.append(Datatuple(time=t, type=MsgType.STATE, content=sm_info.states[content]))
+        elif rtype == "event":
+            data.append(Datatuple(time=t, type=MsgType.EVENT, subtype=subtype, content=sm_info.events[content]))
+        elif rtype in msg_types:
+            data.append(Datatuple(time=t, type=msg_types[rtype], subtype=subtype, content=content))
+    return sm_info, data
+
+
+def make_session(n_rows, rng):
+    """Return state machine info and list of Datatuples for a synthetic session."""
+    sm_info = make_sm_info(n_states=6, n_events=8, analog_inputs={})
+    state_IDs = list(sm_info.states.values())
+    event_IDs = list(sm_info.events.values())
+    subtypes = ["input", "timer", "sync"]
+    data = []
+    for i in range(n_rows):
+        t = i * 10
+        r = rng.random()
+        if r < 0.3:
+            data.append(Datatuple(time=t, type=MsgType.STATE, content=int(rng.choice(state_IDs))))
+        elif r < 0.95:
+            subtype = subtypes[int(rng.integers(len(subtypes)))]
+            data.append(Datatuple(time=t, type=MsgType.EVENT, subtype=subtype, content=int(rng.choice(event_IDs))))
+        elif r < 0.99:
+            data.append(Datatuple(time=t, type=MsgType.PRINT, subtype="task", content=f"trial {i} complete"))
+        else:
+            data.append(Datatuple(time=t, type=MsgType.VARBL, subtype="print", content=json.dumps({"n_trials": i})))
+    return sm_info, data
+
+
+def time_rows_per_second(func, data, batch_size, repeats=5):
+    """Return the best of repeats rows/second for converting data in batches."""
+    batches = [data[i : i + batch_size] for i in range(0, len(data), batch_size)]
+    best_time = np.inf
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for batch in batches:
+            func(batch)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return len(data) / best_time
+
+
+def run_benchmark(sm_info, data, batch_size):
+    """Run the benchmark and return dict of rows/second for each implementation and output format."""
+    data_logger = Data_logger(board=Benchmark_board(sm_info))
+    results = {}
+    for prettify in (False, True):
+        output = data_logger.data_to_string(data, prettify=prettify)
+        reference = data_to_string_concat(data_logger, data, prettify=prettify)
+        assert output == reference, "data_to_string output differs from reference implementation."
+        key = "log" if prettify else "file"
+        results[f"{key}_concat"] = time_rows_per_second(
+            lambda batch: data_to_string_concat(data_logger, batch, prettify=prettify), data, batch_size
+        )
+        results[f"{key}_join"] = time_rows_per_second(
+            lambda batch: data_logger.data_to_string(batch, prettify=prettify), data, batch_size
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark conversion of data to tsv rows and log text.")
+    parser.add_argument("--file", help="Recorded session .tsv file to load data from.")
+    parser.add_argument("--rows", type=int, default=200000, help="Number of rows if generating synthetic data.")
+    parser.add_argument("--batch", type=int, default=20, help="Rows converted per call to data_to_string.")
+    args = parser.parse_args()
+    if args.file:
+        sm_info, data = load_session(args.file)
+    else:
+        sm_info, data = make_session(args.rows, np.random.default_rng(0))
+    results = run_benchmark(sm_info, data, args.batch)
+    print(f"{len(data)} rows in batches of {args.batch}. Rows/second:")
+    for key in ("file", "log"):
+        concat, join = results[f"{key}_concat"], results[f"{key}_join"]
+        print(f"  {key:<4} - concatenation: {concat:.0f}, join: {join:.0f}, speedup: {join/concat:.2f}x")
@@ -0,0 +1,54 @@
+# Benchmark for file transfer to a pyboard.  Transfers the pyControl framework files to a
+# test folder on a connected board using the windowed and stop-and-wait transfer
+# protocols and reports the throughput of each.  Requires a pyboard with the pyControl
+# framework loaded.  Run from the pyControl root folder with:
+#     python -m source.tests.benchmarks.file_transfer_benchmark --port COM3
+
+import os
+import time
+import argparse
+from source.communication.pycboard import Pycboard
+
+test_folder = "transfer_test"
+
+
+def transfer_framework(board, windowed):
+    """Transfer framework files to test folder on board, return (bytes sent, seconds)."""
+    board.windowed_transfer = windowed
+    framework_folder = os.path.join("source", "pyControl")
+    files = [f for f in os.listdir(framework_folder) if f.endswith(".py")]
+    board.exec(f"import os\ntry:\n os.mkdir({repr(test_folder)})\nexcept OSError:\n pass")
+    for f in files:  # Remove previously transferred files so all files are sent.
+        board.remove_file(f"{test_folder}/{f}", update_manifest=False)
+    board.write_manifest()
+    start_time = time.time()
+    bytes_sent = 0
+    for f in files:
+        bytes_sent += board.transfer_file(
+            os.path.join(framework_folder, f), f"{test_folder}/{f}", update_manifest=False
+        )
+    return bytes_sent, time.time() - start_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark file transfer throughput to a pyboard.")
+    parser.add_argument("--port", required=True, help="Serial port of pyboard.")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of transfers using each protocol.")
+    args = parser.parse_args()
+    board = Pycboard(args.port, verbose=False)
+    try:
+        for windowed in (False, True):
+            for _ in range(args.repeats):
+                bytes_sent, transfer_time = transfer_framework(board, windowed)
+                print(
+                    f"{'Windowed' if windowed else 'Stop-and-wait'} transfer: {bytes_sent/1000:.0f} kB in "
+                    f"{transfer_time:.2f}s, {bytes_sent/1000/transfer_time:.1f} kB/s"
+                )
+            if windowed and not board.windowed_transfer:
+                print("Windowed transfer failed, stop-and-wait transfer was used.")
+        for f in board.get_folder_contents(test_folder):
+            board.remove_file(f"{test_folder}/{f}", update_manifest=False)
+        board.write_manifest()
+        board.exec(f"os.rmdir({repr(test_folder)})")
+    finally:
+        board.close()
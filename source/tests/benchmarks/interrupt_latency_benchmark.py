@@ -0,0 +1,142 @@
+# Benchmark for the latency from a digital input edge to the resulting event being
+# processed by the state machine, with concurrent analog data streaming and timers.
+# Runs interrupt_latency_task.py at each of a set of edge rates and measures the mean,
+# maximum and histogram of the latency from the timer interrupt that generates each edge
+# to the task's event handler, the number of dropped edges, and the framework main loop
+# profile (see source/pyControl/profiler.py).  Results are written to a JSON report for
+# regression tracking.  By default the benchmark runs on the simulated pyboard, to run
+# on a pyboard with the pyControl framework loaded, connect pin Y1 to pin Y2 and specify
+# the serial port.  Run from the pyControl root folder with:
+#     python -m source.tests.benchmarks.interrupt_latency_benchmark --edge-rates 100 1000 5000
+#     python -m source.tests.benchmarks.interrupt_latency_benchmark --port COM3
+
+import os
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from source.communication.message import MsgType
+from source.communication.pycboard import Pycboard
+from source.simulator import Virtual_board, Simulated_pycboard
+
+task_dir = os.path.dirname(__file__)
+
+analog_pins = ["X19", "X20", "X21", "X22"]
+
+
+class Report_collector:
+    """Data consumer which collects the task's latency report and the profile summary."""
+
+    def __init__(self):
+        self.latency_report = None
+        self.profile = None
+
+    def process_data(self, new_data):
+        for nd in new_data:
+            if nd.type == MsgType.PRINT and nd.content.startswith("latency_report "):
+                self.latency_report = json.loads(nd.content.split(" ", 1)[1])
+            elif nd.type == MsgType.PROFL:
+                self.profile = json.loads(nd.content)
+            elif nd.type in (MsgType.WARNG, MsgType.ERROR):
+                print(nd.content)
+
+
+def write_config(config):
+    """Write config dict to a temporary python file of constants, return the file path."""
+    config_file, config_path = tempfile.mkstemp(suffix=".py")
+    with os.fdopen(config_file, "w") as f:
+        for name, value in config.items():
+            f.write(f"{name} = {repr(value)}\n")
+    return config_path
+
+
+def run_benchmark(board, config):
+    """Run the latency benchmark task on board with the specified configuration, return
+    the results dict."""
+    config_path = write_config(config)
+    try:
+        board.transfer_file(config_path, "latency_benchmark_config.py", update_manifest=False)
+    finally:
+        os.remove(config_path)
+    board.setup_state_machine("interrupt_latency_task", sm_dir=task_dir)
+    collector = Report_collector()
+    board.data_consumers = [collector]
+    board.start_framework(data_output=True, profile=True)
+    if isinstance(board, Simulated_pycboard):
+        board.run_framework(config["DURATION"] + 1000)
+    else:
+        timeout = time.time() + config["DURATION"] / 1000 + 5
+        while board.framework_running and time.time() < timeout:
+            time.sleep(0.01)
+            board.process_data()
+        if board.framework_running:
+            board.stop_framework()
+            time.sleep(0.05)
+            board.process_data()
+    return {"config": config, "latency": collector.latency_report, "profile": collector.profile}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark digital input edge to event latency.")
+    parser.add_argument("--port", help="Serial port of pyboard, if not specified the simulator is used.")
+    parser.add_argument("--edge-rates", type=int, nargs="+", default=[100, 1000, 5000], help="Edges per second.")
+    parser.add_argument("--n-analog", type=int, default=2, help="Number of streaming analog inputs (max 4).")
+    parser.add_argument("--analog-rate", type=int, default=1000, help="Analog input sampling rate (Hz).")
+    parser.add_argument(
+        "--shared-analog-timer", action="store_true", help="Sample analog inputs from a shared hardware timer."
+    )
+    parser.add_argument("--n-timers", type=int, default=4, help="Number of concurrently running timers.")
+    parser.add_argument("--timer-interval", type=int, default=5, help="Interval of timers (ms).")
+    parser.add_argument("--duration", type=int, default=5000, help="Duration of each run (ms).")
+    parser.add_argument("--seed", type=int, default=0, help="Random number generator seed for simulator.")
+    parser.add_argument(
+        "--output",
+        default=os.path.join(tempfile.gettempdir(), "interrupt_latency_report.json"),
+        help="Path of report file, saved in the temporary files folder by default.",
+    )
+    args = parser.parse_args()
+    quiet = lambda *args, **kwargs: None
+    if args.port:
+        board = Pycboard(args.port, verbose=False, print_func=quiet)
+    else:
+        board = Simulated_pycboard(Virtual_board(seed=args.seed), print_func=quiet)
+        board.board.connect_pins("Y1", "Y2")
+    report = {
+        "benchmark": "interrupt_latency",
+        "target": args.port or "simulator",
+        "framework_version": board.framework_version,
+        "micropython_version": board.micropython_version,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "results": [],
+    }
+    print(f"{'Edge rate':>10}{'Edges':>10}{'Dropped':>10}{'Mean (us)':>12}{'Max (us)':>10}")
+    try:
+        for edge_rate in args.edge_rates:
+            config = {
+                "EDGE_RATE": edge_rate,
+                "EDGE_OUTPUT_PIN": "Y1",
+                "EDGE_INPUT_PIN": "Y2",
+                "ANALOG_PINS": analog_pins[: args.n_analog],
+                "ANALOG_RATE": args.analog_rate,
+                "SHARED_ANALOG_TIMER": args.shared_analog_timer,
+                "N_TIMERS": args.n_timers,
+                "TIMER_INTERVAL": args.timer_interval,
+                "DURATION": args.duration,
+            }
+            result = run_benchmark(board, config)
+            report["results"].append(result)
+            latency = result["latency"]
+            if latency is None:
+                print(f"{edge_rate:>10}  No latency report received.")
+                continue
+            mean_latency = f"{latency['mean_latency_us']:.0f}" if latency["n_events"] else "-"
+            print(
+                f"{edge_rate:>10}{latency['n_edges']:>10}{latency['dropped_edges']:>10}"
+                f"{mean_latency:>12}{latency['max_latency_us']:>10}"
+            )
+    finally:
+        board.close()
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to {args.output}")
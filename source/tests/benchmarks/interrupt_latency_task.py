@@ -0,0 +1,127 @@
+# Task run by interrupt_latency_benchmark.py, see that file for a description of the
+# benchmark.  Edges are generated by toggling EDGE_OUTPUT_PIN from a hardware timer
+# interrupt, on a pyboard EDGE_OUTPUT_PIN must be connected to EDGE_INPUT_PIN with a
+# jumper wire.  The time of each edge is recorded by the timer interrupt and the latency
+# measured when the resulting event is processed by the state machine.  Edges are matched
+# to events in order, so latencies are only exact if no edges are dropped.  Analog inputs
+# and timers generate load.  The task stops itself after the configured duration and
+# prints a JSON report of the measurements.
+
+import pyb
+import ujson
+from array import array
+from pyControl.utility import *
+from pyControl.hardware import available_timers
+from devices import *
+
+try:
+    from latency_benchmark_config import *  # Configuration written to board by benchmark.
+except ImportError:
+    EDGE_RATE = 1000  # Edges per second.
+    EDGE_OUTPUT_PIN = "Y1"
+    EDGE_INPUT_PIN = "Y2"
+    ANALOG_PINS = ["X19", "X20"]  # One analog input streaming data is created for each pin.
+    ANALOG_RATE = 1000  # Analog input sampling rate (Hz).
+    SHARED_ANALOG_TIMER = False  # Whether analog inputs are sampled from a shared timer.
+    N_TIMERS = 4  # Number of concurrently running timers.
+    TIMER_INTERVAL = 5  # Interval of timers (ms).
+    DURATION = 5000  # Duration of edge generation (ms).
+
+# Hardware.
+
+edge_input = Digital_input(EDGE_INPUT_PIN, rising_event="edge", falling_event="edge", debounce=False)
+
+analog_inputs = [
+    Analog_input(pin, "analog_{}".format(i), ANALOG_RATE, shared_timer=SHARED_ANALOG_TIMER)
+    for i, pin in enumerate(ANALOG_PINS)
+]
+
+edge_pin = pyb.Pin(EDGE_OUTPUT_PIN, pyb.Pin.OUT)
+
+edge_timer = pyb.Timer(available_timers.pop())
+
+# Measurement variables.
+
+BUFFER_LENGTH = const(256)  # Number of edge times stored.
+
+latency_bins_us = [50, 100, 200, 500, 1000, 2000, 5000, 10000]  # Upper edges of latency histogram bins.
+
+edge_times = array("i", [0] * BUFFER_LENGTH)  # Edge times (us).
+
+latency_histogram = array("I", [0] * (len(latency_bins_us) + 1))
+
+n_edges = 0  # Number of edges generated.
+
+n_events = 0  # Number of edge events processed.
+
+latency_sum = 0
+
+max_latency = 0
+
+# States and events.
+
+states = ["benchmark"]
+
+events = ["edge", "tick", "stop_edges", "stop"]
+
+initial_state = "benchmark"
+
+# Edge generation.
+
+
+def edge_ISR(t):
+    global n_edges
+    edge_times[n_edges % BUFFER_LENGTH] = pyb.micros()
+    n_edges += 1
+    edge_pin.value(n_edges & 1)
+
+
+# Define behaviour.
+
+
+def run_start():
+    edge_pin.value(0)
+    for i in range(N_TIMERS):
+        set_timer("tick", TIMER_INTERVAL * (i + 1) // N_TIMERS + 1)
+    set_timer("stop_edges", DURATION)
+    edge_timer.init(freq=EDGE_RATE)
+    edge_timer.callback(edge_ISR)
+
+
+def run_end():
+    edge_timer.deinit()
+    report = {
+        "n_edges": n_edges,
+        "n_events": n_events,
+        "dropped_edges": n_edges - n_events,
+        "mean_latency_us": latency_sum / n_events if n_events else None,
+        "max_latency_us": max_latency,
+        "latency_bins_us": latency_bins_us,
+        "latency_histogram": list(latency_histogram),
+    }
+    print("latency_report " + ujson.dumps(report))
+
+
+def benchmark(event):
+    if event == "tick":
+        set_timer("tick", TIMER_INTERVAL)
+    elif event == "stop_edges":
+        edge_timer.deinit()
+        set_timer("stop", 100)  # Allow time for outstanding events to be processed.
+    elif event == "stop":
+        stop_framework()
+
+
+def all_states(event):
+    global n_events, latency_sum, max_latency
+    if event == "edge":
+        latency = pyb.elapsed_micros(edge_times[n_events % BUFFER_LENGTH])
+        n_events += 1
+        latency_sum += latency
+        if latency > max_latency:
+            max_latency = latency
+        i = 0
+        while i < len(latency_bins_us) and latency >= latency_bins_us[i]:
+            i += 1
+        latency_histogram[i] += 1
+        return True
@@ -0,0 +1,106 @@
+# Benchmark for the GUI run log.  Feeds synthetic state, event and print messages through
+# a Data_logger into a Log_textbox, flushing the log once per simulated GUI frame, and
+# reports throughput, time per frame and number of lines retained.  With --hidden the log
+# is not shown, so data is buffered without being formatted.  For comparison the
+# same data can be written to a QTextEdit with one insert per message, as the log was
+# previously updated.  Run from the pyControl root folder with:
+#     python -m source.tests.benchmarks.log_benchmark --lines 1000000
+
+import os
+import time
+import argparse
+import numpy as np
+from pyqtgraph.Qt import QtGui, QtWidgets
+from source.gui.utility import Log_textbox
+from source.communication.data_logger import Data_logger
+from source.communication.message import MsgType, Datatuple
+from source.tests.benchmarks.plotting_benchmark import make_sm_info
+
+
+class Benchmark_board:
+    """Minimal stand in for a Pycboard providing the attributes used by Data_logger."""
+
+    def __init__(self, sm_info):
+        self.sm_info = sm_info
+
+
+def make_frames(sm_info, n_lines, lines_per_frame, rng):
+    """Return list of frames, each a list of Datatuples generating one log line each."""
+    state_IDs = list(sm_info.states.values())
+    event_IDs = list(sm_info.events.values())
+    frames = []
+    for i in range(0, n_lines, lines_per_frame):
+        frame = []
+        for j in range(min(lines_per_frame, n_lines - i)):
+            t = (i + j) * 10
+            r = rng.random()
+            if r < 0.3:
+                frame.append(Datatuple(time=t, type=MsgType.STATE, content=int(rng.choice(state_IDs))))
+            elif r < 0.9:
+                frame.append(Datatuple(time=t, type=MsgType.EVENT, subtype="input", content=int(rng.choice(event_IDs))))
+            else:
+                frame.append(Datatuple(time=t, type=MsgType.PRINT, subtype="task", content=f"trial {i+j} complete"))
+        frames.append(frame)
+    return frames
+
+
+def run_benchmark(n_lines, lines_per_frame, max_lines, legacy=False, hidden=False, seed=0):
+    """Run the benchmark and return dict of results."""
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    sm_info = make_sm_info(n_states=6, n_events=8, analog_inputs={})
+    frames = make_frames(sm_info, n_lines, lines_per_frame, np.random.default_rng(seed))
+    if legacy:
+        textbox = QtWidgets.QTextEdit()
+        textbox.setReadOnly(True)
+
+        def print_func(print_string, end="\n"):
+            textbox.moveCursor(QtGui.QTextCursor.MoveOperation.End)
+            textbox.insertPlainText(print_string + end)
+            textbox.moveCursor(QtGui.QTextCursor.MoveOperation.End)
+
+        data_logger = Data_logger(board=Benchmark_board(sm_info), print_func=print_func)
+    else:
+        textbox = Log_textbox(max_lines=max_lines)
+        data_logger = Data_logger(board=Benchmark_board(sm_info), print_func=textbox.print)
+        textbox.set_data_logger(data_logger)
+    textbox.resize(800, 400)
+    if not hidden:
+        textbox.show()
+    frame_times = []
+    start_time = time.perf_counter()
+    for frame in frames:
+        frame_start = time.perf_counter()
+        for nd in frame:  # Messages are passed to the data logger individually as worst case.
+            data_logger.process_data([nd])
+        if not legacy:
+            textbox.flush()
+        app.processEvents()
+        frame_times.append(1000 * (time.perf_counter() - frame_start))
+    total_time = time.perf_counter() - start_time
+    n_blocks = len(textbox.pending) if hidden else textbox.document().blockCount()  # Hidden log retains data.
+    textbox.close()
+    return {
+        "lines_per_second": n_lines / total_time,
+        "mean_frame": np.mean(frame_times),
+        "max_frame": np.max(frame_times),
+        "lines_retained": n_blocks,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark run log throughput with synthetic data.")
+    parser.add_argument("--lines", type=int, default=1000000, help="Number of log lines.")
+    parser.add_argument("--per-frame", type=int, default=100, help="Log lines generated per GUI frame.")
+    parser.add_argument("--max-lines", type=int, default=10000, help="Maximum lines retained by log (0 no limit).")
+    parser.add_argument("--legacy", action="store_true", help="Use per message inserts into a QTextEdit.")
+    parser.add_argument("--hidden", action="store_true", help="Do not show the log.")
+    parser.add_argument("--offscreen", action="store_true", help="Render without displaying windows.")
+    args = parser.parse_args()
+    if args.offscreen:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    results = run_benchmark(args.lines, args.per_frame, args.max_lines, args.legacy, args.hidden)
+    print(
+        f"{args.lines} lines, {'legacy' if args.legacy else 'batched'}{' hidden' if args.hidden else ''} log. "
+        f"Lines/second: {results['lines_per_second']:.0f}, frame time (ms) - mean: {results['mean_frame']:.2f}, "
+        f"max: {results['max_frame']:.2f}, lines retained: {results['lines_retained']}"
+    )
@@ -0,0 +1,131 @@
+# Benchmark for the GUI task plots.  Creates a Task_plot for each of a number of
+# simulated subjects, feeds them synthetic streams of state, event and analog data
+# and measures the time taken to process the data and redraw the plots each frame.
+# Run from the pyControl root folder with:
+#     python -m source.tests.benchmarks.plotting_benchmark --subjects 8 --duration 10
+
+import os
+import time
+import argparse
+import numpy as np
+from array import array
+from pyqtgraph.Qt import QtWidgets
+from source.gui.plotting import Task_plot
+from source.communication.message import MsgType, Datatuple
+from source.communication.pycboard import State_machine_info
+
+
+def make_sm_info(n_states, n_events, analog_inputs):
+    """Return a State_machine_info for a synthetic task."""
+    states = {f"state_{i}": i + 1 for i in range(n_states)}
+    events = {f"event_{i}": i + 1 + n_states for i in range(n_events)}
+    return State_machine_info(
+        name="benchmark",
+        task_hash=0,
+        states=states,
+        events=events,
+        ID2name={ID: name for name, ID in {**states, **events}.items()},
+        analog_inputs=analog_inputs,
+        variables={},
+        framework_version="",
+        micropython_version=0.0,
+    )
+
+
+class Synthetic_stream:
+    """Generates new data for one subject at specified mean rates."""
+
+    def __init__(self, sm_info, state_rate, event_rate, rng):
+        self.state_IDs = list(sm_info.states.values())
+        self.event_IDs = list(sm_info.events.values())
+        self.analog_inputs = sm_info.analog_inputs
+        self.state_rate = state_rate
+        self.event_rate = event_rate
+        self.rng = rng
+        self.last_time = 0
+        self.analog_samples = {ID: 0 for ID in self.analog_inputs}
+
+    def get_data(self, run_time_ms):
+        """Return list of Datatuples generated since last call."""
+        dt = run_time_ms - self.last_time
+        new_data = []
+        for _ in range(self.rng.poisson(self.state_rate * dt / 1000)):
+            t = self.rng.integers(self.last_time, run_time_ms + 1)
+            new_data.append(Datatuple(time=int(t), type=MsgType.STATE, content=int(self.rng.choice(self.state_IDs))))
+        for _ in range(self.rng.poisson(self.event_rate * dt / 1000)):
+            t = self.rng.integers(self.last_time, run_time_ms + 1)
+            new_data.append(Datatuple(time=int(t), type=MsgType.EVENT, content=int(self.rng.choice(self.event_IDs))))
+        for ID, ai in self.analog_inputs.items():
+            chunk_size = max(4, ai["fs"] // 10)
+            n_due = int(run_time_ms * ai["fs"] / 1000) - self.analog_samples[ID]
+            for _ in range(n_due // chunk_size):
+                chunk_time = int(self.analog_samples[ID] * 1000 / ai["fs"])
+                data = array(ai["dtype"], self.rng.integers(0, 4096, chunk_size).tolist())
+                new_data.append(Datatuple(time=chunk_time, type=MsgType.ANLOG, content=(ID, data)))
+                self.analog_samples[ID] += chunk_size
+        new_data.sort(key=lambda nd: nd.time)
+        self.last_time = run_time_ms
+        return new_data
+
+
+def run_benchmark(n_subjects, duration, update_interval, state_rate, event_rate, n_analog, analog_fs, seed=0):
+    """Run the benchmark and return a dict of frame time statistics in ms."""
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    rng = np.random.default_rng(seed)
+    analog_inputs = {
+        100 + i: {"name": f"analog_{i}", "fs": analog_fs, "dtype": "H", "plot": True} for i in range(n_analog)
+    }
+    sm_info = make_sm_info(n_states=6, n_events=8, analog_inputs=analog_inputs)
+    task_plots, streams = [], []
+    for _ in range(n_subjects):
+        task_plot = Task_plot()
+        task_plot.resize(700, 600)
+        task_plot.show()
+        task_plot.set_state_machine(sm_info)
+        task_plot.run_start(recording=False)
+        task_plots.append(task_plot)
+        streams.append(Synthetic_stream(sm_info, state_rate, event_rate, rng))
+    frame_times = []
+    start_time = time.perf_counter()
+    while (time.perf_counter() - start_time) < duration:
+        frame_start = time.perf_counter()
+        run_time_ms = int(1000 * (frame_start - start_time))
+        for task_plot, stream in zip(task_plots, streams):
+            task_plot.process_data(stream.get_data(run_time_ms))
+            task_plot.update()
+        app.processEvents()  # Render the plots.
+        frame_end = time.perf_counter()
+        frame_times.append(1000 * (frame_end - frame_start))
+        time.sleep(max(0, update_interval / 1000 - (frame_end - frame_start)))
+    for task_plot in task_plots:
+        task_plot.close()
+    frame_times = np.array(frame_times)
+    return {
+        "frames": len(frame_times),
+        "mean": np.mean(frame_times),
+        "median": np.median(frame_times),
+        "p95": np.percentile(frame_times, 95),
+        "max": np.max(frame_times),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark task plot frame times with synthetic data.")
+    parser.add_argument("--subjects", type=int, default=8, help="Number of simulated subjects.")
+    parser.add_argument("--duration", type=float, default=10, help="Benchmark duration (seconds).")
+    parser.add_argument("--interval", type=int, default=10, help="Plot update interval (ms).")
+    parser.add_argument("--state-rate", type=float, default=5, help="Mean state transitions per second.")
+    parser.add_argument("--event-rate", type=float, default=20, help="Mean events per second.")
+    parser.add_argument("--analog", type=int, default=0, help="Number of analog inputs per subject.")
+    parser.add_argument("--fs", type=int, default=1000, help="Analog sampling rate (Hz).")
+    parser.add_argument("--offscreen", action="store_true", help="Render without displaying windows.")
+    args = parser.parse_args()
+    if args.offscreen:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    stats = run_benchmark(
+        args.subjects, args.duration, args.interval, args.state_rate, args.event_rate, args.analog, args.fs
+    )
+    print(
+        f"{args.subjects} subjects, {stats['frames']} frames. Frame time (ms) - mean: {stats['mean']:.2f}, "
+        f"median: {stats['median']:.2f}, 95th percentile: {stats['p95']:.2f}, max: {stats['max']:.2f}"
+    )